@@ -0,0 +1,114 @@
+import os
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterable
+
+from storage.base import StorageBackend
+from storage.data_version import DataVersion
+from storage.items_index import ItemsIndex
+from storage.month_index import MonthIndex
+from storage.overdue_index import OverdueIndex
+from storage.summary_index import SummaryIndex
+
+logger = logging.getLogger(__name__)
+
+class AsyncStorage:
+    """
+    Fachada assíncrona sobre o backend de armazenamento (Google Sheets ou SQLite).
+
+    As chamadas síncronas do backend são executadas em um pool de threads
+    limitado, para não bloquear o event loop do uvicorn enquanto a API do
+    Google Sheets (ou o disco) responde.
+
+    Leituras têm timeout (SHEETS_CALL_TIMEOUT). Escritas não: a thread não pode
+    ser interrompida, então uma escrita abandonada por timeout ainda poderia ser
+    gravada depois do erro enviado ao cliente, e uma nova tentativa duplicaria o
+    item. A espera das escritas é limitada pelo timeout HTTP do backend
+    (SHEETS_HTTP_TIMEOUT), e o resultado devolvido é sempre o que foi gravado.
+    """
+
+    def __init__(self, manager: StorageBackend, max_workers: int = None, timeout: float = None):
+        self.manager = manager
+        self.max_workers = max_workers or int(os.getenv('SHEETS_MAX_WORKERS', '8'))
+        self.timeout = timeout or float(os.getenv('SHEETS_CALL_TIMEOUT', '30'))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='sheets'
+        )
+        # Totais do resumo mensal atualizados a cada escrita no backend
+        self.summary_index = SummaryIndex()
+        self.manager.add_listener(self.summary_index)
+        # Versão dos dados para o ETag das rotas de leitura
+        self.data_version = DataVersion()
+        self.manager.add_listener(self.data_version)
+        # Índices secundários para a listagem filtrada e paginada de /payments/items
+        self.items_index = ItemsIndex()
+        self.manager.add_listener(self.items_index)
+        # Índice mês -> parcelas para /payments/months/{YYYY-MM}
+        self.month_index = MonthIndex()
+        self.manager.add_listener(self.month_index)
+        # Parcelas não pagas por pessoa, em ordem de mês, para /payments/overdue
+        self.overdue_index = OverdueIndex()
+        self.manager.add_listener(self.overdue_index)
+
+    async def _run(self, func, *args):
+        """Executa uma leitura síncrona no pool de threads, respeitando o timeout"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, functools.partial(func, *args)),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Tempo esgotado ({self.timeout}s) em {func.__name__}")
+            raise
+
+    async def _write(self, func, *args):
+        """Executa uma escrita síncrona no pool de threads e espera o resultado, sem timeout"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def refresh(self):
+        await self._run(self.manager.refresh)
+
+    async def get_all_items(self, include_installments: bool = True) -> List[Dict[str, Any]]:
+        return await self._run(self.manager.get_all_items, include_installments)
+
+    async def query_items(self, ativo: Optional[bool] = None, conta_fixa: Optional[bool] = None,
+                          mes: Optional[str] = None, include_installments: bool = True) -> List[Dict[str, Any]]:
+        return await self._run(self.manager.query_items, ativo, conta_fixa, mes, include_installments)
+
+    async def add_item(self, item_data: Dict[str, Any]) -> str:
+        return await self._write(self.manager.add_item, item_data)
+
+    async def load_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self.manager.load_item, item_id)
+
+    async def save_item(self, item_id: str, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self._write(self.manager.save_item, item_id, item)
+
+    async def load_items(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self._run(self.manager.load_items, item_ids)
+
+    async def save_items(self, items: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return await self._write(self.manager.save_items, items)
+
+    async def modify_items(self, item_ids: List[str],
+                           modify: Callable[[Dict[str, Dict[str, Any]]], Optional[Iterable[str]]]) -> Dict[str, Dict[str, Any]]:
+        """Leitura, modify e gravação numa única chamada ao backend, sob o lock dele (ver StorageBackend.modify_items)"""
+        return await self._write(self.manager.modify_items, item_ids, modify)
+
+    async def modify_item(self, item_id: str, modify: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        return await self._write(self.manager.modify_item, item_id, modify)
+
+    async def update_item(self, item_id: str, item_data: Dict[str, Any]) -> bool:
+        return await self._write(self.manager.update_item, item_id, item_data)
+
+    async def delete_item(self, item_id: str) -> bool:
+        return await self._write(self.manager.delete_item, item_id)
+
+    def shutdown(self):
+        """Encerra o pool de threads"""
+        self._executor.shutdown(wait=False)
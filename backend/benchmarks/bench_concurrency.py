@@ -0,0 +1,167 @@
+"""
+Benchmark de latência com clientes concorrentes
+
+Compara a latência p50/p99 de /payments/summary e /health com 20 clientes
+simultâneos em dois cenários:
+  - antes: chamadas síncronas ao Google Sheets dentro do event loop
+  - depois: fachada AsyncStorage (pool de threads com timeout)
+
+A API do Google Sheets é simulada em memória (fake_sheets.FakeSheetsService)
+com latência fixa e o cache de itens é desativado (TTL 0), para que toda
+requisição chegue à "planilha".
+
+Uso (a partir de backend/, requer httpx e uvicorn):
+    python -m benchmarks.bench_concurrency [--clients 20] [--requests 10] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from typing import List
+
+import httpx
+import uvicorn
+
+import main_service
+from async_storage import AsyncStorage
+from fake_sheets import FakeSheetsService
+from google_sheets_service import GoogleSheetsServiceManager
+from storage.data_version import DataVersion
+from storage.summary_index import SummaryIndex
+
+
+def _make_manager(rows: List[List[str]], latency: float) -> GoogleSheetsServiceManager:
+    """Gerenciador sobre o Google Sheets simulado, sem cache"""
+    service = FakeSheetsService(latency=latency)
+    manager = GoogleSheetsServiceManager(service=service)
+    service.sheets[manager.sheet_name].extend(rows)
+    manager.cache_ttl = 0
+    return manager
+
+
+class _BlockingStorage:
+    """
+    Comportamento anterior: chamadas síncronas executadas no próprio event loop
+
+    Expõe a parte da interface do AsyncStorage usada por /payments/summary.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.summary_index = SummaryIndex()
+        manager.add_listener(self.summary_index)
+        self.data_version = DataVersion()
+        manager.add_listener(self.data_version)
+
+    async def refresh(self):
+        self.manager.refresh()
+
+    async def get_all_items(self, include_installments: bool = True):
+        return self.manager.get_all_items(include_installments)
+
+
+def _make_rows(count: int) -> List[List[str]]:
+    parcelas = [
+        {'mes': f'{(m % 12) + 1:02d}/{2025 + m // 12}', 'valor_pessoa1': 50.0,
+         'valor_pessoa2': 50.0, 'pago_pessoa1': False, 'pago_pessoa2': False}
+        for m in range(12)
+    ]
+    return [
+        [str(i), f'Item {i}', '1200.0', '12', '50.0', '50.0', '2025-01-01 00:00:00',
+         'True', 'False', '', '', 'False', 'False', json.dumps(parcelas), 'True']
+        for i in range(count)
+    ]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _start_server(port: int) -> uvicorn.Server:
+    """Sobe o uvicorn em uma thread separada, como em produção"""
+    config = uvicorn.Config(main_service.app, host='127.0.0.1', port=port, log_level='warning', lifespan='off')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def _run_clients(port: int, clients: int, requests_per_client: int):
+    summary_latencies = []
+    health_latencies = []
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+        async def summary_client():
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                response = await client.get('/payments/summary')
+                summary_latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        async def health_client():
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                await client.get('/health')
+                health_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(summary_client() for _ in range(clients - 1)),
+            health_client()
+        )
+        elapsed = time.perf_counter() - start
+
+    return summary_latencies, health_latencies, elapsed
+
+
+def _run_scenario(storage, port: int, clients: int, requests_per_client: int):
+    main_service.app.dependency_overrides[main_service.get_storage] = lambda: storage
+    main_service.storage_facade = storage
+    server = _start_server(port)
+    try:
+        return asyncio.run(_run_clients(port, clients, requests_per_client))
+    finally:
+        server.should_exit = True
+        main_service.app.dependency_overrides.clear()
+        main_service.storage_facade = None
+
+
+def _report(label: str, summary_latencies, health_latencies, elapsed):
+    print(
+        f"{label:<8} summary p50={_percentile(summary_latencies, 50) * 1000:8.1f}ms "
+        f"p99={_percentile(summary_latencies, 99) * 1000:8.1f}ms | "
+        f"health p99={_percentile(health_latencies, 99) * 1000:8.1f}ms | "
+        f"total={elapsed:6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=10)
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05, help='latência simulada por chamada (s)')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    rows = _make_rows(args.items)
+    manager = _make_manager(rows, args.latency)
+
+    print(f"{args.clients} clientes x {args.requests} requisições, latência simulada {args.latency * 1000:.0f}ms")
+    before = _run_scenario(_BlockingStorage(manager), args.port, args.clients, args.requests)
+    _report('antes', *before)
+
+    async_storage = AsyncStorage(manager, max_workers=args.clients)
+    after = _run_scenario(async_storage, args.port + 1, args.clients, args.requests)
+    async_storage.shutdown()
+    _report('depois', *after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Tempo de uma página de /payments/items (storage.items_index) por tamanho da base
+
+Para cada tamanho, sobe a API sobre o Google Sheets simulado com os itens
+sintéticos (benchmarks/datasets.py) e mede a lista completa e páginas de 50
+itens com filtros (ativos, contas fixas, intervalo de meses, prefixo do nome),
+a primeira e uma do meio da lista (pelo cursor). O tempo das páginas deve ficar
+praticamente igual entre os tamanhos; o da lista completa cresce com a base.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_items_page [--sizes 1k,50k] [--repeat 5]
+"""
+import argparse
+import logging
+import sys
+import warnings
+
+import main_service
+from async_storage import AsyncStorage
+from benchmarks.bench_micro import _measure, _format
+from benchmarks.datasets import DATASET_SIZES, make_items, make_manager
+from storage.items_index import encode_cursor, sort_key
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')
+    from fastapi.testclient import TestClient
+
+QUERIES = {
+    'completa': None,
+    'página': {'limit': 50},
+    'ativos': {'ativo': 'true', 'limit': 50},
+    'contas fixas': {'conta_fixa': 'true', 'limit': 50},
+    'meses': {'mes_inicio': '01/2025', 'mes_fim': '03/2025', 'limit': 50},
+    'prefixo': {'nome_prefixo': 'item 1', 'limit': 50},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,50k', help='tamanhos separados por vírgula (10,1k,50k)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    for label in args.sizes.split(','):
+        items = make_items(DATASET_SIZES[label])
+        manager = make_manager(items)
+        main_service.storage_backend = manager
+        main_service.storage_facade = AsyncStorage(manager)
+        client = TestClient(main_service.app)
+        # Cursor do meio da lista, para a página que não começa no primeiro item
+        middle = sorted((item['id'] for item in items), key=sort_key)[len(items) // 2]
+
+        print(f"[{label}] {len(items)} itens")
+        for name, params in QUERIES.items():
+            variants = [('', params)]
+            if params is not None:
+                variants.append((' (meio)', {**params, 'cursor': encode_cursor(middle)}))
+            for suffix, query in variants:
+                response = client.get('/payments/items', params=query)
+                seconds = _measure(lambda: client.get('/payments/items', params=query), args.repeat)['min']
+                print(f"  {name + suffix:<22} {_format(seconds)}  {len(response.json()):6d} itens  {len(response.content):10,d} bytes")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Memória (RSS) do cache de itens com parcelas compactas e com dicionários
+
+Para cada representação das parcelas no cache do GoogleSheetsServiceManager,
+um processo novo preenche o Google Sheets simulado com os itens sintéticos
+(benchmarks/datasets.py), carrega o cache e mede o RSS antes e depois da carga:
+  - compact: parcelas em installments.CompactInstallments (padrão)
+  - dicts: parcelas como listas de dicionários (representação anterior)
+
+Também mede o tempo de uma leitura completa (get_all_items) com o cache válido.
+O RSS é lido de /proc/self/statm (Linux).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_memory [--sizes 1k,50k]
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.datasets import DATASET_SIZES
+
+VARIANTS = ('dicts', 'compact')
+
+
+def _rss_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def measure(label: str, variant: str) -> dict:
+    """Carrega o cache no processo atual e retorna o RSS e os tempos medidos"""
+    import google_sheets_service
+    from benchmarks.datasets import make_items, make_manager
+
+    if variant == 'dicts':
+        google_sheets_service.compact_installments = lambda parcelas: parcelas
+
+    items = make_items(DATASET_SIZES[label])
+    installments = sum(len(item['parcelas_mensais']) for item in items)
+    manager = make_manager(items)
+    del items
+    gc.collect()
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    manager._get_cache()
+    load_time = time.perf_counter() - start
+    gc.collect()
+    rss_after = _rss_bytes()
+
+    start = time.perf_counter()
+    manager.get_all_items()
+    read_time = time.perf_counter() - start
+
+    return {
+        'itens': DATASET_SIZES[label],
+        'parcelas': installments,
+        'rss_cache': rss_after - rss_before,
+        'carga': load_time,
+        'get_all_items': read_time
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,50k', help='tamanhos separados por vírgula (10,1k,50k)')
+    parser.add_argument('--child', nargs=2, metavar=('SIZE', 'VARIANT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.getLogger('google_sheets_service').setLevel(logging.WARNING)
+
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        return 0
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in DATASET_SIZES]
+    if unknown:
+        parser.error(f"tamanhos inválidos: {', '.join(unknown)}")
+
+    for label in sizes:
+        results = {}
+        for variant in VARIANTS:
+            # Processo novo para cada medição: o RSS não volta ao sistema entre cargas
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_memory', '--child', label, variant],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[variant] = json.loads(output.strip().splitlines()[-1])
+
+        print(f"[{label}] {results['compact']['itens']} itens, {results['compact']['parcelas']} parcelas")
+        for variant, result in results.items():
+            print(
+                f"  {variant:<8} RSS do cache {result['rss_cache'] / 2**20:8.1f} MiB"
+                f"  carga {result['carga']:7.3f}s  get_all_items {result['get_all_items'] * 1e3:9.1f}ms"
+            )
+        saved = results['dicts']['rss_cache'] - results['compact']['rss_cache']
+        print(f"  economia {saved / 2**20:.1f} MiB ({saved / results['dicts']['rss_cache']:.0%})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
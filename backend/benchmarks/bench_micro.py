@@ -0,0 +1,211 @@
+"""
+Microbenchmarks do cálculo do resumo e da leitura da planilha
+
+Mede, para conjuntos sintéticos de 10, 1k e 50k itens (benchmarks/datasets.py):
+  - calculate_monthly_payments: cálculo completo do /payments/summary
+  - generate_monthly_installments: geração das parcelas de todos os itens
+  - load_items: leitura e decodificação das linhas da planilha (Google Sheets
+    simulado em memória, sem latência), o mesmo caminho de get_all_items
+  - get_all_items: leitura completa com o cache válido (cópia dos itens)
+  - summary_totals: totais do resumo pelo SummaryIndex já carregado
+
+Cada benchmark é executado `--repeat` vezes e o menor tempo é comparado com o
+baseline salvo em benchmarks/baseline_micro.json; se algum ficar mais lento que
+o baseline além do limite (--threshold, padrão 25%) mesmo após uma nova medição,
+o processo sai com código 1. Diferenças menores que o piso de ruído absoluto
+(--noise-floor, padrão 20us por chamada) não contam como regressão: nas funções
+de poucos microssegundos (10 itens) elas são só variação da máquina.
+Os tempos dependem da máquina: gere o baseline na mesma máquina usada na
+comparação.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_micro [--sizes 10,1k,50k] [--repeat 5] [--threshold 0.25] [--noise-floor 20]
+    python -m benchmarks.bench_micro --save-baseline
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Any
+
+from benchmarks.datasets import DATASET_SIZES, make_items, make_manager
+from storage.summary_index import SummaryIndex
+from utils import calculate_monthly_payments, generate_monthly_installments
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline_micro.json')
+
+# Tempo mínimo (s) de cada medição; funções rápidas são executadas em laço
+MIN_MEASURE_TIME = 0.2
+# Diferença mínima (s por chamada) em relação ao baseline para contar como regressão
+NOISE_FLOOR = 20e-6
+
+
+def _generate_all_installments(items: List[Dict[str, Any]]):
+    for item in items:
+        generate_monthly_installments(
+            valor_total=item['valor'],
+            parcelas=item['parcelas'],
+            percentual_pessoa1=item['percentual_pessoa1'],
+            percentual_pessoa2=item['percentual_pessoa2'],
+            comecar_mes_atual=item['comecar_mes_atual'],
+            conta_fixa=item['conta_fixa'],
+            valor_manual_pessoa1=item['valor_manual_pessoa1'],
+            valor_manual_pessoa2=item['valor_manual_pessoa2']
+        )
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Executa func em laços de pelo menos MIN_MEASURE_TIME e retorna o tempo por chamada"""
+    func()  # aquecimento
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_MEASURE_TIME:
+            break
+        number *= 10 if elapsed < MIN_MEASURE_TIME / 10 else 2
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - start) / number)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return {'min': min(timings), 'median': statistics.median(timings), 'number': number}
+
+
+def _is_regression(result: Dict[str, float], baseline: Dict[str, float], threshold: float, noise_floor: float) -> bool:
+    """Mais lento que o baseline além do limite relativo e do piso de ruído absoluto"""
+    return (result['min'] > baseline['min'] * (1 + threshold)
+            and result['min'] - baseline['min'] > noise_floor)
+
+
+def run_benchmarks(sizes: List[str], repeat: int, baseline: Dict[str, Dict[str, float]] = None,
+                   threshold: float = 0.25, noise_floor: float = NOISE_FLOOR) -> Dict[str, Dict[str, float]]:
+    """
+    Executa os benchmarks dos tamanhos informados
+
+    Com baseline, um benchmark acima do limite é medido mais uma vez antes de
+    ser considerado regressão (ruído de outros processos na máquina).
+    """
+    results = {}
+    for label in sizes:
+        items = make_items(DATASET_SIZES[label])
+        manager = make_manager(items)
+        summary_index = SummaryIndex()
+        summary_index.on_load(items)
+
+        benchmarks = {
+            'calculate_monthly_payments': lambda: calculate_monthly_payments(items),
+            'generate_monthly_installments': lambda: _generate_all_installments(items),
+            'load_items': manager._load_items,
+            'get_all_items': manager.get_all_items,
+            'summary_totals': lambda: summary_index.totals(items),
+        }
+        for name, func in benchmarks.items():
+            key = f'{name}[{label}]'
+            result = _measure(func, repeat)
+            if baseline and key in baseline and _is_regression(result, baseline[key], threshold, noise_floor):
+                retry = _measure(func, repeat)
+                if retry['min'] < result['min']:
+                    result = retry
+            results[key] = result
+            print(f"{key:<40} min={_format(result['min'])} median={_format(result['median'])}")
+
+        del items, manager, summary_index
+        gc.collect()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float,
+            noise_floor: float = NOISE_FLOOR) -> List[str]:
+    """Retorna os benchmarks que ficaram mais lentos que o baseline além do limite e do piso de ruído"""
+    regressions = []
+    print(f"\nComparação com o baseline (limite +{threshold:.0%}, piso de ruído {_format(noise_floor).strip()}):")
+    for key, result in results.items():
+        if key not in baseline:
+            print(f"{key:<40} sem baseline")
+            continue
+        ratio = result['min'] / baseline[key]['min']
+        status = 'OK'
+        if _is_regression(result, baseline[key], threshold, noise_floor):
+            status = 'REGRESSÃO'
+            regressions.append(key)
+        elif ratio > 1 + threshold:
+            status = 'OK (abaixo do piso de ruído)'
+        print(f"{key:<40} {ratio:6.2f}x  {status}")
+    return regressions
+
+
+def _format(seconds: float) -> str:
+    if seconds >= 1:
+        return f'{seconds:8.3f}s '
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:8.3f}ms'
+    return f'{seconds * 1e6:8.3f}us'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(DATASET_SIZES), help='tamanhos separados por vírgula (10,1k,50k)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=0.25, help='regressão máxima tolerada (0.25 = 25%%)')
+    parser.add_argument('--noise-floor', type=float, default=NOISE_FLOOR * 1e6,
+                        help='diferença mínima por chamada para contar como regressão (us)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='grava os resultados como novo baseline')
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in DATASET_SIZES]
+    if unknown:
+        parser.error(f"tamanhos inválidos: {', '.join(unknown)}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    # Os logs de cada leitura da planilha atrapalham a medição
+    logging.getLogger('google_sheets_service').setLevel(logging.WARNING)
+
+    if args.save_baseline:
+        baseline.update(run_benchmarks(sizes, args.repeat))
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'machine': {'python': platform.python_version(), 'platform': platform.platform()},
+                'results': baseline
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline gravado em {args.baseline}")
+        return 0
+
+    noise_floor = args.noise_floor / 1e6
+    results = run_benchmarks(sizes, args.repeat, baseline, args.threshold, noise_floor)
+    if not baseline:
+        print(f"\nBaseline não encontrado ({args.baseline}); use --save-baseline")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, noise_floor)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) mais lento(s) que o baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
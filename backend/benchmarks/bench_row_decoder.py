@@ -0,0 +1,114 @@
+"""
+Linhas por segundo na decodificação da aba principal (sheet_rows.RowDecoder)
+
+Para as linhas geradas a partir dos itens sintéticos (benchmarks/datasets.py),
+compara o laço anterior de GoogleSheetsServiceManager._row_to_item (testes de
+tamanho por campo e json.loads com except genérico) com o RowDecoder:
+  - campos: só as colunas simples, sem decodificar as parcelas
+  - completo: com o JSON das parcelas (json e, se instalado, orjson)
+e confere que os itens decodificados são iguais.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_row_decoder [--sizes 1k,50k] [--repeat 5]
+"""
+import argparse
+import json
+import logging
+import sys
+
+import sheet_rows
+from benchmarks.bench_micro import _measure
+from benchmarks.datasets import DATASET_SIZES, make_items, make_manager
+from google_sheets_service import SHEET_HEADERS
+from installments import installments_from_json
+
+
+def legacy_row_to_item(row, decode_installments=True):
+    """Decodificação de linha anterior ao RowDecoder (referência)"""
+    parcelas_mensais = []
+    if decode_installments and len(row) > 13 and row[13]:
+        try:
+            parcelas_mensais = installments_from_json(json.loads(row[13]))
+        except:
+            parcelas_mensais = []
+
+    return {
+        'id': row[0] if len(row) > 0 else '',
+        'nome': row[1] if len(row) > 1 else '',
+        'valor': float(row[2]) if len(row) > 2 and row[2] else 0.0,
+        'parcelas': int(row[3]) if len(row) > 3 and row[3] else 1,
+        'percentual_pessoa1': float(row[4]) if len(row) > 4 and row[4] else 0.0,
+        'percentual_pessoa2': float(row[5]) if len(row) > 5 and row[5] else 0.0,
+        'data_criacao': row[6] if len(row) > 6 else '',
+        'ativo': row[7].lower() == 'true' if len(row) > 7 else True,
+        'conta_fixa': row[8].lower() == 'true' if len(row) > 8 else False,
+        'valor_manual_pessoa1': float(row[9]) if len(row) > 9 and row[9] and row[9] != 'None' else None,
+        'valor_manual_pessoa2': float(row[10]) if len(row) > 10 and row[10] and row[10] != 'None' else None,
+        'pago_pessoa1': row[11].lower() == 'true' if len(row) > 11 else False,
+        'pago_pessoa2': row[12].lower() == 'true' if len(row) > 12 else False,
+        'parcelas_mensais': parcelas_mensais,
+        'comecar_mes_atual': row[14].lower() == 'true' if len(row) > 14 else True
+    }
+
+
+def legacy_decode(rows, decode_installments=True):
+    return [legacy_row_to_item(row, decode_installments) for row in rows if len(row) >= 7]
+
+
+def decoder_decode(decoder, rows):
+    decoded, _ = decoder.decode_rows(rows)
+    return [item for _, item in decoded]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,50k', help='tamanhos separados por vírgula (10,1k,50k)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger('google_sheets_service').setLevel(logging.WARNING)
+    orjson_module = sheet_rows.orjson
+    identical = True
+
+    for label in args.sizes.split(','):
+        items = make_items(DATASET_SIZES[label])
+        manager = make_manager(items[:1])
+        rows = [manager._item_to_row(item['id'], item) for item in items]
+        # Células vazias do final são omitidas pela API, como na leitura real
+        for row in rows:
+            while row and row[-1] == '':
+                row.pop()
+
+        fields_decoder = sheet_rows.RowDecoder(SHEET_HEADERS, SHEET_HEADERS, decode_installments=False)
+        full_decoder = sheet_rows.RowDecoder(SHEET_HEADERS, SHEET_HEADERS)
+
+        variants = {
+            'campos legado': lambda: legacy_decode(rows, decode_installments=False),
+            'campos RowDecoder': lambda: decoder_decode(fields_decoder, rows),
+            'completo legado': lambda: legacy_decode(rows),
+            'completo RowDecoder (json)': lambda: decoder_decode(full_decoder, rows),
+        }
+        if orjson_module is not None:
+            variants['completo RowDecoder (orjson)'] = lambda: decoder_decode(full_decoder, rows)
+
+        timings = {}
+        for name, func in variants.items():
+            sheet_rows.orjson = orjson_module if name.endswith('(orjson)') else None
+            timings[name] = _measure(func, args.repeat)['min']
+        sheet_rows.orjson = orjson_module
+
+        same = (legacy_decode(rows) == decoder_decode(full_decoder, rows)
+                and legacy_decode(rows, False) == decoder_decode(fields_decoder, rows))
+        identical = identical and same
+
+        print(f"[{label}] {len(rows)} linhas")
+        for name, seconds in timings.items():
+            reference = timings['campos legado' if name.startswith('campos') else 'completo legado']
+            print(f"  {name:<30} {len(rows) / seconds:12,.0f} linhas/s  ({reference / seconds:4.1f}x)")
+        print(f"  {'itens idênticos':<30} {'sim' if same else 'NÃO'}")
+
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Comparação dos motores do resumo mensal (SUMMARY_ENGINE=python x numpy)
+
+Para 1k e 50k itens sintéticos (benchmarks/datasets.py), mede o cálculo das
+contribuições de todos os itens (utils.calculate_items_totals) e o resumo
+completo (calculate_monthly_payments) com cada motor, e confere que os
+resultados são idênticos bit a bit. Os itens são medidos como dicionários
+(SQLite, itens recém-lidos) e como saem do cache do Google Sheets (parcelas
+compactas, que o motor numpy concatena sem conversão).
+
+Uso (a partir de backend/, requer numpy):
+    python -m benchmarks.bench_summary_engine [--sizes 1k,50k] [--repeat 5]
+"""
+import argparse
+import struct
+import sys
+
+import summary_numpy
+import utils
+from benchmarks.bench_micro import _measure, _format
+from benchmarks.datasets import DATASET_SIZES, make_items, make_manager
+
+
+def _bits(results):
+    return [(tuple(struct.pack('d', valor) for valor in valores), quitado) for valores, quitado in results]
+
+
+def _compare(label, items, current_month, repeat) -> bool:
+    """Mede os dois motores sobre os itens e confere que os resultados são idênticos"""
+    timings = {}
+    outputs = {}
+    for engine in ('python', 'numpy'):
+        utils.SUMMARY_ENGINE = engine
+        outputs[engine] = (
+            _bits(utils.calculate_items_totals(items, current_month)),
+            utils.calculate_monthly_payments(items).model_dump()
+        )
+        timings[engine] = (
+            _measure(lambda: utils.calculate_items_totals(items, current_month), repeat)['min'],
+            _measure(lambda: utils.calculate_monthly_payments(items), repeat)['min']
+        )
+
+    same = outputs['python'] == outputs['numpy']
+    for index, name in enumerate(('calculate_items_totals', 'calculate_monthly_payments')):
+        python_time, numpy_time = timings['python'][index], timings['numpy'][index]
+        print(
+            f"{name}[{label}]".ljust(42)
+            + f"python={_format(python_time)} numpy={_format(numpy_time)} "
+            + f"({python_time / numpy_time:4.1f}x)"
+        )
+    print(f"{'resultados idênticos':<42}{'sim' if same else 'NÃO'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,50k')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if not summary_numpy.is_available():
+        print("NumPy não está instalado")
+        return 1
+
+    current_month = utils.get_current_month_year()
+    identical = True
+    for size in args.sizes.split(','):
+        for source in ('dicts', 'cache'):
+            items = make_items(DATASET_SIZES[size])
+            if source == 'cache':
+                items = make_manager(items).get_all_items()
+            identical = _compare(f'{size},{source}', items, current_month, args.repeat) and identical
+
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
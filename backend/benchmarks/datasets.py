@@ -0,0 +1,89 @@
+"""
+Dados sintéticos para os benchmarks
+
+Gera itens no mesmo formato do armazenamento (dicionários com parcelas_mensais),
+de forma determinística: ~10% contas fixas com 120 parcelas e o restante
+contas parceladas de 1 a 24 parcelas, distribuídas em torno do mês atual.
+Parcelas de meses anteriores estão pagas; nenhuma conta parcelada está
+totalmente quitada, para que os resultados não mudem entre repetições.
+"""
+import random
+from datetime import datetime
+from typing import List, Dict, Any
+
+from fake_sheets import FakeSheetsService
+from google_sheets_service import GoogleSheetsServiceManager
+
+# Tamanhos usados nos benchmarks (rótulo -> quantidade de itens)
+DATASET_SIZES = {'10': 10, '1k': 1_000, '50k': 50_000}
+
+def _month_str(month_index: int) -> str:
+    """Converte ano * 12 + (mês - 1) em 'MM/YYYY'"""
+    return f"{month_index % 12 + 1:02d}/{month_index // 12}"
+
+def make_items(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera `count` itens sintéticos"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    current = now.year * 12 + now.month - 1
+    items = []
+    
+    for i in range(count):
+        conta_fixa = i % 10 == 0
+        valor = round(rng.uniform(100, 5000), 2)
+        percentual_pessoa1 = rng.choice([50.0, 60.0, 70.0])
+        percentual_pessoa2 = 100.0 - percentual_pessoa1
+        
+        if conta_fixa:
+            parcelas = 1
+            total_parcelas = 120
+            start = current - rng.randint(0, 24)
+            valor_pessoa1 = round(valor * percentual_pessoa1 / 100, 2)
+            valor_pessoa2 = round(valor * percentual_pessoa2 / 100, 2)
+        else:
+            parcelas = total_parcelas = rng.randint(1, 24)
+            start = current - rng.randint(0, parcelas - 1) + rng.randint(0, 1)
+            valor_pessoa1 = round(valor * percentual_pessoa1 / 100 / parcelas, 2)
+            valor_pessoa2 = round(valor * percentual_pessoa2 / 100 / parcelas, 2)
+        
+        parcelas_mensais = []
+        for month in range(start, start + total_parcelas):
+            pago = month < current
+            parcelas_mensais.append({
+                'mes': _month_str(month),
+                'valor_pessoa1': valor_pessoa1,
+                'valor_pessoa2': valor_pessoa2,
+                # No mês atual só a pessoa 1 pode ter pago (nunca quita a conta)
+                'pago_pessoa1': pago or (month == current and rng.random() < 0.5),
+                'pago_pessoa2': pago
+            })
+        
+        items.append({
+            'id': str(1_700_000_000_000 + i),
+            'nome': f'Item {i}',
+            'valor': valor,
+            'parcelas': parcelas,
+            'percentual_pessoa1': percentual_pessoa1,
+            'percentual_pessoa2': percentual_pessoa2,
+            'data_criacao': '2025-01-01 00:00:00',
+            'ativo': True,
+            'conta_fixa': conta_fixa,
+            'valor_manual_pessoa1': None,
+            'valor_manual_pessoa2': None,
+            'pago_pessoa1': False,
+            'pago_pessoa2': False,
+            'parcelas_mensais': parcelas_mensais,
+            'comecar_mes_atual': True
+        })
+    
+    return items
+
+def make_manager(items: List[Dict[str, Any]], latency: float = 0.0) -> GoogleSheetsServiceManager:
+    """Gerenciador sobre o Google Sheets simulado, com a planilha já preenchida com os itens"""
+    service = FakeSheetsService(latency=latency)
+    manager = GoogleSheetsServiceManager(service=service)
+    service.sheets[manager.sheet_name].extend(
+        manager._item_to_row(item['id'], item) for item in items
+    )
+    manager.invalidate_cache()
+    return manager
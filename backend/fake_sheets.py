@@ -0,0 +1,318 @@
+"""
+Google Sheets simulado em memória
+
+Implementa a parte da API do Google Sheets (spreadsheets() e
+spreadsheets().values()) usada pelo GoogleSheetsServiceManager, para rodar a
+API, benchmarks e testes manuais sem credenciais nem rede. Permite injetar
+latência por chamada e erros de cota (HTTP 429), como os da API real.
+
+Uso com a API completa (a partir de backend/):
+    STORAGE_BACKEND=fake python main_service.py
+
+Ou diretamente:
+    manager = GoogleSheetsServiceManager(service=FakeSheetsService(latency=0.05))
+"""
+import os
+import re
+import json
+import time
+import random
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Intervalo em notação A1: Aba!A1:B2, Aba!A2:Z, Aba!A:O, Aba!A5
+_A1_PATTERN = re.compile(r'^([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$')
+
+def _column_index(letters: str) -> int:
+    """Converte a letra da coluna (A, B, ..., AA) em índice a partir de 0"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+def _column_letters(index: int) -> str:
+    """Converte o índice da coluna (a partir de 0) em letras"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def _parse_range(a1_range: str) -> Tuple[str, int, Optional[int], int, Optional[int]]:
+    """
+    Interpreta um intervalo A1
+
+    Retorna (aba, primeira_coluna, primeira_linha, última_coluna, última_linha),
+    com colunas e linhas a partir de 0; linhas None indicam intervalo aberto.
+    """
+    sheet_name, _, cells = a1_range.rpartition('!')
+    sheet_name = sheet_name.strip("'")
+    match = _A1_PATTERN.match(cells)
+    if not sheet_name or not match:
+        raise _http_error(400, f"Unable to parse range: {a1_range}")
+
+    first_col, first_row, last_col, last_row = match.groups()
+    start_col = _column_index(first_col)
+    end_col = _column_index(last_col) if last_col else start_col
+    start_row = int(first_row) - 1 if first_row else 0
+    if last_col:
+        end_row = int(last_row) - 1 if last_row else None
+    else:
+        end_row = start_row if first_row else None
+    return sheet_name, start_col, start_row, end_col, end_row
+
+def _http_error(status: int, message: str) -> HttpError:
+    """Monta um HttpError no mesmo formato devolvido pelo googleapiclient"""
+    reason = {400: 'INVALID_ARGUMENT', 429: 'RESOURCE_EXHAUSTED'}.get(status, 'UNKNOWN')
+    content = json.dumps({'error': {'code': status, 'message': message, 'status': reason}})
+    return HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+class _FakeRequest:
+    """Equivalente ao HttpRequest do googleapiclient: só executa em execute()"""
+
+    def __init__(self, service: 'FakeSheetsService', method: str, operation):
+        self._service = service
+        self._method = method
+        self._operation = operation
+
+    def execute(self, **kwargs):
+        return self._service._call(self._method, self._operation)
+
+class _FakeValues:
+    def __init__(self, service: 'FakeSheetsService'):
+        self._service = service
+
+    def get(self, spreadsheetId: str, range: str, **kwargs) -> _FakeRequest:
+        return _FakeRequest(self._service, 'values.get', lambda: self._service._read(range))
+
+    def batchGet(self, spreadsheetId: str, ranges: List[str], **kwargs) -> _FakeRequest:
+        return _FakeRequest(
+            self._service, 'values.batchGet',
+            lambda: {'spreadsheetId': spreadsheetId, 'valueRanges': [self._service._read(r) for r in ranges]}
+        )
+
+    def update(self, spreadsheetId: str, range: str, valueInputOption: str, body: Dict[str, Any], **kwargs) -> _FakeRequest:
+        return _FakeRequest(self._service, 'values.update', lambda: self._service._write(range, body['values']))
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict[str, Any], **kwargs) -> _FakeRequest:
+        def operation():
+            responses = [self._service._write(data['range'], data['values']) for data in body.get('data', [])]
+            return {
+                'spreadsheetId': spreadsheetId,
+                'totalUpdatedCells': sum(r['updatedCells'] for r in responses),
+                'responses': responses
+            }
+        return _FakeRequest(self._service, 'values.batchUpdate', operation)
+
+    def append(self, spreadsheetId: str, range: str, valueInputOption: str, body: Dict[str, Any],
+               insertDataOption: str = 'OVERWRITE', **kwargs) -> _FakeRequest:
+        return _FakeRequest(
+            self._service, 'values.append',
+            lambda: {'spreadsheetId': spreadsheetId, 'updates': self._service._append(range, body['values'])}
+        )
+
+    def clear(self, spreadsheetId: str, range: str, body: Dict[str, Any] = None, **kwargs) -> _FakeRequest:
+        return _FakeRequest(self._service, 'values.clear', lambda: self._service._clear(range))
+
+    def batchClear(self, spreadsheetId: str, body: Dict[str, Any], **kwargs) -> _FakeRequest:
+        return _FakeRequest(
+            self._service, 'values.batchClear',
+            lambda: {'clearedRanges': [self._service._clear(r)['clearedRange'] for r in body.get('ranges', [])]}
+        )
+
+class _FakeSpreadsheets:
+    def __init__(self, service: 'FakeSheetsService'):
+        self._service = service
+
+    def values(self) -> _FakeValues:
+        return _FakeValues(self._service)
+
+    def get(self, spreadsheetId: str, fields: str = None, **kwargs) -> _FakeRequest:
+        return _FakeRequest(self._service, 'get', self._service._metadata)
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict[str, Any], **kwargs) -> _FakeRequest:
+        return _FakeRequest(
+            self._service, 'batchUpdate',
+            lambda: {'replies': [self._service._apply_request(r) for r in body.get('requests', [])]}
+        )
+
+class FakeSheetsService:
+    """
+    Substituto em memória do serviço retornado por build('sheets', 'v4')
+
+    - latency: atraso (em segundos) aplicado a cada execute()
+    - error_rate: probabilidade (0 a 1) de uma chamada falhar com HTTP 429
+    - seed: semente do sorteio dos erros, para execuções reproduzíveis
+    - sheets: conteúdo inicial {nome da aba: linhas}
+
+    calls conta as chamadas executadas por método (ex.: 'values.get').
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None,
+                 sheets: Optional[Dict[str, List[List[str]]]] = None, default_sheet: str = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._forced_errors: List[int] = []
+        self._lock = threading.Lock()
+
+        self.sheets: Dict[str, List[List[str]]] = {}
+        for name, rows in (sheets or {}).items():
+            self.sheets[name] = [[str(value) for value in row] for row in rows]
+        if not self.sheets:
+            self.sheets[default_sheet or os.getenv('SHEET_NAME', 'Sheet1')] = []
+
+        self.calls: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> 'FakeSheetsService':
+        """Cria o serviço com SHEETS_FAKE_LATENCY, SHEETS_FAKE_ERROR_RATE e SHEETS_FAKE_SEED"""
+        seed = os.getenv('SHEETS_FAKE_SEED')
+        return cls(
+            latency=float(os.getenv('SHEETS_FAKE_LATENCY', '0')),
+            error_rate=float(os.getenv('SHEETS_FAKE_ERROR_RATE', '0')),
+            seed=int(seed) if seed else None
+        )
+
+    def spreadsheets(self) -> _FakeSpreadsheets:
+        return _FakeSpreadsheets(self)
+
+    def fail_next(self, count: int = 1, status: int = 429):
+        """Faz as próximas `count` chamadas falharem com o status informado"""
+        with self._lock:
+            self._forced_errors.extend([status] * count)
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def _call(self, method: str, operation):
+        """Executa uma operação aplicando latência e erros injetados"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            status = self._forced_errors.pop(0) if self._forced_errors else None
+            if status is None and self.error_rate and self._random.random() < self.error_rate:
+                status = 429
+            if status == 429:
+                raise _http_error(429, "Quota exceeded for quota metric 'Read requests' (simulado)")
+            if status is not None:
+                raise _http_error(status, "Erro simulado")
+            return operation()
+
+    def _rows(self, sheet_name: str) -> List[List[str]]:
+        if sheet_name not in self.sheets:
+            raise _http_error(400, f"Unable to parse range: {sheet_name}")
+        return self.sheets[sheet_name]
+
+    def _read(self, a1_range: str) -> Dict[str, Any]:
+        """Lê um intervalo; como na API real, células e linhas vazias no final são omitidas"""
+        sheet_name, start_col, start_row, end_col, end_row = _parse_range(a1_range)
+        rows = self._rows(sheet_name)
+        last_row = len(rows) - 1 if end_row is None else min(end_row, len(rows) - 1)
+
+        values = []
+        for row in rows[start_row:last_row + 1]:
+            cells = row[start_col:end_col + 1]
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+
+        result = {'range': a1_range, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+    def _write(self, a1_range: str, values: List[List[Any]]) -> Dict[str, Any]:
+        """Grava valores a partir do canto superior esquerdo do intervalo"""
+        sheet_name, start_col, start_row, _, _ = _parse_range(a1_range)
+        rows = self._rows(sheet_name)
+
+        for offset, row_values in enumerate(values):
+            row_number = start_row + offset
+            while len(rows) <= row_number:
+                rows.append([])
+            row = rows[row_number]
+            if len(row) < start_col + len(row_values):
+                row.extend([''] * (start_col + len(row_values) - len(row)))
+            for col_offset, value in enumerate(row_values):
+                row[start_col + col_offset] = '' if value is None else str(value)
+
+        return {
+            'updatedRange': a1_range,
+            'updatedRows': len(values),
+            'updatedCells': sum(len(row) for row in values)
+        }
+
+    def _append(self, a1_range: str, values: List[List[Any]]) -> Dict[str, Any]:
+        """Acrescenta linhas após a última linha com dados da aba"""
+        sheet_name, start_col, _, _, _ = _parse_range(a1_range)
+        rows = self._rows(sheet_name)
+
+        first_row = len(rows)
+        while first_row > 0 and not any(rows[first_row - 1]):
+            first_row -= 1
+        del rows[first_row:]
+
+        width = max((len(row) for row in values), default=1)
+        updated_range = (
+            f"{sheet_name}!{_column_letters(start_col)}{first_row + 1}:"
+            f"{_column_letters(start_col + width - 1)}{first_row + len(values)}"
+        )
+        update = self._write(updated_range, values)
+        update['spreadsheetId'] = 'fake'
+        return update
+
+    def _clear(self, a1_range: str) -> Dict[str, Any]:
+        """Limpa as células do intervalo (as linhas continuam existindo)"""
+        sheet_name, start_col, start_row, end_col, end_row = _parse_range(a1_range)
+        rows = self._rows(sheet_name)
+        last_row = len(rows) - 1 if end_row is None else min(end_row, len(rows) - 1)
+
+        for row in rows[start_row:last_row + 1]:
+            for col in range(start_col, min(end_col + 1, len(row))):
+                row[col] = ''
+        return {'clearedRange': a1_range}
+
+    def _metadata(self) -> Dict[str, Any]:
+        """Metadados das abas (spreadsheets().get)"""
+        return {
+            'spreadsheetId': 'fake',
+            'sheets': [
+                {'properties': {'sheetId': sheet_id, 'title': title, 'index': sheet_id}}
+                for sheet_id, title in enumerate(self.sheets)
+            ]
+        }
+
+    def _apply_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Aplica uma requisição de spreadsheets().batchUpdate (addSheet e deleteDimension)"""
+        if 'addSheet' in request:
+            title = request['addSheet']['properties']['title']
+            if title in self.sheets:
+                raise _http_error(400, f"A sheet with the name \"{title}\" already exists.")
+            self.sheets[title] = []
+            return {'addSheet': {'properties': {'sheetId': len(self.sheets) - 1, 'title': title}}}
+
+        if 'deleteDimension' in request:
+            dimension_range = request['deleteDimension']['range']
+            if dimension_range.get('dimension') != 'ROWS':
+                raise _http_error(400, "Somente a remoção de linhas é simulada")
+            titles = list(self.sheets)
+            if dimension_range['sheetId'] >= len(titles):
+                raise _http_error(400, f"No grid with id: {dimension_range['sheetId']}")
+            rows = self.sheets[titles[dimension_range['sheetId']]]
+            del rows[dimension_range['startIndex']:dimension_range['endIndex']]
+            return {}
+
+        raise _http_error(400, f"Requisição não suportada: {sorted(request)}")
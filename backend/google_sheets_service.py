@@ -1,13 +1,26 @@
 import os
+import re
 import json
+import time
 import base64
-from typing import List, Dict, Any
+import bisect
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
+import httplib2
+import google_auth_httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 import logging
 
+from storage.base import StorageListener, filter_items
+from sheet_rows import RowDecoder
+from installments import (
+    CompactInstallments, RecurringInstallments, compact_installments, installments_from_json,
+    installments_to_json, writable_installments
+)
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,13 +28,101 @@ logger = logging.getLogger(__name__)
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Cabeçalhos esperados na primeira linha da planilha (colunas A:O)
+SHEET_HEADERS = [
+    'ID', 'Nome', 'Valor', 'Parcelas', 
+    'Percentual Pessoa 1', 'Percentual Pessoa 2', 
+    'Data Criação', 'Ativo', 'Conta Fixa',
+    'Valor Manual Pessoa 1', 'Valor Manual Pessoa 2',
+    'Pago Pessoa 1', 'Pago Pessoa 2',
+    'Parcelas Mensais', 'Começar Mês Atual'
+]
+
+# Versão do layout de colunas acima; incrementar ao alterar SHEET_HEADERS
+SCHEMA_VERSION = 1
+
+# Layouts de armazenamento das parcelas mensais
+# json: JSON na coluna N da aba principal (padrão)
+# tab: uma linha por parcela em uma aba dedicada (INSTALLMENTS_SHEET_NAME)
+# Nos dois layouts a regra de recorrência das contas fixas fica na coluna N (objeto JSON)
+INSTALLMENTS_LAYOUT_JSON = 'json'
+INSTALLMENTS_LAYOUT_TAB = 'tab'
+
+# Cabeçalhos da aba de parcelas (colunas A:F), usada no layout 'tab'
+INSTALLMENT_HEADERS = [
+    'ID Item', 'Mês', 'Valor Pessoa 1', 'Valor Pessoa 2',
+    'Pago Pessoa 1', 'Pago Pessoa 2'
+]
+
+def column_letter(index: int) -> str:
+    """Letra da coluna (A, B, ..., Z, AA, ...) do índice baseado em 0"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
 class GoogleSheetsServiceManager:
-    def __init__(self):
-        self.service = None
-        self.spreadsheet_id = None
+    def __init__(self, service=None, spreadsheet_id: str = None):
+        """
+        Com `service` informado (ex.: fake_sheets.FakeSheetsService), usa esse
+        serviço em vez de autenticar no Google e ler GOOGLE_SHEETS_URL.
+        """
+        self.service = service
+        self.credentials = None
+        self.spreadsheet_id = spreadsheet_id
         self.sheet_name = os.getenv('SHEET_NAME', 'Sheet1')
-        self._authenticate()
-        self._get_spreadsheet_id()
+        
+        # Layout das parcelas mensais (JSON na coluna N ou aba dedicada)
+        self.installments_layout = os.getenv('INSTALLMENTS_LAYOUT', INSTALLMENTS_LAYOUT_JSON).lower()
+        if self.installments_layout not in (INSTALLMENTS_LAYOUT_JSON, INSTALLMENTS_LAYOUT_TAB):
+            raise ValueError(f"INSTALLMENTS_LAYOUT inválido: {self.installments_layout} (use 'json' ou 'tab')")
+        self.installments_sheet_name = os.getenv('INSTALLMENTS_SHEET_NAME', 'Parcelas')
+        
+        # Timeout (em segundos) de cada chamada HTTP à API do Google Sheets
+        self.http_timeout = float(os.getenv('SHEETS_HTTP_TIMEOUT', '30'))
+        # Conexões HTTP por thread (httplib2 não é thread-safe)
+        self._thread_local = threading.local()
+        
+        # Cache em memória dos itens já processados (write-through)
+        self.cache_ttl = float(os.getenv('ITEMS_CACHE_TTL', '60'))
+        self._items_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._cache_loaded_at = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Índice id -> número da linha na planilha (válido junto com o cache)
+        self._row_index: Dict[str, int] = {}
+        # Índice id -> números das linhas na aba de parcelas, na ordem das parcelas (layout 'tab')
+        self._installment_rows: Dict[str, List[int]] = {}
+        # IDs (sheetId) das abas por nome, usados nas remoções de linhas
+        self._sheet_ids: Dict[str, int] = {}
+        
+        # Protege cache e índice; escritas são serializadas para manter o índice consistente
+        self._lock = threading.RLock()
+        # Incrementado a cada escrita; impede que uma leitura antiga sobrescreva o cache
+        self._generation = 0
+        # Último ID gerado, para que inserções no mesmo milissegundo não repitam o ID
+        self._last_item_id = 0
+        # Índices/agregados mantidos junto com o cache (ver StorageListener)
+        self._listeners: List[StorageListener] = []
+        
+        # Versão do esquema verificada na planilha (None = ainda não verificada)
+        self.schema_version: Optional[int] = None
+        
+        # Decodificadores de linhas por (cabeçalhos, com parcelas); o atual segue a última leitura completa
+        self._row_decoders: Dict[Tuple[Tuple[str, ...], bool], RowDecoder] = {}
+        self._row_decoder = self._get_row_decoder(SHEET_HEADERS)
+        # Linhas inválidas encontradas na última leitura completa da planilha
+        self.malformed_rows: List[Dict[str, Any]] = []
+        
+        if self.service is None:
+            self._authenticate()
+            self._get_spreadsheet_id()
+        elif self.spreadsheet_id is None:
+            self.spreadsheet_id = 'fake'
+        self._ensure_headers()
     
     def _authenticate(self):
         """Autentica usando Service Account"""
@@ -55,6 +156,7 @@ class GoogleSheetsServiceManager:
                 )
                 logger.info("Autenticação com Google Sheets realizada com sucesso usando Service Account (arquivo)")
             
+            self.credentials = credentials
             self.service = build('sheets', 'v4', credentials=credentials)
             
         except Exception as e:
@@ -75,233 +177,837 @@ class GoogleSheetsServiceManager:
         
         logger.info(f"ID da planilha: {self.spreadsheet_id}")
     
+    def _execute(self, request):
+        """Executa uma requisição da API usando a conexão HTTP da thread atual"""
+        if self.credentials is None:
+            return request.execute()
+        
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials,
+                http=httplib2.Http(timeout=self.http_timeout)
+            )
+            self._thread_local.http = http
+        return request.execute(http=http)
+    
     def _ensure_headers(self):
-        """Garante que os cabeçalhos existam na planilha"""
+        """Garante que os cabeçalhos existam na planilha (uma vez por processo)"""
         try:
             # Verifica se a planilha tem dados
-            result = self.service.spreadsheets().values().get(
+            result = self._execute(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{self.sheet_name}!A1:Z1'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             
             # Se não há dados ou não tem cabeçalhos, cria os cabeçalhos
             if not values or len(values[0]) < 14:
-                headers = [
-                    'ID', 'Nome', 'Valor', 'Parcelas', 
-                    'Percentual Pessoa 1', 'Percentual Pessoa 2', 
-                    'Data Criação', 'Ativo', 'Conta Fixa',
-                    'Valor Manual Pessoa 1', 'Valor Manual Pessoa 2',
-                    'Pago Pessoa 1', 'Pago Pessoa 2',
-                    'Parcelas Mensais', 'Começar Mês Atual'
-                ]
-                
-                self.service.spreadsheets().values().update(
+                self._execute(self.service.spreadsheets().values().update(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{self.sheet_name}!A1:O1',
                     valueInputOption='RAW',
-                    body={'values': [headers]}
-                ).execute()
+                    body={'values': [SHEET_HEADERS]}
+                ))
                 
                 logger.info("Cabeçalhos criados na planilha")
+            
+            if self.installments_layout == INSTALLMENTS_LAYOUT_TAB:
+                self._ensure_installments_sheet()
+            
+            self.schema_version = SCHEMA_VERSION
+            logger.info(f"Esquema da planilha verificado (versão {self.schema_version})")
         
         except HttpError as error:
             logger.error(f"Erro ao verificar/criar cabeçalhos: {error}")
             raise
     
-    def get_all_items(self) -> List[Dict[str, Any]]:
-        """Busca todos os itens da planilha"""
+    def _load_sheet_ids(self):
+        """Lê os IDs (sheetId) de todas as abas da planilha"""
+        spreadsheet = self._execute(self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields='sheets.properties(sheetId,title)'
+        ))
+        self._sheet_ids = {
+            sheet['properties']['title']: sheet['properties']['sheetId']
+            for sheet in spreadsheet.get('sheets', [])
+        }
+    
+    def _sheet_id(self, sheet_name: str) -> int:
+        """Retorna o ID (sheetId) da aba, lido da planilha na primeira vez"""
+        if sheet_name not in self._sheet_ids:
+            self._load_sheet_ids()
+        if sheet_name not in self._sheet_ids:
+            raise ValueError(f"Aba '{sheet_name}' não encontrada na planilha")
+        return self._sheet_ids[sheet_name]
+    
+    def _ensure_installments_sheet(self):
+        """Garante que a aba de parcelas exista e tenha cabeçalhos"""
+        self._load_sheet_ids()
+        
+        if self.installments_sheet_name not in self._sheet_ids:
+            result = self._execute(self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': [{'addSheet': {'properties': {'title': self.installments_sheet_name}}}]}
+            ))
+            properties = result['replies'][0]['addSheet']['properties']
+            self._sheet_ids[properties['title']] = properties['sheetId']
+            logger.info(f"Aba de parcelas '{self.installments_sheet_name}' criada na planilha")
+        
+        result = self._execute(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{self.installments_sheet_name}!A1:F1'
+        ))
+        values = result.get('values', [])
+        
+        if not values or len(values[0]) < len(INSTALLMENT_HEADERS):
+            self._execute(self.service.spreadsheets().values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{self.installments_sheet_name}!A1:F1',
+                valueInputOption='RAW',
+                body={'values': [INSTALLMENT_HEADERS]}
+            ))
+            logger.info("Cabeçalhos criados na aba de parcelas")
+    
+    @staticmethod
+    def _is_schema_error(error: HttpError) -> bool:
+        """Indica se o erro de escrita foi causado por intervalo/formato inválido da planilha"""
+        if getattr(error.resp, 'status', None) != 400:
+            return False
+        message = str(error).lower()
+        return 'range' in message or 'grid' in message or 'column' in message
+    
+    def _execute_write(self, request_factory):
+        """Executa uma escrita, reverificando o esquema uma vez se a planilha mudou de formato"""
         try:
+            return self._execute(request_factory())
+        except HttpError as error:
+            if not self._is_schema_error(error):
+                raise
+            logger.warning(f"Erro de intervalo na escrita, reverificando esquema da planilha: {error}")
+            self.schema_version = None
+            self._sheet_ids = {}
+            self.invalidate_cache()
             self._ensure_headers()
+            return self._execute(request_factory())
+    
+    @staticmethod
+    def _copy_item(item: Dict[str, Any], include_installments: bool = True, writable: bool = False) -> Dict[str, Any]:
+        """
+        Copia um item do cache para que o chamador possa alterar seus campos
+        
+        As parcelas compactas e as regras de conta fixa (somente leitura) são
+        compartilhadas com o cache; com writable=True elas são copiadas para
+        alteração (lista de dicionários ou cópia da regra).
+        """
+        copied = dict(item)
+        parcelas_mensais = item.get('parcelas_mensais') or []
+        if not include_installments:
+            copied['parcelas_mensais'] = []
+        elif writable or not isinstance(parcelas_mensais, (CompactInstallments, RecurringInstallments)):
+            copied['parcelas_mensais'] = writable_installments(parcelas_mensais)
+        return copied
+    
+    def _cache_is_fresh(self) -> bool:
+        """Indica se o cache de itens ainda está dentro do TTL"""
+        if self._items_cache is None:
+            return False
+        return (time.monotonic() - self._cache_loaded_at) < self.cache_ttl
+    
+    def invalidate_cache(self):
+        """Descarta o cache de itens, forçando uma nova leitura da planilha"""
+        with self._lock:
+            self._items_cache = None
+            self._cache_loaded_at = 0.0
+            self._row_index = {}
+            self._installment_rows = {}
+            self._generation += 1
+    
+    def add_listener(self, listener: StorageListener):
+        """Registra um listener; ele recebe o conteúdo do cache a cada recarga e cada escrita"""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._items_cache is not None:
+                listener.on_load(list(self._items_cache.values()))
+    
+    def _notify_load(self):
+        for listener in self._listeners:
+            listener.on_load(list(self._items_cache.values()))
+    
+    def _notify_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        for listener in self._listeners:
+            listener.on_upsert(old_item, new_item)
+    
+    def _notify_delete(self, old_item: Dict[str, Any]):
+        for listener in self._listeners:
+            listener.on_delete(old_item)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retorna as estatísticas de uso do cache de itens"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'ttl': self.cache_ttl,
+            'itens': len(self._items_cache) if self._items_cache is not None else 0,
+            'valido': self._cache_is_fresh(),
+            'linhas_invalidas': len(self.malformed_rows)
+        }
+    
+    def _get_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna o cache de itens (id -> item), recarregando da planilha se expirado"""
+        with self._lock:
+            if self._cache_is_fresh():
+                self.cache_hits += 1
+                return self._items_cache
+            self.cache_misses += 1
+            generation = self._generation
+        
+        # A leitura da planilha acontece fora do lock para não bloquear outras threads
+        items, row_index, installment_rows = self._load_items()
+        
+        with self._lock:
+            # Só instala o resultado se nenhuma escrita ocorreu durante a leitura
+            if generation == self._generation:
+                self._items_cache, self._row_index = items, row_index
+                self._installment_rows = installment_rows
+                self._cache_loaded_at = time.monotonic()
+                self._notify_load()
+        return items
+    
+    def refresh(self):
+        """Recarrega o cache se expirou (os listeners recebem a recarga)"""
+        self._get_cache()
+    
+    def get_all_items(self, include_installments: bool = True) -> List[Dict[str, Any]]:
+        """
+        Busca todos os itens (do cache, se válido, ou da planilha)
+        
+        Com include_installments=False os itens vêm com parcelas_mensais vazio;
+        se o cache estiver expirado, as parcelas nem chegam a ser lidas/decodificadas.
+        """
+        if not include_installments and not self._cache_is_fresh():
+            return self._load_items_without_installments()
+        
+        items = self._get_cache()
+        with self._lock:
+            return [self._copy_item(item, include_installments) for item in items.values()]
+    
+    def query_items(self, ativo: Optional[bool] = None, conta_fixa: Optional[bool] = None,
+                    mes: Optional[str] = None, include_installments: bool = True) -> List[Dict[str, Any]]:
+        """Busca os itens que atendem aos filtros, a partir do cache"""
+        items = self._get_cache()
+        with self._lock:
+            selected = filter_items(list(items.values()), ativo, conta_fixa, mes)
+            return [self._copy_item(item, include_installments) for item in selected]
+    
+    def _find_row(self, item_id: str) -> Optional[int]:
+        """Retorna o número da linha do item, confirmando na planilha que o índice não está defasado"""
+        for attempt in range(2):
+            self._get_cache()
+            row_number = self._row_index.get(item_id)
+            if row_number is None:
+                return None
             
-            result = self.service.spreadsheets().values().get(
+            # Confirma o ID da linha lendo apenas a célula da coluna do ID
+            id_column = column_letter(self._row_decoder.columns['id'])
+            result = self._execute(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A2:Z'
-            ).execute()
-            
+                range=f'{self.sheet_name}!{id_column}{row_number}'
+            ))
             values = result.get('values', [])
-            items = []
-            
-            for row in values:
-                if len(row) >= 7:  # Garante que a linha tem todos os campos necessários
-                    # Processa parcelas mensais se existirem
-                    parcelas_mensais = []
-                    if len(row) > 13 and row[13]:
-                        try:
-                            import json
-                            parcelas_mensais = json.loads(row[13])
-                        except:
-                            parcelas_mensais = []
-                    
-                    item = {
-                        'id': row[0] if len(row) > 0 else '',
-                        'nome': row[1] if len(row) > 1 else '',
-                        'valor': float(row[2]) if len(row) > 2 and row[2] else 0.0,
-                        'parcelas': int(row[3]) if len(row) > 3 and row[3] else 1,
-                        'percentual_pessoa1': float(row[4]) if len(row) > 4 and row[4] else 0.0,
-                        'percentual_pessoa2': float(row[5]) if len(row) > 5 and row[5] else 0.0,
-                        'data_criacao': row[6] if len(row) > 6 else '',
-                        'ativo': row[7].lower() == 'true' if len(row) > 7 else True,
-                        'conta_fixa': row[8].lower() == 'true' if len(row) > 8 else False,
-                        'valor_manual_pessoa1': float(row[9]) if len(row) > 9 and row[9] and row[9] != 'None' else None,
-                        'valor_manual_pessoa2': float(row[10]) if len(row) > 10 and row[10] and row[10] != 'None' else None,
-                        'pago_pessoa1': row[11].lower() == 'true' if len(row) > 11 else False,
-                        'pago_pessoa2': row[12].lower() == 'true' if len(row) > 12 else False,
-                        'parcelas_mensais': parcelas_mensais,
-                        'comecar_mes_atual': row[14].lower() == 'true' if len(row) > 14 else True
-                    }
-                    items.append(item)
+            if values and values[0] and values[0][0] == item_id:
+                return row_number
             
-            logger.info(f"Carregados {len(items)} itens da planilha")
-            return items
+            logger.warning(f"Índice da linha {row_number} defasado para o item {item_id}, recarregando planilha")
+            self.invalidate_cache()
         
-        except HttpError as error:
-            logger.error(f"Erro ao buscar itens: {error}")
-            raise
+        return None
     
-    def add_item(self, item_data: Dict[str, Any]) -> str:
-        """Adiciona um novo item à planilha"""
+    def _shift_rows_after(self, deleted_row: int):
+        """Ajusta o índice após a remoção de uma linha da planilha"""
+        for item_id, row_number in self._row_index.items():
+            if row_number > deleted_row:
+                self._row_index[item_id] = row_number - 1
+    
+    def _get_row_decoder(self, headers: List[str], decode_installments: bool = True) -> RowDecoder:
+        """Decodificador de linhas para a linha de cabeçalhos informada (montado uma vez)"""
+        key = (tuple(headers), decode_installments)
+        decoder = self._row_decoders.get(key)
+        if decoder is None:
+            decoder = self._row_decoders[key] = RowDecoder(headers, SHEET_HEADERS, decode_installments)
+        return decoder
+    
+    def _row_to_item(self, row: List[str]) -> Dict[str, Any]:
+        """
+        Converte uma linha da planilha em um item
+        
+        Raises:
+            MalformedRowError: Se a linha tem valores inválidos
+        """
+        return self._row_decoder.decode(row)
+    
+    def _item_to_row(self, item_id: str, item: Dict[str, Any]) -> List[str]:
+        """
+        Converte um item na linha gravada na planilha
+        
+        Cada campo vai para a coluna do seu cabeçalho na última leitura da planilha
+        (RowDecoder.columns; A:O na ordem de SHEET_HEADERS por padrão).
+        """
+        # Prepara parcelas mensais como JSON (no layout 'tab' elas ficam na aba de parcelas,
+        # exceto a regra de recorrência das contas fixas, que fica sempre na coluna das parcelas)
+        parcelas_mensais_json = ''
+        parcelas_mensais = item.get('parcelas_mensais')
+        if parcelas_mensais and (self.installments_layout == INSTALLMENTS_LAYOUT_JSON
+                                 or isinstance(parcelas_mensais, RecurringInstallments)):
+            parcelas_mensais_json = json.dumps(installments_to_json(parcelas_mensais))
+        
+        valor_manual_pessoa1 = item.get('valor_manual_pessoa1')
+        valor_manual_pessoa2 = item.get('valor_manual_pessoa2')
+        
+        return self._row_decoder.encode({
+            'id': item_id,
+            'nome': item['nome'],
+            'valor': str(item['valor']),
+            'parcelas': str(item['parcelas']),
+            'percentual_pessoa1': str(item['percentual_pessoa1']),
+            'percentual_pessoa2': str(item['percentual_pessoa2']),
+            'data_criacao': item.get('data_criacao', ''),
+            'ativo': str(item.get('ativo', True)),
+            'conta_fixa': str(item.get('conta_fixa', False)),
+            'valor_manual_pessoa1': str(valor_manual_pessoa1) if valor_manual_pessoa1 is not None else '',
+            'valor_manual_pessoa2': str(valor_manual_pessoa2) if valor_manual_pessoa2 is not None else '',
+            'pago_pessoa1': str(item.get('pago_pessoa1', False)),
+            'pago_pessoa2': str(item.get('pago_pessoa2', False)),
+            'parcelas_mensais': parcelas_mensais_json,
+            'comecar_mes_atual': str(item.get('comecar_mes_atual', True))
+        })
+    
+    @staticmethod
+    def _installment_to_row(item_id: str, parcela: Dict[str, Any]) -> List[str]:
+        """Converte uma parcela nas 6 colunas (A:F) da aba de parcelas"""
+        return [
+            item_id,
+            parcela['mes'],
+            str(parcela['valor_pessoa1']),
+            str(parcela['valor_pessoa2']),
+            str(parcela.get('pago_pessoa1', False)),
+            str(parcela.get('pago_pessoa2', False))
+        ]
+    
+    @staticmethod
+    def _row_to_installment(row: List[str]) -> Dict[str, Any]:
+        """Converte uma linha da aba de parcelas em uma parcela"""
+        return {
+            'mes': row[1],
+            'valor_pessoa1': float(row[2]) if len(row) > 2 and row[2] else 0.0,
+            'valor_pessoa2': float(row[3]) if len(row) > 3 and row[3] else 0.0,
+            'pago_pessoa1': row[4].lower() == 'true' if len(row) > 4 else False,
+            'pago_pessoa2': row[5].lower() == 'true' if len(row) > 5 else False
+        }
+    
+    def _load_items(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int], Dict[str, List[int]]]:
+        """Lê e processa todos os itens diretamente da planilha, montando os índices de linhas"""
         try:
-            self._ensure_headers()
+            installment_values = []
+            if self.installments_layout == INSTALLMENTS_LAYOUT_TAB:
+                # Uma única leitura traz a aba principal e a aba de parcelas
+                result = self._execute(self.service.spreadsheets().values().batchGet(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=[f'{self.sheet_name}!A1:Z', f'{self.installments_sheet_name}!A2:F']
+                ))
+                value_ranges = result.get('valueRanges', [{}, {}])
+                values = value_ranges[0].get('values', [])
+                installment_values = value_ranges[1].get('values', [])
+            else:
+                result = self._execute(self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f'{self.sheet_name}!A1:Z'
+                ))
+                values = result.get('values', [])
             
-            # Gera um ID único baseado no timestamp
-            import time
-            item_id = str(int(time.time() * 1000))
+            # A linha 1 (cabeçalhos) define a coluna de cada campo
+            decoder = self._get_row_decoder(values[0] if values else SHEET_HEADERS)
+            items = {}
+            row_index = {}
             
-            # Prepara parcelas mensais como JSON
-            parcelas_mensais_json = ''
-            if item_data.get('parcelas_mensais'):
-                import json
-                parcelas_mensais_json = json.dumps(item_data['parcelas_mensais'])
+            decoded, malformed_rows = decoder.decode_rows(values[1:], first_row_number=2)
+            for row_number, item in decoded:
+                items[item['id']] = item
+                row_index[item['id']] = row_number
+            self._row_decoder = decoder
+            self.malformed_rows = malformed_rows
             
-            # Prepara os dados para inserção
-            row_data = [
-                item_id,
-                item_data['nome'],
-                str(item_data['valor']),
-                str(item_data['parcelas']),
-                str(item_data['percentual_pessoa1']),
-                str(item_data['percentual_pessoa2']),
-                item_data.get('data_criacao', ''),
-                str(item_data.get('ativo', True)),
-                str(item_data.get('conta_fixa', False)),
-                str(item_data.get('valor_manual_pessoa1', '')),
-                str(item_data.get('valor_manual_pessoa2', '')),
-                str(item_data.get('pago_pessoa1', False)),
-                str(item_data.get('pago_pessoa2', False)),
-                parcelas_mensais_json,
-                str(item_data.get('comecar_mes_atual', True))
-            ]
+            # Agrupa as linhas da aba de parcelas por item (linhas limpas são ignoradas)
+            installment_rows = {}
+            parcelas_por_item = {}
+            for position, row in enumerate(installment_values):
+                if len(row) < 2 or not row[0] or row[0] not in items:
+                    continue
+                parcelas_por_item.setdefault(row[0], []).append(self._row_to_installment(row))
+                installment_rows.setdefault(row[0], []).append(position + 2)
             
-            # Adiciona a linha na planilha
-            self.service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A:O',
-                valueInputOption='RAW',
-                insertDataOption='INSERT_ROWS',
-                body={'values': [row_data]}
-            ).execute()
+            for item_id, parcelas_mensais in parcelas_por_item.items():
+                if not isinstance(items[item_id]['parcelas_mensais'], RecurringInstallments):
+                    items[item_id]['parcelas_mensais'] = compact_installments(parcelas_mensais)
             
-            logger.info(f"Item adicionado com ID: {item_id}")
-            return item_id
+            if self.malformed_rows:
+                logger.warning(f"{len(self.malformed_rows)} linhas inválidas na planilha (ver malformed_rows)")
+            logger.info(f"Carregados {len(items)} itens da planilha")
+            return items, row_index, installment_rows
         
         except HttpError as error:
-            logger.error(f"Erro ao adicionar item: {error}")
+            logger.error(f"Erro ao buscar itens: {error}")
             raise
     
-    def update_item(self, item_id: str, item_data: Dict[str, Any]) -> bool:
-        """Atualiza um item existente na planilha"""
+    def _load_items_without_installments(self) -> List[Dict[str, Any]]:
+        """Lê os itens da aba principal sem ler nem decodificar as parcelas mensais"""
         try:
-            logger.info(f"Atualizando item {item_id} com dados: {item_data}")
-            # Busca todos os itens para encontrar a linha do item
-            items = self.get_all_items()
+            result = self._execute(self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{self.sheet_name}!A1:Z'
+            ))
+            values = result.get('values', [])
+            decoder = self._get_row_decoder(values[0] if values else SHEET_HEADERS, decode_installments=False)
+            decoded, _ = decoder.decode_rows(values[1:])
+            return [item for _, item in decoded]
+        
+        except HttpError as error:
+            logger.error(f"Erro ao buscar itens: {error}")
+            raise
+    
+    def _new_item_id(self) -> str:
+        """Gera um ID baseado no timestamp em milissegundos, sempre crescente"""
+        self._last_item_id = max(int(time.time() * 1000), self._last_item_id + 1)
+        return str(self._last_item_id)
+    
+    def add_item(self, item_data: Dict[str, Any]) -> str:
+        """Adiciona um novo item à planilha"""
+        with self._lock:
+            try:
+                # Usa o ID informado (ex.: sincronização entre backends), se ainda não existir,
+                # ou gera um baseado no timestamp
+                item_id = item_data.get('id')
+                if not item_id or item_id in self._get_cache():
+                    item_id = self._new_item_id()
+                
+                # Prepara os dados para inserção
+                row_data = self._item_to_row(item_id, item_data)
+                
+                # Adiciona a linha na planilha
+                result = self._execute_write(lambda: self.service.spreadsheets().values().append(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f'{self.sheet_name}!A:{column_letter(len(row_data) - 1)}',
+                    valueInputOption='RAW',
+                    insertDataOption='INSERT_ROWS',
+                    body={'values': [row_data]}
+                ))
+                self._generation += 1
+                
+                # Atualiza o cache e o índice com o item recém-criado
+                row_number = self._appended_row_number(result)
+                if self._items_cache is not None and row_number is not None:
+                    self._items_cache[item_id] = self._stored_item(item_id, row_data, item_data)
+                    self._row_index[item_id] = row_number
+                    self._notify_upsert(None, self._items_cache[item_id])
+                else:
+                    self.invalidate_cache()
+                
+                if self.installments_layout == INSTALLMENTS_LAYOUT_TAB:
+                    self._append_installments(item_id, self._tab_installments(item_data))
+                
+                logger.info(f"Item adicionado com ID: {item_id}")
+                return item_id
             
-            for i, item in enumerate(items):
-                if item['id'] == item_id:
-                    logger.info(f"Item encontrado na linha {i + 2}")
-                    # Prepara parcelas mensais como JSON
-                    parcelas_mensais = item_data.get('parcelas_mensais', item.get('parcelas_mensais', []))
-                    parcelas_mensais_json = ''
-                    if parcelas_mensais:
-                        import json
-                        parcelas_mensais_json = json.dumps(parcelas_mensais)
+            except HttpError as error:
+                logger.error(f"Erro ao adicionar item: {error}")
+                raise
+    
+    @staticmethod
+    def _appended_row_number(result: Dict[str, Any]) -> Optional[int]:
+        """Extrai o número da (primeira) linha inserida da resposta do append (ex: 'Sheet1!A5:O5')"""
+        updated_range = result.get('updates', {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        return int(match.group(1)) if match else None
+    
+    def _stored_item(self, item_id: str, row_data: List[str], item: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta o item como ficou gravado, para ser guardado no cache"""
+        stored_item = self._row_to_item(row_data)
+        if self.installments_layout == INSTALLMENTS_LAYOUT_TAB and not isinstance(
+                stored_item['parcelas_mensais'], RecurringInstallments):
+            stored_item['parcelas_mensais'] = compact_installments([
+                self._row_to_installment(self._installment_to_row(item_id, p))
+                for p in item.get('parcelas_mensais') or []
+            ])
+        return stored_item
+    
+    @staticmethod
+    def _tab_installments(item: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Parcelas do item que ocupam linhas na aba de parcelas (a regra de conta fixa não ocupa)"""
+        parcelas_mensais = (item or {}).get('parcelas_mensais') or []
+        return [] if isinstance(parcelas_mensais, RecurringInstallments) else parcelas_mensais
+    
+    def _append_installments(self, item_id: str, parcelas_mensais: List[Dict[str, Any]]):
+        """Acrescenta parcelas na aba de parcelas (layout 'tab') e atualiza o índice"""
+        rows = [self._installment_to_row(item_id, p) for p in parcelas_mensais]
+        if not rows:
+            return
+        
+        result = self._execute_write(lambda: self.service.spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{self.installments_sheet_name}!A:F',
+            valueInputOption='RAW',
+            insertDataOption='INSERT_ROWS',
+            body={'values': rows}
+        ))
+        self._generation += 1
+        
+        first_row = self._appended_row_number(result)
+        if first_row is None:
+            self.invalidate_cache()
+            return
+        self._installment_rows.setdefault(item_id, []).extend(range(first_row, first_row + len(rows)))
+    
+    def _installments_diff(self, item_id: str, previous_item: Optional[Dict[str, Any]],
+                           item: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[int]]:
+        """
+        Compara as parcelas de um item com as do cache (layout 'tab')
+        
+        As parcelas são comparadas pela posição na lista (um item pode ter mais de
+        uma parcela no mesmo mês), como no SQLite. Retorna os intervalos alterados
+        para o batchUpdate (normalmente uma única célula de pagamento), as parcelas
+        novas a acrescentar e as linhas das parcelas removidas, que são excluídas.
+        """
+        previous = self._tab_installments(previous_item)
+        current = self._tab_installments(item)
+        row_numbers = self._installment_rows.get(item_id, [])
+        data = []
+        
+        for position, (row_number, parcela) in enumerate(zip(row_numbers, current)):
+            previous_row = self._installment_to_row(item_id, previous[position]) if position < len(previous) else None
+            data.extend(self._row_diff_data(
+                row_number, previous_row, self._installment_to_row(item_id, parcela),
+                sheet_name=self.installments_sheet_name
+            ))
+        
+        return data, list(current[len(row_numbers):]), row_numbers[len(current):]
+    
+    def load_items(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Carrega os itens informados para uma operação de escrita (uma leitura)
+        
+        Com o cache válido, lê apenas as linhas dos itens pelo índice em um único
+        batchGet, o que também confirma que o índice não está defasado. Com o
+        cache expirado, a leitura completa da planilha já traz os itens atualizados.
+        Itens inexistentes ficam fora do resultado.
+        """
+        with self._lock:
+            try:
+                if not self._cache_is_fresh():
+                    cache = self._get_cache()
+                    return {item_id: self._copy_item(cache[item_id], writable=True) for item_id in item_ids if item_id in cache}
+                
+                rows = {item_id: self._row_index[item_id] for item_id in item_ids if item_id in self._row_index}
+                if not rows:
+                    return {}
+                
+                last_column = column_letter(self._row_decoder.width - 1)
+                result = self._execute(self.service.spreadsheets().values().batchGet(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=[f'{self.sheet_name}!A{row_number}:{last_column}{row_number}' for row_number in rows.values()]
+                ))
+                
+                id_position = self._row_decoder.columns['id']
+                loaded = {}
+                for (item_id, row_number), value_range in zip(rows.items(), result.get('valueRanges', [])):
+                    values = value_range.get('values', [])
+                    if not values or len(values[0]) <= id_position or values[0][id_position] != item_id:
+                        logger.warning(f"Índice da linha {row_number} defasado para o item {item_id}, recarregando planilha")
+                        self.invalidate_cache()
+                        cache = self._get_cache()
+                        return {item_id: self._copy_item(cache[item_id], writable=True) for item_id in item_ids if item_id in cache}
+                    loaded[item_id] = self._row_to_item(values[0])
+                    if self.installments_layout == INSTALLMENTS_LAYOUT_TAB and not isinstance(
+                            loaded[item_id]['parcelas_mensais'], RecurringInstallments):
+                        # No layout 'tab' as parcelas não estão na linha; mantém as do cache
+                        loaded[item_id]['parcelas_mensais'] = self._items_cache[item_id]['parcelas_mensais']
+                
+                for item_id, item in loaded.items():
+                    cached_item = self._items_cache.get(item_id)
+                    if cached_item != item:
+                        # Só a linha alterada fora da API avisa os listeners (sem nova versão à toa)
+                        self._notify_upsert(cached_item, item)
+                        self._items_cache[item_id] = item
+                return {item_id: self._copy_item(item, writable=True) for item_id, item in loaded.items()}
+            
+            except HttpError as error:
+                logger.error(f"Erro ao carregar itens: {error}")
+                raise
+    
+    def load_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Carrega um único item para uma operação de escrita (uma leitura)"""
+        return self.load_items([item_id]).get(item_id)
+    
+    def save_items(self, items: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Grava os itens nas suas linhas (uma escrita só das células alteradas, sem leituras)
+        
+        Deve ser chamado com itens obtidos por load_items. Todas as alterações vão
+        em um único values().batchUpdate. Retorna os itens como ficaram gravados;
+        itens que não existem mais no índice ficam fora do resultado.
+        """
+        with self._lock:
+            try:
+                data = []
+                rows = {}
+                new_installments = {}
+                removed_rows = []
+                for item_id, item in items.items():
+                    row_number = self._row_index.get(item_id)
+                    if row_number is None:
+                        logger.warning(f"Item {item_id} não encontrado")
+                        continue
                     
-                    # Prepara os dados atualizados
-                    row_data = [
-                        item_id,
-                        item_data.get('nome', item['nome']),
-                        str(item_data.get('valor', item['valor'])),
-                        str(item_data.get('parcelas', item['parcelas'])),
-                        str(item_data.get('percentual_pessoa1', item['percentual_pessoa1'])),
-                        str(item_data.get('percentual_pessoa2', item['percentual_pessoa2'])),
-                        item_data.get('data_criacao', item['data_criacao']),
-                        str(item_data.get('ativo', item['ativo'])),
-                        str(item_data.get('conta_fixa', item.get('conta_fixa', False))),
-                        str(item_data.get('valor_manual_pessoa1', item.get('valor_manual_pessoa1', '')) if item_data.get('valor_manual_pessoa1', item.get('valor_manual_pessoa1', '')) is not None else ''),
-                        str(item_data.get('valor_manual_pessoa2', item.get('valor_manual_pessoa2', '')) if item_data.get('valor_manual_pessoa2', item.get('valor_manual_pessoa2', '')) is not None else ''),
-                        str(item_data.get('pago_pessoa1', item.get('pago_pessoa1', False))),
-                        str(item_data.get('pago_pessoa2', item.get('pago_pessoa2', False))),
-                        parcelas_mensais_json,
-                        str(item_data.get('comecar_mes_atual', item.get('comecar_mes_atual', True)))
-                    ]
+                    row_data = self._item_to_row(item_id, item)
+                    rows[item_id] = row_data
                     
-                    # Atualiza a linha (linha 2 + índice, pois linha 1 são os cabeçalhos)
-                    row_number = i + 2
+                    # Compara com a linha em cache para gravar apenas as células alteradas
+                    cached_item = self._items_cache.get(item_id) if self._items_cache is not None else None
+                    previous_row = self._item_to_row(item_id, cached_item) if cached_item else None
+                    data.extend(self._row_diff_data(row_number, previous_row, row_data))
                     
-                    self.service.spreadsheets().values().update(
+                    if self.installments_layout == INSTALLMENTS_LAYOUT_TAB:
+                        installment_data, added, removed = self._installments_diff(item_id, cached_item, item)
+                        data.extend(installment_data)
+                        removed_rows.extend(removed)
+                        if added:
+                            new_installments[item_id] = added
+                
+                if data:
+                    self._execute_write(lambda: self.service.spreadsheets().values().batchUpdate(
                         spreadsheetId=self.spreadsheet_id,
-                        range=f'{self.sheet_name}!A{row_number}:O{row_number}',
-                        valueInputOption='RAW',
-                        body={'values': [row_data]}
-                    ).execute()
-                    
-                    logger.info(f"Item {item_id} atualizado com sucesso")
-                    return True
+                        body={'valueInputOption': 'RAW', 'data': data}
+                    ))
+                    self._generation += 1
+                
+                if removed_rows:
+                    self._delete_installment_rows(removed_rows)
+                for item_id, parcelas_mensais in new_installments.items():
+                    self._append_installments(item_id, parcelas_mensais)
+                
+                # Atualiza os itens no cache em vez de descartá-los
+                saved_items = {}
+                for item_id, row_data in rows.items():
+                    saved_item = self._stored_item(item_id, row_data, items[item_id])
+                    if self._items_cache is not None:
+                        self._notify_upsert(self._items_cache.get(item_id), saved_item)
+                        self._items_cache[item_id] = saved_item
+                    saved_items[item_id] = self._copy_item(saved_item)
+                
+                logger.info(f"{len(saved_items)} item(ns) atualizado(s) com {len(data)} intervalo(s) gravado(s)")
+                return saved_items
             
-            logger.warning(f"Item {item_id} não encontrado")
-            return False
+            except HttpError as error:
+                logger.error(f"Erro ao atualizar itens: {error}")
+                raise
+    
+    def save_item(self, item_id: str, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Grava um único item (ver save_items); retorna None se o item não existe mais"""
+        return self.save_items({item_id: item}).get(item_id)
+    
+    def modify_items(self, item_ids: List[str],
+                     modify: Callable[[Dict[str, Dict[str, Any]]], Optional[Iterable[str]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Carrega os itens, aplica modify e grava o resultado sob o mesmo lock
         
-        except HttpError as error:
-            logger.error(f"Erro ao atualizar item: {error}")
-            raise
+        Nenhuma outra escrita acontece entre a leitura e a gravação (sem perder
+        atualizações concorrentes). modify recebe {id: item} só com os itens
+        existentes e os altera no lugar; retorna os IDs a gravar (None: todos).
+        Exceções de modify interrompem a operação sem gravar nada.
+        """
+        with self._lock:
+            items = self.load_items(item_ids)
+            changed_ids = modify(items)
+            if changed_ids is not None:
+                items = {item_id: items[item_id] for item_id in changed_ids if item_id in items}
+            return self.save_items(items) if items else {}
+    
+    def modify_item(self, item_id: str, modify: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Versão de modify_items para um item; retorna None (sem chamar modify) se ele não existe"""
+        def modify_one(items: Dict[str, Dict[str, Any]]):
+            for item in items.values():
+                modify(item)
+        
+        return self.modify_items([item_id], modify_one).get(item_id)
+    
+    @staticmethod
+    def _changed_ranges(previous_row: Optional[List[str]], row_data: List[str]) -> List[Tuple[int, int]]:
+        """Agrupa as colunas alteradas em intervalos contíguos (início, fim) baseados em 0"""
+        changed = [
+            col for col, value in enumerate(row_data)
+            if previous_row is None or col >= len(previous_row) or previous_row[col] != value
+        ]
+        ranges = []
+        for col in changed:
+            if ranges and ranges[-1][1] == col - 1:
+                ranges[-1] = (ranges[-1][0], col)
+            else:
+                ranges.append((col, col))
+        return ranges
+    
+    def _row_diff_data(self, row_number: int, previous_row: Optional[List[str]], row_data: List[str],
+                       sheet_name: str = None) -> List[Dict[str, Any]]:
+        """Monta os intervalos de um batchUpdate com somente as células que mudaram na linha"""
+        sheet_name = sheet_name or self.sheet_name
+        return [
+            {
+                'range': f'{sheet_name}!{column_letter(start)}{row_number}:{column_letter(end)}{row_number}',
+                'values': [row_data[start:end + 1]]
+            } for start, end in self._changed_ranges(previous_row, row_data)
+        ]
+    
+    def update_item(self, item_id: str, item_data: Dict[str, Any]) -> bool:
+        """Atualiza um item existente na planilha"""
+        logger.info(f"Atualizando item {item_id} com dados: {item_data}")
+        with self._lock:
+            current_item = self.load_item(item_id)
+            
+            if current_item is None:
+                logger.warning(f"Item {item_id} não encontrado")
+                return False
+            
+            return self.save_item(item_id, {**current_item, **item_data}) is not None
     
     def delete_item(self, item_id: str) -> bool:
         """Remove completamente um item da planilha"""
-        try:
-            # Busca todos os itens para encontrar a linha do item
-            items = self.get_all_items()
+        with self._lock:
+            try:
+                # Localiza a linha do item pelo índice (sem baixar a planilha inteira)
+                row_number = self._find_row(item_id)
+                
+                if row_number is None:
+                    logger.warning(f"Item {item_id} não encontrado")
+                    return False
+                
+                # Remove a linha da planilha
+                self._delete_rows(self.sheet_name, [row_number])
+                
+                # Remove o item do cache e desloca as linhas seguintes no índice
+                if self._items_cache is not None:
+                    old_item = self._items_cache.pop(item_id, None)
+                    self._row_index.pop(item_id, None)
+                    self._shift_rows_after(row_number)
+                    if old_item is not None:
+                        self._notify_delete(old_item)
+                
+                if self.installments_layout == INSTALLMENTS_LAYOUT_TAB:
+                    self._delete_installment_rows(self._installment_rows.pop(item_id, []))
+                
+                logger.info(f"Item {item_id} removido completamente da planilha")
+                return True
             
-            for i, item in enumerate(items):
-                if item['id'] == item_id:
-                    # Calcula o número da linha (linha 2 + índice, pois linha 1 são os cabeçalhos)
-                    row_number = i + 2
-                    
-                    # Remove a linha da planilha
-                    request_body = {
-                        'requests': [{
-                            'deleteDimension': {
-                                'range': {
-                                    'sheetId': 0,  # ID da primeira aba
-                                    'dimension': 'ROWS',
-                                    'startIndex': row_number - 1,  # Índice baseado em 0
-                                    'endIndex': row_number
-                                }
-                            }
-                        }]
+            except HttpError as error:
+                logger.error(f"Erro ao deletar item: {error}")
+                raise
+    
+    def _delete_rows(self, sheet_name: str, row_numbers: List[int]):
+        """Exclui as linhas informadas da aba em um único batchUpdate (de baixo para cima)"""
+        self._execute_write(lambda: self.service.spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={'requests': [
+                {
+                    'deleteDimension': {
+                        'range': {
+                            'sheetId': self._sheet_id(sheet_name),
+                            'dimension': 'ROWS',
+                            'startIndex': row_number - 1,  # Índice baseado em 0
+                            'endIndex': row_number
+                        }
                     }
-                    
-                    self.service.spreadsheets().batchUpdate(
+                } for row_number in sorted(row_numbers, reverse=True)
+            ]}
+        ))
+        self._generation += 1
+    
+    def _delete_installment_rows(self, row_numbers: List[int]):
+        """Exclui linhas da aba de parcelas (layout 'tab') e desloca o índice das linhas seguintes"""
+        if not row_numbers:
+            return
+        
+        self._delete_rows(self.installments_sheet_name, row_numbers)
+        
+        deleted = sorted(row_numbers)
+        deleted_set = set(deleted)
+        for item_id, item_rows in self._installment_rows.items():
+            self._installment_rows[item_id] = [
+                row_number - bisect.bisect_left(deleted, row_number)
+                for row_number in item_rows if row_number not in deleted_set
+            ]
+    
+    def migrate_installments_to_tab(self, keep_json: bool = False) -> int:
+        """
+        Migra as parcelas mensais da coluna N (JSON) para a aba de parcelas
+        
+        Operação única: grava todas as parcelas na aba dedicada em uma escrita e,
+        a menos que keep_json seja True, limpa a coluna N (mantendo as regras das
+        contas fixas, que não viram linhas). Depois da migração,
+        configure INSTALLMENTS_LAYOUT=tab. Retorna o número de parcelas migradas.
+        """
+        with self._lock:
+            try:
+                self._ensure_installments_sheet()
+                
+                existing = self._execute(self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f'{self.installments_sheet_name}!A2:A'
+                ))
+                if existing.get('values'):
+                    raise ValueError(f"A aba '{self.installments_sheet_name}' já possui parcelas; migração abortada")
+                
+                result = self._execute(self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f'{self.sheet_name}!A1:Z'
+                ))
+                values = result.get('values', [])
+                decoder = self._get_row_decoder(values[0] if values else SHEET_HEADERS)
+                decoded, malformed_rows = decoder.decode_rows(values[1:], first_row_number=2)
+                decoded = dict(decoded)
+                # Linhas com JSON inválido mantêm a célula: a migração não apaga o que não leu
+                malformed = {row['linha'] for row in malformed_rows}
+                
+                rows = []
+                # Nova coluna das parcelas: as regras de conta fixa continuam nela, as listas saem
+                json_position = decoder.columns['parcelas_mensais']
+                json_column = []
+                for row_number, row in enumerate(values[1:], 2):
+                    cell = row[json_position] if len(row) > json_position else ''
+                    item = decoded.get(row_number)
+                    if item is not None and row_number not in malformed and not isinstance(
+                            item['parcelas_mensais'], RecurringInstallments):
+                        rows.extend(self._installment_to_row(item['id'], p) for p in item['parcelas_mensais'])
+                        cell = ''
+                    json_column.append([cell])
+                
+                if rows:
+                    self._execute(self.service.spreadsheets().values().update(
                         spreadsheetId=self.spreadsheet_id,
-                        body=request_body
-                    ).execute()
-                    
-                    logger.info(f"Item {item_id} removido completamente da planilha")
-                    return True
+                        range=f'{self.installments_sheet_name}!A2:F{len(rows) + 1}',
+                        valueInputOption='RAW',
+                        body={'values': rows}
+                    ))
+                
+                if not keep_json and json_column:
+                    self._execute(self.service.spreadsheets().values().update(
+                        spreadsheetId=self.spreadsheet_id,
+                        range=f'{self.sheet_name}!{column_letter(json_position)}2:{column_letter(json_position)}{len(json_column) + 1}',
+                        valueInputOption='RAW',
+                        body={'values': json_column}
+                    ))
+                
+                self.invalidate_cache()
+                logger.info(f"{len(rows)} parcelas migradas para a aba '{self.installments_sheet_name}'")
+                return len(rows)
             
-            logger.warning(f"Item {item_id} não encontrado")
-            return False
-        
-        except HttpError as error:
-            logger.error(f"Erro ao deletar item: {error}")
-            raise
+            except HttpError as error:
+                logger.error(f"Erro ao migrar parcelas: {error}")
+                raise
@@ -0,0 +1,500 @@
+"""
+Representação compacta das parcelas mensais de um item
+
+No armazenamento cada parcela é um dicionário com cinco chaves (mes,
+valor_pessoa1, valor_pessoa2, pago_pessoa1, pago_pessoa2). O
+CompactInstallments guarda as parcelas de um item em arrays paralelos: o mês
+como inteiro (ano * 12 + mês), os valores em array('d') e os dois pagamentos
+empacotados em um byte por parcela (bit 0 = pessoa1, bit 1 = pessoa2).
+
+É o formato das parcelas no cache do GoogleSheetsServiceManager: get_all_items
+e o cálculo do resumo trabalham direto nos arrays, e os modelos pydantic só são
+criados na resposta (to_models). A busca por mês usa um índice mês -> posição
+montado na primeira consulta. Os objetos são imutáveis e podem ser
+compartilhados entre o cache e os itens devolvidos; para alterar parcelas
+(operações de escrita), use to_dicts().
+
+As contas fixas usam RecurringInstallments: uma regra (mês inicial, valores
+mensais e meses pagos) no lugar de 120 parcelas materializadas. No JSON gravado
+a regra é um objeto e as parcelas comuns uma lista (installments_from_json).
+"""
+import os
+from array import array
+from datetime import datetime
+from itertools import compress
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Union, Iterator, Iterable, Sequence, Set, Tuple
+
+from models import PaymentInstallment
+
+PAGO_PESSOA1 = 1
+PAGO_PESSOA2 = 2
+_QUITADA = PAGO_PESSOA1 | PAGO_PESSOA2
+# Byte de pagamentos -> (pago_pessoa1, pago_pessoa2)
+_PAGOS = [(bool(pago & PAGO_PESSOA1), bool(pago & PAGO_PESSOA2)) for pago in range(_QUITADA + 1)]
+
+# Chaves dos dicionários de parcela, na ordem gravada pela API
+INSTALLMENT_KEYS = ('mes', 'valor_pessoa1', 'valor_pessoa2', 'pago_pessoa1', 'pago_pessoa2')
+_get_mes, _get_valor_pessoa1, _get_valor_pessoa2, _get_pago_pessoa1, _get_pago_pessoa2 = map(itemgetter, INSTALLMENT_KEYS)
+
+# Caches 'MM/YYYY' <-> chave (poucos meses distintos, repetidos em todos os itens);
+# _month_keys só recebe meses no formato exato 'MM/YYYY'
+_month_strings: Dict[int, str] = {}
+_month_keys: Dict[str, int] = {}
+
+# Meses materializados à frente do mês atual nas parcelas das contas fixas
+FIXED_BILLS_MONTHS_AHEAD = int(os.getenv('FIXED_BILLS_MONTHS_AHEAD', '12'))
+
+def current_month_key() -> int:
+    now = datetime.now()
+    return now.year * 12 + now.month
+
+def month_key(mes: str) -> int:
+    """Converte 'MM/YYYY' em uma chave inteira ordenável (ano * 12 + mês)"""
+    month, year = mes.split('/')
+    return int(year) * 12 + int(month)
+
+def month_from_key(key: int) -> str:
+    """Converte a chave de month_key de volta em 'MM/YYYY'"""
+    mes = _month_strings.get(key)
+    if mes is None:
+        year, month = divmod(key - 1, 12)
+        mes = _month_strings[key] = f'{month + 1:02d}/{year}'
+    return mes
+
+def normalize_month(mes: str) -> Optional[str]:
+    """mes no formato exato 'MM/YYYY' (aceita o mês sem o zero, 'M/YYYY'), ou None se não é um mês válido"""
+    try:
+        month, year = (int(part) for part in mes.split('/'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        return None
+    return month_from_key(year * 12 + month)
+
+def canonical_month_key(mes: str) -> Optional[int]:
+    """Chave do mês, ou None se mes não está exatamente no formato 'MM/YYYY'"""
+    key = _month_keys.get(mes)
+    if key is not None:
+        return key
+    try:
+        key = month_key(mes)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if month_from_key(key) != mes:
+        return None
+    _month_keys[mes] = key
+    return key
+
+def iso_month_key(value: str) -> Optional[int]:
+    """Chave do mês no formato 'YYYY-MM' (usado nas rotas), ou None fora do formato"""
+    year, separator, month = value.partition('-')
+    if not separator or len(year) != 4 or len(month) != 2:
+        return None
+    return canonical_month_key(f'{month}/{year}')
+
+def installments_by_month(parcelas: Iterable[Dict[str, Any]]) -> Dict[Union[int, str], List[Dict[str, Any]]]:
+    """
+    Índice mês -> parcelas (dicionários) daquele mês, na ordem da lista
+
+    A chave é a de month_key; meses fora do formato 'MM/YYYY' ficam sob o próprio
+    texto, e só são encontrados pelo mesmo texto (como na comparação de strings).
+    """
+    index: Dict[Union[int, str], List[Dict[str, Any]]] = {}
+    for parcela in parcelas:
+        mes = parcela['mes']
+        key = canonical_month_key(mes)
+        index.setdefault(mes if key is None else key, []).append(parcela)
+    return index
+
+def month_lookup_key(mes: str) -> Union[int, str]:
+    """Chave de busca de mes em installments_by_month"""
+    key = canonical_month_key(mes)
+    return mes if key is None else key
+
+class CompactInstallments:
+    """Parcelas mensais de um item em arrays paralelos (somente leitura)"""
+    __slots__ = ('months', 'valores_pessoa1', 'valores_pessoa2', 'pagos', '_index')
+
+    def __init__(self, months: array, valores_pessoa1: array, valores_pessoa2: array, pagos: bytes):
+        self.months = months
+        self.valores_pessoa1 = valores_pessoa1
+        self.valores_pessoa2 = valores_pessoa2
+        self.pagos = pagos
+        # Índice mês -> posições, montado na primeira busca (ver _positions)
+        self._index: Union[None, int, Dict[int, Tuple[int, ...]]] = None
+
+    @classmethod
+    def from_dicts(cls, parcelas: List[Dict[str, Any]]) -> Optional['CompactInstallments']:
+        """
+        Compacta uma lista de parcelas (dicionários)
+
+        Retorna None se as parcelas não cabem nos arrays (chaves diferentes, mês fora
+        do formato 'MM/YYYY', valores não numéricos...); nesse caso a lista original
+        deve ser mantida. Valores inteiros passam a float.
+        """
+        if not parcelas:
+            return None
+        try:
+            # Cinco chaves, todas presentes (itemgetter levanta KeyError se faltar alguma)
+            if {*map(len, parcelas)} != {len(INSTALLMENT_KEYS)}:
+                return None
+            keys = list(map(_month_keys.get, map(_get_mes, parcelas)))
+            if None in keys:
+                keys = list(map(canonical_month_key, map(_get_mes, parcelas)))
+                if None in keys:
+                    return None
+            months = array('i', keys)
+            valores_pessoa1 = array('d', map(_get_valor_pessoa1, parcelas))
+            valores_pessoa2 = array('d', map(_get_valor_pessoa2, parcelas))
+            pagos_pessoa1 = bytes(map(_get_pago_pessoa1, parcelas))
+            pagos_pessoa2 = bytes(map(_get_pago_pessoa2, parcelas))
+        except (TypeError, KeyError, ValueError, OverflowError):
+            return None
+
+        # Pagamentos devem ser booleanos (bytes 0/1)
+        if pagos_pessoa1.translate(None, b'\x00\x01') or pagos_pessoa2.translate(None, b'\x00\x01'):
+            return None
+
+        # Um byte por parcela: soma dos dois bitmaps, sem vai-um entre os bytes
+        pagos = (
+            int.from_bytes(pagos_pessoa1, 'little') * PAGO_PESSOA1
+            + int.from_bytes(pagos_pessoa2, 'little') * PAGO_PESSOA2
+        ).to_bytes(len(parcelas), 'little')
+        return cls(months, valores_pessoa1, valores_pessoa2, pagos)
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def _build_index(self) -> Union[int, Dict[int, Tuple[int, ...]]]:
+        months = self.months
+        if months and months == array('i', range(months[0], months[0] + len(months))):
+            # Meses consecutivos (o caso gerado pela API): a posição é a distância
+            # até o primeiro mês, sem dicionário
+            return months[0]
+        index: Dict[int, List[int]] = {}
+        for i, key in enumerate(months):
+            index.setdefault(key, []).append(i)
+        return {key: tuple(positions) for key, positions in index.items()}
+
+    def _positions(self, key: int) -> Sequence[int]:
+        """Posições das parcelas do mês (chave de month_key), em ordem"""
+        index = self._index
+        if index is None:
+            # Atribuição idempotente: threads concorrentes montam o mesmo índice
+            index = self._index = self._build_index()
+        if isinstance(index, int):
+            i = key - index
+            return (i,) if 0 <= i < len(self.months) else ()
+        return index.get(key, ())
+
+    def _parcela(self, i: int) -> Dict[str, Any]:
+        pago = self.pagos[i]
+        return {
+            'mes': month_from_key(self.months[i]),
+            'valor_pessoa1': self.valores_pessoa1[i],
+            'valor_pessoa2': self.valores_pessoa2[i],
+            'pago_pessoa1': bool(pago & PAGO_PESSOA1),
+            'pago_pessoa2': bool(pago & PAGO_PESSOA2)
+        }
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """Parcela na posição i, como dicionário (uma cópia; alterá-la não muda as parcelas)"""
+        if not isinstance(i, int):
+            raise TypeError("CompactInstallments aceita apenas índices inteiros")
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("índice de parcela fora do intervalo")
+        return self._parcela(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Percorre as parcelas como dicionários, para o código que espera a lista original"""
+        for i in range(len(self)):
+            yield self._parcela(i)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CompactInstallments):
+            return (self.months == other.months and self.pagos == other.pagos
+                    and self.valores_pessoa1 == other.valores_pessoa1
+                    and self.valores_pessoa2 == other.valores_pessoa2)
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'CompactInstallments({self.to_dicts()!r})'
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Parcelas como lista de dicionários (o formato do armazenamento), para alteração"""
+        return [
+            {
+                'mes': month_from_key(key),
+                'valor_pessoa1': valor1,
+                'valor_pessoa2': valor2,
+                'pago_pessoa1': pago_pessoa1,
+                'pago_pessoa2': pago_pessoa2
+            } for key, valor1, valor2, (pago_pessoa1, pago_pessoa2) in zip(
+                self.months, self.valores_pessoa1, self.valores_pessoa2, map(_PAGOS.__getitem__, self.pagos)
+            )
+        ]
+
+    def to_models(self) -> List[PaymentInstallment]:
+        """Parcelas como modelos PaymentInstallment, para a resposta da API"""
+        return [
+            PaymentInstallment(
+                mes=month_from_key(key),
+                valor_pessoa1=valor1,
+                valor_pessoa2=valor2,
+                pago_pessoa1=bool(pago & PAGO_PESSOA1),
+                pago_pessoa2=bool(pago & PAGO_PESSOA2)
+            ) for key, valor1, valor2, pago in zip(self.months, self.valores_pessoa1, self.valores_pessoa2, self.pagos)
+        ]
+
+    def has_month(self, mes: str) -> bool:
+        """Indica se existe parcela para o mês 'MM/YYYY'"""
+        key = canonical_month_key(mes)
+        return key is not None and bool(self._positions(key))
+
+    def month_totals(self, mes: str) -> Tuple[float, float, float, float]:
+        """
+        Soma as parcelas do mês: (mensal_pessoa1, mensal_pessoa2, atual_pessoa1, atual_pessoa2)
+
+        atual_* soma só as parcelas não pagas. As somas seguem a ordem das parcelas,
+        como o laço de utils.calculate_item_totals.
+        """
+        mensal1 = mensal2 = atual1 = atual2 = 0.0
+        key = canonical_month_key(mes)
+        if key is None:
+            return mensal1, mensal2, atual1, atual2
+
+        for i in self._positions(key):
+            valor1 = self.valores_pessoa1[i]
+            valor2 = self.valores_pessoa2[i]
+            mensal1 += valor1
+            mensal2 += valor2
+            if not self.pagos[i] & PAGO_PESSOA1:
+                atual1 += valor1
+            if not self.pagos[i] & PAGO_PESSOA2:
+                atual2 += valor2
+        return mensal1, mensal2, atual1, atual2
+
+    def paid_totals(self) -> Tuple[float, float]:
+        """Valores já pagos por pessoa, somados com sum() como em utils.calculate_item_totals"""
+        return (
+            sum(compress(self.valores_pessoa1, map(PAGO_PESSOA1.__and__, self.pagos))),
+            sum(compress(self.valores_pessoa2, map(PAGO_PESSOA2.__and__, self.pagos)))
+        )
+
+    def paid_count(self) -> int:
+        """Número de parcelas pagas pelas duas pessoas"""
+        return self.pagos.count(_QUITADA)
+
+class RecurringInstallments:
+    """
+    Parcelas de uma conta fixa como regra de recorrência
+
+    Guarda só o mês inicial, os valores mensais de cada pessoa e os meses já
+    pagos: a conta vale para todos os meses a partir do início, sem data de fim.
+    As parcelas são materializadas sob demanda; a lista (iteração, to_dicts,
+    to_models) cobre do início até FIXED_BILLS_MONTHS_AHEAD meses após o mês
+    atual ou o último mês pago. Os objetos do cache não devem ser alterados;
+    set_paid é usado nas cópias de escrita (copy).
+    """
+    __slots__ = ('inicio', 'valor_pessoa1', 'valor_pessoa2', 'pagos_pessoa1', 'pagos_pessoa2')
+
+    def __init__(self, inicio: int, valor_pessoa1: float, valor_pessoa2: float,
+                 pagos_pessoa1: Iterable[int] = (), pagos_pessoa2: Iterable[int] = ()):
+        self.inicio = inicio
+        self.valor_pessoa1 = valor_pessoa1
+        self.valor_pessoa2 = valor_pessoa2
+        self.pagos_pessoa1: Set[int] = {key for key in pagos_pessoa1 if key >= inicio}
+        self.pagos_pessoa2: Set[int] = {key for key in pagos_pessoa2 if key >= inicio}
+
+    @classmethod
+    def from_dicts(cls, parcelas: Iterable[Dict[str, Any]]) -> Optional['RecurringInstallments']:
+        """
+        Converte parcelas materializadas de uma conta fixa em regra
+
+        Exige o mesmo valor em todas as parcelas e meses em ordem crescente, sem
+        repetição; meses que faltam na lista (saltos do cálculo antigo por dias)
+        passam a existir, não pagos. Retorna None se não for possível.
+        """
+        keys = []
+        valores = set()
+        pagos_pessoa1 = []
+        pagos_pessoa2 = []
+        for parcela in parcelas:
+            key = canonical_month_key(parcela.get('mes'))
+            if key is None or (keys and key <= keys[-1]):
+                return None
+            keys.append(key)
+            valores.add((parcela.get('valor_pessoa1'), parcela.get('valor_pessoa2')))
+            if parcela.get('pago_pessoa1', False):
+                pagos_pessoa1.append(key)
+            if parcela.get('pago_pessoa2', False):
+                pagos_pessoa2.append(key)
+
+        if not keys or len(valores) != 1:
+            return None
+        valor_pessoa1, valor_pessoa2 = valores.pop()
+        try:
+            valor_pessoa1, valor_pessoa2 = float(valor_pessoa1), float(valor_pessoa2)
+        except (TypeError, ValueError):
+            return None
+        return cls(keys[0], valor_pessoa1, valor_pessoa2, pagos_pessoa1, pagos_pessoa2)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'RecurringInstallments':
+        """Monta a regra a partir do formato gravado (to_json)"""
+        inicio = canonical_month_key(data['inicio'])
+        if inicio is None:
+            raise ValueError(f"Mês inicial inválido: {data['inicio']}")
+        return cls(
+            inicio,
+            float(data['valor_pessoa1']),
+            float(data['valor_pessoa2']),
+            map(month_key, data.get('pagos_pessoa1', [])),
+            map(month_key, data.get('pagos_pessoa2', []))
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        """Formato gravado no armazenamento: meses como 'MM/YYYY', pagos em ordem"""
+        return {
+            'inicio': month_from_key(self.inicio),
+            'valor_pessoa1': self.valor_pessoa1,
+            'valor_pessoa2': self.valor_pessoa2,
+            'pagos_pessoa1': [month_from_key(key) for key in sorted(self.pagos_pessoa1)],
+            'pagos_pessoa2': [month_from_key(key) for key in sorted(self.pagos_pessoa2)]
+        }
+
+    def copy(self) -> 'RecurringInstallments':
+        return RecurringInstallments(self.inicio, self.valor_pessoa1, self.valor_pessoa2,
+                                     self.pagos_pessoa1, self.pagos_pessoa2)
+
+    def window_end(self) -> int:
+        """Chave do último mês da lista materializada"""
+        last = max(current_month_key(), self.inicio, *self.pagos_pessoa1, *self.pagos_pessoa2)
+        return last + FIXED_BILLS_MONTHS_AHEAD - 1
+
+    def installment(self, key: int) -> Optional[Dict[str, Any]]:
+        """Parcela do mês (chave de month_key), ou None antes do início"""
+        if key < self.inicio:
+            return None
+        return {
+            'mes': month_from_key(key),
+            'valor_pessoa1': self.valor_pessoa1,
+            'valor_pessoa2': self.valor_pessoa2,
+            'pago_pessoa1': key in self.pagos_pessoa1,
+            'pago_pessoa2': key in self.pagos_pessoa2
+        }
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return self.window_end() - self.inicio + 1
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for key in range(self.inicio, self.window_end() + 1):
+            yield self.installment(key)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RecurringInstallments):
+            return (self.inicio, self.valor_pessoa1, self.valor_pessoa2, self.pagos_pessoa1, self.pagos_pessoa2) == \
+                (other.inicio, other.valor_pessoa1, other.valor_pessoa2, other.pagos_pessoa1, other.pagos_pessoa2)
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'RecurringInstallments({self.to_json()!r})'
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def to_models(self) -> List[PaymentInstallment]:
+        return [PaymentInstallment(**parcela) for parcela in self]
+
+    def has_month(self, mes: str) -> bool:
+        key = canonical_month_key(mes)
+        return key is not None and key >= self.inicio
+
+    def month_totals(self, mes: str) -> Tuple[float, float, float, float]:
+        """Mesmo resultado de CompactInstallments.month_totals, sem materializar parcelas"""
+        key = canonical_month_key(mes)
+        if key is None or key < self.inicio:
+            return 0.0, 0.0, 0.0, 0.0
+        return (
+            0.0 + self.valor_pessoa1,
+            0.0 + self.valor_pessoa2,
+            0.0 if key in self.pagos_pessoa1 else 0.0 + self.valor_pessoa1,
+            0.0 if key in self.pagos_pessoa2 else 0.0 + self.valor_pessoa2
+        )
+
+    def paid_totals(self) -> Tuple[float, float]:
+        return (
+            sum([self.valor_pessoa1] * len(self.pagos_pessoa1)),
+            sum([self.valor_pessoa2] * len(self.pagos_pessoa2))
+        )
+
+    def paid_count(self) -> int:
+        return len(self.pagos_pessoa1 & self.pagos_pessoa2)
+
+    def set_paid(self, mes: str, pessoa: str, pago: bool = True):
+        """
+        Marca (ou desmarca) o mês como pago para a pessoa
+
+        Raises:
+            ValueError: Se a pessoa é inválida
+            LookupError: Se o mês é anterior ao início da conta
+        """
+        key = canonical_month_key(mes)
+        if key is None or key < self.inicio:
+            raise LookupError(f"Parcela do mês {mes} não encontrada")
+        if pessoa == "pessoa1":
+            pagos = self.pagos_pessoa1
+        elif pessoa == "pessoa2":
+            pagos = self.pagos_pessoa2
+        else:
+            raise ValueError("Pessoa deve ser 'pessoa1' ou 'pessoa2'")
+        if pago:
+            pagos.add(key)
+        else:
+            pagos.discard(key)
+
+# Parcelas em formato próprio (não lista), com month_totals/paid_totals/to_models
+PACKED_INSTALLMENTS = (CompactInstallments, RecurringInstallments)
+
+def compact_installments(parcelas: List[Dict[str, Any]]) -> Union[CompactInstallments, List[Dict[str, Any]]]:
+    """Versão compacta das parcelas, ou a própria lista se ela não puder ser compactada"""
+    if isinstance(parcelas, PACKED_INSTALLMENTS):
+        return parcelas
+    compacted = CompactInstallments.from_dicts(parcelas)
+    return parcelas if compacted is None else compacted
+
+def installments_from_json(data: Any) -> Union[CompactInstallments, RecurringInstallments, List[Dict[str, Any]]]:
+    """Parcelas a partir do JSON gravado: lista de parcelas ou regra de recorrência (objeto)"""
+    if isinstance(data, dict):
+        return RecurringInstallments.from_json(data)
+    return compact_installments(data)
+
+def installments_to_json(parcelas: Any) -> Any:
+    """Parcelas no formato do JSON gravado (inverso de installments_from_json)"""
+    if isinstance(parcelas, RecurringInstallments):
+        return parcelas.to_json()
+    if isinstance(parcelas, CompactInstallments):
+        return parcelas.to_dicts()
+    return parcelas
+
+def writable_installments(parcelas: Any) -> Union[RecurringInstallments, List[Dict[str, Any]]]:
+    """Cópia das parcelas que pode ser alterada: regra copiada ou nova lista de dicionários"""
+    if isinstance(parcelas, RecurringInstallments):
+        return parcelas.copy()
+    if isinstance(parcelas, CompactInstallments):
+        return parcelas.to_dicts()
+    return [dict(p) for p in parcelas or []]
@@ -0,0 +1,279 @@
+"""
+Respostas JSON montadas direto dos itens do armazenamento
+
+As rotas de leitura (/payments/items e /payments/summary) declaram
+response_model para o esquema do OpenAPI, mas montar um PaymentItem e um
+PaymentInstallment por parcela e depois serializá-los de novo pelo FastAPI é o
+maior custo de CPU dessas requisições. Aqui os itens (dicionários do
+armazenamento) viram listas e dicionários simples, com as chaves na ordem dos
+modelos e os mesmos tipos que a validação do pydantic produziria, e são
+codificados de uma vez pelo serializador em Rust do pydantic (pydantic_core).
+
+O FastAPI serializa o response_model com o mesmo serializador (dump_json), então
+os bytes são os mesmos, inclusive o formato dos números e os valores não finitos
+(inf/NaN viram null). A conferência está em tests/test_json_responses.py.
+
+Os parâmetros fields= / exclude= das rotas escolhem os campos da resposta
+(parse_fields, summary_projection); só os campos pedidos são montados, então
+parcelas_mensais fora da resposta nem chega a ser convertido.
+
+As respostas levam o ETag da versão dos dados (storage.data_version); com o
+mesmo ETag em If-None-Match a rota responde 304 sem corpo (not_modified_response).
+"""
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import pydantic_core
+from fastapi import Response
+
+from installments import PACKED_INSTALLMENTS, month_from_key
+from models import PaymentItem, PaymentSummary
+from utils import payment_summary_fields
+
+# Campos das respostas, na ordem dos modelos (nomes aceitos em fields= / exclude=)
+ITEM_FIELDS = tuple(PaymentItem.model_fields)
+SUMMARY_FIELDS = tuple(PaymentSummary.model_fields)
+
+def _optional_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+def installments_content(parcelas_mensais: Any) -> Optional[List[Dict[str, Any]]]:
+    """Parcelas como em PaymentItem.parcelas_mensais serializado (None sem parcelas)"""
+    if isinstance(parcelas_mensais, PACKED_INSTALLMENTS):
+        return parcelas_mensais.to_dicts()
+    if not parcelas_mensais:
+        return None
+    return [
+        {
+            'mes': p['mes'],
+            'valor_pessoa1': float(p['valor_pessoa1']),
+            'valor_pessoa2': float(p['valor_pessoa2']),
+            'pago_pessoa1': bool(p.get('pago_pessoa1', False)),
+            'pago_pessoa2': bool(p.get('pago_pessoa2', False))
+        } for p in parcelas_mensais
+    ]
+
+def item_content(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Mesmo conteúdo de to_payment_item(item) serializado, sem criar os modelos"""
+    return {
+        'id': item['id'],
+        'nome': item['nome'],
+        'valor': float(item['valor']),
+        'parcelas': int(item['parcelas']),
+        'percentual_pessoa1': float(item['percentual_pessoa1']),
+        'percentual_pessoa2': float(item['percentual_pessoa2']),
+        'data_criacao': item.get('data_criacao', ''),
+        'ativo': bool(item.get('ativo', True)),
+        'conta_fixa': bool(item.get('conta_fixa', False)),
+        'valor_manual_pessoa1': _optional_float(item.get('valor_manual_pessoa1')),
+        'valor_manual_pessoa2': _optional_float(item.get('valor_manual_pessoa2')),
+        'pago_pessoa1': bool(item.get('pago_pessoa1', False)),
+        'pago_pessoa2': bool(item.get('pago_pessoa2', False)),
+        'parcelas_mensais': installments_content(item.get('parcelas_mensais')),
+        'comecar_mes_atual': bool(item.get('comecar_mes_atual', True))
+    }
+
+# Conteúdo de cada campo de item_content, para montar só os campos pedidos
+_ITEM_FIELD_CONTENT = {
+    'id': lambda item: item['id'],
+    'nome': lambda item: item['nome'],
+    'valor': lambda item: float(item['valor']),
+    'parcelas': lambda item: int(item['parcelas']),
+    'percentual_pessoa1': lambda item: float(item['percentual_pessoa1']),
+    'percentual_pessoa2': lambda item: float(item['percentual_pessoa2']),
+    'data_criacao': lambda item: item.get('data_criacao', ''),
+    'ativo': lambda item: bool(item.get('ativo', True)),
+    'conta_fixa': lambda item: bool(item.get('conta_fixa', False)),
+    'valor_manual_pessoa1': lambda item: _optional_float(item.get('valor_manual_pessoa1')),
+    'valor_manual_pessoa2': lambda item: _optional_float(item.get('valor_manual_pessoa2')),
+    'pago_pessoa1': lambda item: bool(item.get('pago_pessoa1', False)),
+    'pago_pessoa2': lambda item: bool(item.get('pago_pessoa2', False)),
+    'parcelas_mensais': lambda item: installments_content(item.get('parcelas_mensais')),
+    'comecar_mes_atual': lambda item: bool(item.get('comecar_mes_atual', True))
+}
+
+def items_content(items: List[Dict[str, Any]], item_fields: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
+    """Conteúdo de cada item, só com item_fields (None = todos os campos)"""
+    if item_fields is None:
+        return [item_content(item) for item in items]
+    builders = [(name, _ITEM_FIELD_CONTENT[name]) for name in item_fields]
+    return [{name: build(item) for name, build in builders} for item in items]
+
+def _field_names(value: str, available: Tuple[str, ...]) -> Set[str]:
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names.difference(available)
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+    return names
+
+def parse_fields(fields: Optional[str], exclude: Optional[str],
+                 available: Tuple[str, ...] = ITEM_FIELDS) -> Optional[Tuple[str, ...]]:
+    """
+    Campos pedidos por fields= / exclude= (nomes separados por vírgula), na ordem de available
+
+    Retorna None sem nenhum dos dois (todos os campos). ValueError para nomes desconhecidos.
+    """
+    if fields is None and exclude is None:
+        return None
+    selected = _field_names(fields, available) if fields is not None else set(available)
+    if exclude is not None:
+        selected -= _field_names(exclude, available)
+    return tuple(name for name in available if name in selected)
+
+def summary_projection(fields: Optional[str], exclude: Optional[str]) -> Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]]]:
+    """
+    Campos do resumo e de cada item pedidos por fields= / exclude= em /payments/summary
+
+    Campos dos itens são escritos como itens.<campo> (ex.: exclude=itens.parcelas_mensais);
+    pedir um deles em fields inclui itens com só os campos pedidos. Retorna
+    (campos do resumo, campos dos itens), None para todos.
+    """
+    if fields is None and exclude is None:
+        return None, None
+    item_names = tuple(f'itens.{name}' for name in ITEM_FIELDS)
+    available = SUMMARY_FIELDS + item_names
+    summary_selected = set(SUMMARY_FIELDS)
+    item_selected = set(item_names)
+    if fields is not None:
+        selected = _field_names(fields, available)
+        summary_selected = selected.intersection(SUMMARY_FIELDS)
+        if not selected.isdisjoint(item_names):
+            summary_selected.add('itens')
+            item_selected = selected.intersection(item_names)
+    if exclude is not None:
+        excluded = _field_names(exclude, available)
+        summary_selected -= excluded
+        item_selected -= excluded
+    item_fields = tuple(name for name in ITEM_FIELDS if f'itens.{name}' in item_selected)
+    return (tuple(name for name in SUMMARY_FIELDS if name in summary_selected),
+            None if len(item_fields) == len(ITEM_FIELDS) else item_fields)
+
+def month_summary_response(key: int, entries: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                           totals: Tuple[float, ...], etag: Optional[str] = None) -> Response:
+    """
+    Resposta de /payments/months/{YYYY-MM} (MonthSummary)
+
+    entries são os pares (item, parcela) do mês e totals os totais do mês
+    (storage.month_index.month_totals).
+    """
+    total1, total2, _, _, pendente1, pendente2, _ = totals
+    return json_response({
+        'mes': month_from_key(key),
+        'total_pessoa1': round(total1, 2),
+        'total_pessoa2': round(total2, 2),
+        'valor_pendente_pessoa1': round(pendente1, 2),
+        'valor_pendente_pessoa2': round(pendente2, 2),
+        'parcelas': [
+            {
+                'item_id': item['id'],
+                'nome': item['nome'],
+                'conta_fixa': bool(item.get('conta_fixa', False)),
+                'ativo': bool(item.get('ativo', True)),
+                'valor_pessoa1': float(parcela['valor_pessoa1']),
+                'valor_pessoa2': float(parcela['valor_pessoa2']),
+                'pago_pessoa1': bool(parcela.get('pago_pessoa1', False)),
+                'pago_pessoa2': bool(parcela.get('pago_pessoa2', False))
+            } for item, parcela in entries
+        ]
+    }, etag)
+
+def forecast_response(first: int, totals: List[Tuple[float, ...]], etag: Optional[str] = None) -> Response:
+    """Resposta de /payments/forecast (lista de ForecastMonth) para os totais de cada mês a partir de first"""
+    return json_response([
+        {
+            'mes': month_from_key(key),
+            'total_pessoa1': round(total1, 2),
+            'total_pessoa2': round(total2, 2),
+            'valor_pago_pessoa1': round(pago1, 2),
+            'valor_pago_pessoa2': round(pago2, 2),
+            'valor_pendente_pessoa1': round(pendente1, 2),
+            'valor_pendente_pessoa2': round(pendente2, 2)
+        } for key, (total1, total2, pago1, pago2, pendente1, pendente2, _) in enumerate(totals, first)
+    ], etag)
+
+def annual_report_response(year: int, totals: List[Tuple[float, ...]], etag: Optional[str] = None) -> Response:
+    """Resposta de /payments/reports/{year} (AnnualReport) para os totais dos 12 meses do ano"""
+    meses = []
+    cobrado1 = cobrado2 = pago1_ano = pago2_ano = 0.0
+    for month, (total1, total2, pago1, pago2, _, _, ativos) in enumerate(totals, 1):
+        cobrado1 += total1
+        cobrado2 += total2
+        pago1_ano += pago1
+        pago2_ano += pago2
+        meses.append({
+            'mes': f'{month:02d}/{year}',
+            'valor_cobrado_pessoa1': round(total1, 2),
+            'valor_cobrado_pessoa2': round(total2, 2),
+            'valor_pago_pessoa1': round(pago1, 2),
+            'valor_pago_pessoa2': round(pago2, 2),
+            'itens_ativos': ativos
+        })
+    return json_response({
+        'ano': year,
+        'valor_cobrado_pessoa1': round(cobrado1, 2),
+        'valor_cobrado_pessoa2': round(cobrado2, 2),
+        'valor_pago_pessoa1': round(pago1_ano, 2),
+        'valor_pago_pessoa2': round(pago2_ano, 2),
+        'meses': meses
+    }, etag)
+
+def overdue_response(current: int, overdue: Dict[str, List[Tuple[Dict[str, Any], int, float]]],
+                     etag: Optional[str] = None) -> Response:
+    """Resposta de /payments/overdue (OverdueSummary) para as parcelas atrasadas de cada pessoa"""
+    def installments(entries):
+        return [
+            {'item_id': item['id'], 'nome': item['nome'], 'mes': month_from_key(month), 'valor': float(valor)}
+            for item, month, valor in entries
+        ]
+    return json_response({
+        'mes_atual': month_from_key(current),
+        'total_pessoa1': round(sum((valor for _, _, valor in overdue['pessoa1']), 0.0), 2),
+        'total_pessoa2': round(sum((valor for _, _, valor in overdue['pessoa2']), 0.0), 2),
+        'parcelas_pessoa1': installments(overdue['pessoa1']),
+        'parcelas_pessoa2': installments(overdue['pessoa2'])
+    }, etag)
+
+def _cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    # no-cache: o navegador guarda a resposta, mas revalida com If-None-Match a cada uso
+    return {'ETag': etag, 'Cache-Control': 'no-cache'} if etag else {}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica se o cabeçalho If-None-Match contém o ETag (comparação fraca, como no RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+def not_modified_response(etag: str) -> Response:
+    """304 Not Modified para o ETag atual"""
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+def json_response(content: Any, etag: Optional[str] = None) -> Response:
+    """Resposta com o conteúdo codificado como o FastAPI codifica o response_model"""
+    return Response(
+        content=pydantic_core.to_json(content, inf_nan_mode='null'),
+        media_type='application/json',
+        headers=_cache_headers(etag)
+    )
+
+def payment_items_response(items: List[Dict[str, Any]], etag: Optional[str] = None,
+                           item_fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """Resposta de /payments/items (lista de PaymentItem), só com item_fields se informado"""
+    return json_response(items_content(items, item_fields), etag)
+
+def payment_summary_response(totais: List[int], items: Optional[List[Dict[str, Any]]], etag: Optional[str] = None,
+                             summary_fields: Optional[Tuple[str, ...]] = None,
+                             item_fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """
+    Resposta de /payments/summary (PaymentSummary) para os totais (em centavos) e os itens listados
+
+    Com summary_fields, só esses campos (items pode ser None se itens não está entre eles).
+    """
+    if summary_fields is None:
+        return json_response({**payment_summary_fields(totais), 'itens': items_content(items, item_fields)}, etag)
+    content = payment_summary_fields(totais)
+    return json_response({
+        name: items_content(items, item_fields) if name == 'itens' else content[name]
+        for name in summary_fields
+    }, etag)
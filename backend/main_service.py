@@ -1,13 +1,29 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Header, Path
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import List, Optional
 import logging
 import os
 from datetime import datetime
 
-from models import PaymentItem, PaymentSummary, PaymentItemCreate, PaymentItemUpdate
-from google_sheets_service import GoogleSheetsServiceManager
-from utils import calculate_monthly_payments, validate_percentages
+from models import (
+    PaymentItem, PaymentSummary, PaymentItemCreate, PaymentItemUpdate,
+    InstallmentPaymentRequest, InstallmentPaymentResult, BatchPaymentResponse, MonthSummary, ForecastMonth,
+    AnnualReport, OverdueSummary
+)
+from storage.factory import create_storage_backend
+from async_storage import AsyncStorage
+from storage.items_index import encode_cursor, decode_cursor
+from installments import (
+    installments_by_month, canonical_month_key, iso_month_key, current_month_key, normalize_month
+)
+from json_responses import (
+    payment_items_response, payment_summary_response, etag_matches, not_modified_response,
+    parse_fields, summary_projection, month_summary_response, forecast_response,
+    annual_report_response, overdue_response
+)
+from utils import (
+    validate_percentages, to_payment_item, apply_installment_payment, normalize_fixed_bill_installments
+)
 from dependencies.auth import get_current_user
 
 # Configurar logging
@@ -32,31 +48,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos lidos pelo frontend: versão dos dados e cursor da paginação
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-# Instância global do gerenciador do Google Sheets
-sheets_manager = None
+# Instância global do backend de armazenamento (Google Sheets ou SQLite, ver STORAGE_BACKEND)
+storage_backend = None
 
-def get_sheets_manager():
-    """Dependency para obter o gerenciador do Google Sheets"""
-    global sheets_manager
-    if sheets_manager is None:
+def get_storage_backend():
+    """Dependency para obter o backend de armazenamento configurado"""
+    global storage_backend
+    if storage_backend is None:
         try:
-            sheets_manager = GoogleSheetsServiceManager()
+            storage_backend = create_storage_backend()
         except Exception as e:
-            logger.error(f"Erro ao inicializar Google Sheets Manager: {e}")
-            raise HTTPException(status_code=500, detail="Erro ao conectar com Google Sheets")
-    return sheets_manager
+            logger.error(f"Erro ao inicializar o backend de armazenamento: {e}")
+            raise HTTPException(status_code=500, detail="Erro ao conectar com o armazenamento")
+    return storage_backend
+
+# Fachada assíncrona (pool de threads) sobre o backend de armazenamento
+storage_facade = None
+
+def get_storage():
+    """Dependency para obter o acesso não bloqueante ao armazenamento"""
+    global storage_facade
+    if storage_facade is None:
+        storage_facade = AsyncStorage(get_storage_backend())
+    return storage_facade
 
 @app.on_event("startup")
 async def startup_event():
     """Evento de inicialização da aplicação"""
     logger.info("Iniciando Sistema de Controle de Pagamentos...")
     try:
-        # Testa a conexão com Google Sheets
-        manager = get_sheets_manager()
-        manager.get_all_items()
-        logger.info("Conexão com Google Sheets estabelecida com sucesso")
+        # Testa a conexão com o armazenamento (Google Sheets ou SQLite)
+        await get_storage().get_all_items()
+        logger.info("Conexão com o armazenamento estabelecida com sucesso")
     except Exception as e:
         logger.error(f"Erro na inicialização: {e}")
 
@@ -73,78 +100,233 @@ async def root():
 async def health_check():
     """Verificação de saúde da API"""
     try:
-        manager = get_sheets_manager()
-        manager.get_all_items()
+        await get_storage().get_all_items()
         return {"status": "healthy", "google_sheets": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
 @app.get("/payments/summary", response_model=PaymentSummary)
-async def get_payment_summary(manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)):
+async def get_payment_summary(
+    fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula (campos dos itens como itens.<campo>)"),
+    exclude: Optional[str] = Query(None, description="Campos omitidos da resposta (ex.: itens.parcelas_mensais)"),
+    if_none_match: Optional[str] = Header(None),
+    storage: AsyncStorage = Depends(get_storage)
+):
     """
     Retorna o resumo dos pagamentos mensais
+    
+    fields= / exclude= escolhem os campos; sem itens, os totais vêm direto do
+    índice, sem ler a lista de itens.
+    Envia o ETag da versão dos dados; com If-None-Match igual responde 304.
     """
     try:
-        items = manager.get_all_items()
-        summary = calculate_monthly_payments(items)
-        return summary
+        try:
+            summary_fields, item_fields = summary_projection(fields, exclude)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # ETag lido antes dos itens: uma escrita no meio só deixa o ETag mais antigo que os dados
+        await storage.refresh()
+        etag = storage.data_version.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        
+        if summary_fields is not None and 'itens' not in summary_fields:
+            totais = storage.summary_index.current_totals()
+            if totais is None:
+                totais, _ = storage.summary_index.totals(await storage.get_all_items())
+            return payment_summary_response(totais, None, etag, summary_fields)
+        
+        items = await storage.get_all_items()
+        # Totais mantidos incrementalmente; os itens só são percorridos para montar a lista
+        totais, summary_items = storage.summary_index.summary_parts(items)
+        # JSON montado direto dos itens (response_model continua valendo para o OpenAPI)
+        return payment_summary_response(totais, summary_items, etag, summary_fields, item_fields)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar resumo de pagamentos: {e}")
         raise HTTPException(status_code=500, detail="Erro ao buscar dados de pagamentos")
 
+def _month_param(mes: Optional[str]) -> Optional[int]:
+    """Chave do mês de um parâmetro MM/YYYY opcional; ValueError fora do formato"""
+    if mes is None:
+        return None
+    key = canonical_month_key(mes)
+    if key is None:
+        raise ValueError(f"Mês inválido (use MM/YYYY): {mes}")
+    return key
+
 @app.get("/payments/items", response_model=List[PaymentItem])
-async def get_payment_items(manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)):
+async def get_payment_items(
+    ativo: Optional[bool] = Query(None, description="Só itens ativos (true) ou inativos (false)"),
+    conta_fixa: Optional[bool] = Query(None, description="Só contas fixas (true) ou parceladas (false)"),
+    mes_inicio: Optional[str] = Query(None, description="Itens com parcela a partir deste mês (MM/YYYY)"),
+    mes_fim: Optional[str] = Query(None, description="Itens com parcela até este mês (MM/YYYY)"),
+    nome_prefixo: Optional[str] = Query(None, description="Início do nome (sem diferenciar maiúsculas)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description="Campos de cada item, separados por vírgula"),
+    exclude: Optional[str] = Query(None, description="Campos omitidos de cada item (ex.: parcelas_mensais)"),
+    if_none_match: Optional[str] = Header(None),
+    storage: AsyncStorage = Depends(get_storage)
+):
     """
-    Retorna todos os itens de pagamento
+    Retorna os itens de pagamento
+    
+    Sem parâmetros, todos os itens, como sempre. Com filtros ou limit, os itens
+    em ordem de criação, servidos pelos índices em memória (storage.items_index);
+    se houver mais itens, o cabeçalho X-Next-Cursor traz o cursor da próxima página.
+    fields= / exclude= escolhem os campos de cada item.
+    Envia o ETag da versão dos dados; com If-None-Match igual responde 304.
     """
     try:
-        items = manager.get_all_items()
-        payment_items = []
-        
-        for item in items:
-            # Converte parcelas mensais se existirem
-            parcelas_mensais = None
-            if item.get('parcelas_mensais'):
-                from models import PaymentInstallment
-                parcelas_mensais = [
-                    PaymentInstallment(
-                        mes=p['mes'],
-                        valor_pessoa1=p['valor_pessoa1'],
-                        valor_pessoa2=p['valor_pessoa2'],
-                        pago_pessoa1=p.get('pago_pessoa1', False),
-                        pago_pessoa2=p.get('pago_pessoa2', False)
-                    ) for p in item['parcelas_mensais']
-                ]
-            
-            payment_item = PaymentItem(
-                id=item['id'],
-                nome=item['nome'],
-                valor=item['valor'],
-                parcelas=item['parcelas'],
-                percentual_pessoa1=item['percentual_pessoa1'],
-                percentual_pessoa2=item['percentual_pessoa2'],
-                data_criacao=item.get('data_criacao', ''),
-                ativo=item.get('ativo', True),
-                conta_fixa=item.get('conta_fixa', False),
-                valor_manual_pessoa1=item.get('valor_manual_pessoa1'),
-                valor_manual_pessoa2=item.get('valor_manual_pessoa2'),
-                pago_pessoa1=item.get('pago_pessoa1', False),
-                pago_pessoa2=item.get('pago_pessoa2', False),
-                parcelas_mensais=parcelas_mensais,
-                comecar_mes_atual=item.get('comecar_mes_atual', True)
-            )
-            payment_items.append(payment_item)
-        
-        return payment_items
+        try:
+            item_fields = parse_fields(fields, exclude)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        filtered = any(param is not None for param in (ativo, conta_fixa, mes_inicio, mes_fim, nome_prefixo, limit, cursor))
+        if filtered:
+            try:
+                first = _month_param(mes_inicio)
+                last = _month_param(mes_fim)
+                after = decode_cursor(cursor) if cursor is not None else None
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        await storage.refresh()
+        etag = storage.data_version.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        
+        if not filtered:
+            # Sem parcelas_mensais na resposta, as parcelas nem são copiadas
+            items = await storage.get_all_items(item_fields is None or 'parcelas_mensais' in item_fields)
+            # JSON montado direto dos itens (response_model continua valendo para o OpenAPI)
+            return payment_items_response(items, etag, item_fields)
+        
+        page, next_id = storage.items_index.query(ativo, conta_fixa, first, last, nome_prefixo, limit, after)
+        response = payment_items_response(page, etag, item_fields)
+        if next_id is not None:
+            response.headers['X-Next-Cursor'] = encode_cursor(next_id)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar itens de pagamento: {e}")
         raise HTTPException(status_code=500, detail="Erro ao buscar itens de pagamento")
 
+@app.get("/payments/months/{mes}", response_model=MonthSummary)
+async def get_month_installments(
+    mes: str,
+    if_none_match: Optional[str] = Header(None),
+    storage: AsyncStorage = Depends(get_storage)
+):
+    """
+    Retorna as parcelas de todos os itens em um mês (YYYY-MM), com os totais por pessoa
+    
+    Servido pelo índice mês -> parcelas (storage.month_index), sem percorrer as
+    parcelas dos outros meses. Envia o ETag da versão dos dados; com If-None-Match
+    igual responde 304.
+    """
+    try:
+        key = iso_month_key(mes)
+        if key is None:
+            raise HTTPException(status_code=400, detail=f"Mês inválido (use YYYY-MM): {mes}")
+        
+        await storage.refresh()
+        etag = storage.data_version.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        
+        totals, = storage.month_index.month_totals(key)
+        return month_summary_response(key, storage.month_index.month(key), totals, etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao buscar parcelas do mês {mes}: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao buscar parcelas do mês")
+
+@app.get("/payments/forecast", response_model=List[ForecastMonth])
+async def get_payment_forecast(
+    months: int = Query(12, ge=1, le=120, description="Número de meses a partir do mês atual"),
+    if_none_match: Optional[str] = Header(None),
+    storage: AsyncStorage = Depends(get_storage)
+):
+    """
+    Retorna a projeção dos próximos meses: totais, valores pagos e pendentes por pessoa
+    
+    Os totais de cada mês vêm do índice mês -> parcelas (storage.month_index) e
+    ficam em cache até a próxima escrita que alcance o mês. Envia o ETag da versão
+    dos dados; com If-None-Match igual responde 304.
+    """
+    try:
+        await storage.refresh()
+        etag = storage.data_version.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        
+        first = current_month_key()
+        return forecast_response(first, storage.month_index.month_totals(first, months), etag)
+    except Exception as e:
+        logger.error(f"Erro ao calcular a projeção de pagamentos: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao calcular a projeção de pagamentos")
+
+@app.get("/payments/reports/{year}", response_model=AnnualReport)
+async def get_annual_report(
+    year: int = Path(..., ge=1, le=9999, description="Ano do relatório (ex: 2025)"),
+    if_none_match: Optional[str] = Header(None),
+    storage: AsyncStorage = Depends(get_storage)
+):
+    """
+    Retorna o relatório anual: por mês, valores cobrados e pagos por pessoa e itens ativos
+    
+    Os totais de cada mês ficam em cache no índice mês -> parcelas
+    (storage.month_index); marcar um pagamento descarta só os meses do item
+    alterado, então os meses fechados não são recalculados a cada relatório.
+    Envia o ETag da versão dos dados; com If-None-Match igual responde 304.
+    """
+    try:
+        await storage.refresh()
+        etag = storage.data_version.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        
+        return annual_report_response(year, storage.month_index.month_totals(year * 12 + 1, 12), etag)
+    except Exception as e:
+        logger.error(f"Erro ao montar o relatório de {year}: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao montar o relatório anual")
+
+@app.get("/payments/overdue", response_model=OverdueSummary)
+async def get_overdue_installments(
+    if_none_match: Optional[str] = Header(None),
+    storage: AsyncStorage = Depends(get_storage)
+):
+    """
+    Retorna as parcelas atrasadas (meses anteriores ao atual, não pagas) de cada pessoa, com os totais
+    
+    Servido pelo índice de parcelas não pagas (storage.overdue_index): lê só as
+    parcelas atrasadas, não o histórico. Envia o ETag da versão dos dados; com
+    If-None-Match igual responde 304.
+    """
+    try:
+        await storage.refresh()
+        etag = storage.data_version.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        
+        current = current_month_key()
+        return overdue_response(current, storage.overdue_index.overdue(current), etag)
+    except Exception as e:
+        logger.error(f"Erro ao buscar parcelas atrasadas: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao buscar parcelas atrasadas")
+
 @app.post("/payments/items", response_model=PaymentItem)
 async def create_payment_item(
     item: PaymentItemCreate,
     current_user: dict = Depends(get_current_user),
-    manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Cria um novo item de pagamento
@@ -165,28 +347,40 @@ async def create_payment_item(
             raise HTTPException(status_code=400, detail="O número de parcelas deve ser maior que zero")
         
         # Gera as parcelas mensais
-        from utils import generate_monthly_installments
-        parcelas_mensais = generate_monthly_installments(
-            valor_total=item.valor,
-            parcelas=item.parcelas,
-            percentual_pessoa1=item.percentual_pessoa1,
-            percentual_pessoa2=item.percentual_pessoa2,
-            comecar_mes_atual=item.comecar_mes_atual,
-            conta_fixa=item.conta_fixa,
-            valor_manual_pessoa1=item.valor_manual_pessoa1,
-            valor_manual_pessoa2=item.valor_manual_pessoa2
-        )
-        
-        # Converte para formato de dicionário para armazenamento
-        parcelas_mensais_dict = [
-            {
-                'mes': p.mes,
-                'valor_pessoa1': p.valor_pessoa1,
-                'valor_pessoa2': p.valor_pessoa2,
-                'pago_pessoa1': p.pago_pessoa1,
-                'pago_pessoa2': p.pago_pessoa2
-            } for p in parcelas_mensais
-        ]
+        from utils import generate_monthly_installments, generate_recurring_installments
+        if item.conta_fixa:
+            # Conta fixa: grava só a regra de recorrência (sem data de fim)
+            parcelas_mensais_dict = generate_recurring_installments(
+                valor_total=item.valor,
+                percentual_pessoa1=item.percentual_pessoa1,
+                percentual_pessoa2=item.percentual_pessoa2,
+                comecar_mes_atual=item.comecar_mes_atual,
+                valor_manual_pessoa1=item.valor_manual_pessoa1,
+                valor_manual_pessoa2=item.valor_manual_pessoa2
+            )
+            parcelas_mensais = parcelas_mensais_dict.to_models()
+        else:
+            parcelas_mensais = generate_monthly_installments(
+                valor_total=item.valor,
+                parcelas=item.parcelas,
+                percentual_pessoa1=item.percentual_pessoa1,
+                percentual_pessoa2=item.percentual_pessoa2,
+                comecar_mes_atual=item.comecar_mes_atual,
+                conta_fixa=item.conta_fixa,
+                valor_manual_pessoa1=item.valor_manual_pessoa1,
+                valor_manual_pessoa2=item.valor_manual_pessoa2
+            )
+            
+            # Converte para formato de dicionário para armazenamento
+            parcelas_mensais_dict = [
+                {
+                    'mes': p.mes,
+                    'valor_pessoa1': p.valor_pessoa1,
+                    'valor_pessoa2': p.valor_pessoa2,
+                    'pago_pessoa1': p.pago_pessoa1,
+                    'pago_pessoa2': p.pago_pessoa2
+                } for p in parcelas_mensais
+            ]
         
         # Prepara os dados para inserção
         item_data = {
@@ -207,7 +401,7 @@ async def create_payment_item(
         }
         
         # Adiciona o item na planilha
-        item_id = manager.add_item(item_data)
+        item_id = await storage.add_item(item_data)
         
         # Retorna o item criado
         created_item = PaymentItem(
@@ -242,24 +436,12 @@ async def update_payment_item(
     item_id: str,
     item_update: PaymentItemUpdate,
     current_user: dict = Depends(get_current_user),
-    manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Atualiza um item de pagamento existente
     """
     try:
-        # Busca o item atual
-        items = manager.get_all_items()
-        current_item = None
-        
-        for item in items:
-            if item['id'] == item_id:
-                current_item = item
-                break
-        
-        if not current_item:
-            raise HTTPException(status_code=404, detail="Item não encontrado")
-        
         # Prepara os dados atualizados
         update_data = {}
         
@@ -290,15 +472,21 @@ async def update_payment_item(
         if item_update.pago_pessoa2 is not None:
             update_data['pago_pessoa2'] = item_update.pago_pessoa2
         if item_update.parcelas_mensais is not None:
+            # Meses no formato MM/YYYY (os índices e o SQLite dependem dele)
+            meses = [normalize_month(p.mes) for p in item_update.parcelas_mensais]
+            for mes, p in zip(meses, item_update.parcelas_mensais):
+                if mes is None:
+                    raise HTTPException(status_code=422, detail=f"Mês inválido na parcela (use MM/YYYY): {p.mes}")
+            
             # Converte parcelas mensais para formato de dicionário
             parcelas_mensais_dict = [
                 {
-                    'mes': p.mes,
+                    'mes': mes,
                     'valor_pessoa1': p.valor_pessoa1,
                     'valor_pessoa2': p.valor_pessoa2,
                     'pago_pessoa1': p.pago_pessoa1,
                     'pago_pessoa2': p.pago_pessoa2
-                } for p in item_update.parcelas_mensais
+                } for mes, p in zip(meses, item_update.parcelas_mensais)
             ]
             update_data['parcelas_mensais'] = parcelas_mensais_dict
         
@@ -310,56 +498,19 @@ async def update_payment_item(
                     detail="A soma dos percentuais deve ser igual a 100%"
                 )
         
-        # Atualiza o item
-        success = manager.update_item(item_id, update_data)
+        def apply_update(current_item: dict):
+            current_item.update(update_data)
+            normalize_fixed_bill_installments(current_item)
         
-        if not success:
-            raise HTTPException(status_code=404, detail="Item não encontrado")
-        
-        # Busca o item atualizado
-        updated_items = manager.get_all_items()
-        updated_item = None
-        
-        for item in updated_items:
-            if item['id'] == item_id:
-                updated_item = item
-                break
+        # Lê o item, aplica as alterações e grava uma única vez (uma leitura e uma escrita),
+        # sem outra escrita entre a leitura e a gravação
+        updated_item = await storage.modify_item(item_id, apply_update)
         
         if not updated_item:
-            raise HTTPException(status_code=404, detail="Item não encontrado após atualização")
-        
-        # Converte parcelas mensais se existirem
-        parcelas_mensais = None
-        if updated_item.get('parcelas_mensais'):
-            from models import PaymentInstallment
-            parcelas_mensais = [
-                PaymentInstallment(
-                    mes=p['mes'],
-                    valor_pessoa1=p['valor_pessoa1'],
-                    valor_pessoa2=p['valor_pessoa2'],
-                    pago_pessoa1=p.get('pago_pessoa1', False),
-                    pago_pessoa2=p.get('pago_pessoa2', False)
-                ) for p in updated_item['parcelas_mensais']
-            ]
+            raise HTTPException(status_code=404, detail="Item não encontrado")
         
-        # Retorna o item atualizado
-        result_item = PaymentItem(
-            id=updated_item['id'],
-            nome=updated_item['nome'],
-            valor=updated_item['valor'],
-            parcelas=updated_item['parcelas'],
-            percentual_pessoa1=updated_item['percentual_pessoa1'],
-            percentual_pessoa2=updated_item['percentual_pessoa2'],
-            data_criacao=updated_item.get('data_criacao', ''),
-            ativo=updated_item.get('ativo', True),
-            conta_fixa=updated_item.get('conta_fixa', False),
-            valor_manual_pessoa1=updated_item.get('valor_manual_pessoa1'),
-            valor_manual_pessoa2=updated_item.get('valor_manual_pessoa2'),
-            pago_pessoa1=updated_item.get('pago_pessoa1', False),
-            pago_pessoa2=updated_item.get('pago_pessoa2', False),
-            parcelas_mensais=parcelas_mensais,
-            comecar_mes_atual=updated_item.get('comecar_mes_atual', True)
-        )
+        # Monta a resposta a partir do item gravado, sem reler a planilha
+        result_item = to_payment_item(updated_item)
         
         logger.info(f"Item de pagamento atualizado: {item_id}")
         return result_item
@@ -376,68 +527,44 @@ class PaymentRequest(BaseModel):
     mes: str
     pessoa: str
 
+def _installment_payment(item_id: str, mes: str, pessoa: str):
+    """
+    Alteração de modify_item que marca a parcela do mês como paga pela pessoa
+    
+    Inativa o item se todas as parcelas foram pagas. Roda no pool de threads do
+    backend, sob o lock dele; os erros saem como HTTPException (404/400).
+    """
+    def pay(current_item: dict):
+        logger.info(f"Parcelas disponíveis: {len(current_item.get('parcelas_mensais') or [])}")
+        try:
+            normalize_fixed_bill_installments(current_item)
+            if apply_installment_payment(current_item, mes, pessoa):
+                logger.info(f"Item {item_id} marcado como inativo - todas as parcelas foram pagas")
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return pay
+
 @app.post("/payments/items/{item_id}/pay")
 async def mark_payment(
     item_id: str,
     payment_request: PaymentRequest,
-    manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Marca uma parcela específica como paga
     """
     try:
-        # Busca o item atual
-        items = manager.get_all_items()
-        current_item = None
-        
-        for item in items:
-            if item['id'] == item_id:
-                current_item = item
-                break
-        
-        if not current_item:
-            raise HTTPException(status_code=404, detail="Item não encontrado")
-        
-        # Verifica se tem parcelas mensais
-        parcelas_mensais = current_item.get('parcelas_mensais', [])
-        if not parcelas_mensais:
-            raise HTTPException(status_code=400, detail="Item não possui parcelas mensais")
-        
-        # Encontra a parcela do mês especificado
         mes = payment_request.mes
         pessoa = payment_request.pessoa
         
-        parcela_encontrada = False
-        for parcela in parcelas_mensais:
-            if parcela['mes'] == mes:
-                if pessoa == "pessoa1":
-                    parcela['pago_pessoa1'] = True
-                elif pessoa == "pessoa2":
-                    parcela['pago_pessoa2'] = True
-                else:
-                    raise HTTPException(status_code=400, detail="Pessoa deve ser 'pessoa1' ou 'pessoa2'")
-                parcela_encontrada = True
-                break
-        
-        if not parcela_encontrada:
-            raise HTTPException(status_code=404, detail=f"Parcela do mês {mes} não encontrada")
-        
-        # Verifica se todas as parcelas foram pagas
-        if not current_item.get('conta_fixa', False):  # Só para contas parceladas
-            total_parcelas_pagas = sum(1 for p in parcelas_mensais if p.get('pago_pessoa1', False) and p.get('pago_pessoa2', False))
-            if total_parcelas_pagas == len(parcelas_mensais):
-                # Todas as parcelas foram pagas, marcar como inativo
-                update_data = {'parcelas_mensais': parcelas_mensais, 'ativo': False}
-                logger.info(f"Item {item_id} marcado como inativo - todas as parcelas foram pagas")
-            else:
-                update_data = {'parcelas_mensais': parcelas_mensais}
-        else:
-            update_data = {'parcelas_mensais': parcelas_mensais}
-        
-        success = manager.update_item(item_id, update_data)
+        # Lê o item, marca a parcela e grava numa única operação do backend
+        saved_item = await storage.modify_item(item_id, _installment_payment(item_id, mes, pessoa))
         
-        if not success:
-            raise HTTPException(status_code=500, detail="Erro ao atualizar parcela")
+        if not saved_item:
+            raise HTTPException(status_code=404, detail="Item não encontrado")
         
         logger.info(f"Parcela {mes} marcada como paga para {pessoa} no item {item_id}")
         return {"message": f"Parcela {mes} marcada como paga para {pessoa}"}
@@ -454,7 +581,7 @@ async def mark_installment_paid(
     mes: str = Query(..., description="Mês da parcela no formato MM/YYYY (ex: 11/2025)"),
     pessoa: str = Query(..., description="Pessoa que está pagando (pessoa1 ou pessoa2)"),
     current_user: dict = Depends(get_current_user),
-    manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Marca uma parcela específica como paga (rota compatível com frontend)
@@ -463,59 +590,12 @@ async def mark_installment_paid(
         # Log para debug - verificar o mês recebido
         logger.info(f"Marcando parcela como paga - Item: {item_id}, Mês: {mes}, Pessoa: {pessoa}")
         
-        # Busca o item atual
-        items = manager.get_all_items()
-        current_item = None
+        # Lê o item, marca a parcela e grava numa única operação do backend
+        saved_item = await storage.modify_item(item_id, _installment_payment(item_id, mes, pessoa))
         
-        for item in items:
-            if item['id'] == item_id:
-                current_item = item
-                break
-        
-        if not current_item:
+        if not saved_item:
             raise HTTPException(status_code=404, detail="Item não encontrado")
         
-        # Verifica se tem parcelas mensais
-        parcelas_mensais = current_item.get('parcelas_mensais', [])
-        if not parcelas_mensais:
-            raise HTTPException(status_code=400, detail="Item não possui parcelas mensais")
-        
-        # Log para debug - verificar parcelas disponíveis
-        logger.info(f"Parcelas disponíveis: {[p.get('mes') for p in parcelas_mensais]}")
-        
-        # Encontra a parcela do mês especificado
-        parcela_encontrada = False
-        for parcela in parcelas_mensais:
-            if parcela['mes'] == mes:
-                if pessoa == "pessoa1":
-                    parcela['pago_pessoa1'] = True
-                elif pessoa == "pessoa2":
-                    parcela['pago_pessoa2'] = True
-                else:
-                    raise HTTPException(status_code=400, detail="Pessoa deve ser 'pessoa1' ou 'pessoa2'")
-                parcela_encontrada = True
-                break
-        
-        if not parcela_encontrada:
-            raise HTTPException(status_code=404, detail=f"Parcela do mês {mes} não encontrada")
-        
-        # Verifica se todas as parcelas foram pagas
-        if not current_item.get('conta_fixa', False):  # Só para contas parceladas
-            total_parcelas_pagas = sum(1 for p in parcelas_mensais if p.get('pago_pessoa1', False) and p.get('pago_pessoa2', False))
-            if total_parcelas_pagas == len(parcelas_mensais):
-                # Todas as parcelas foram pagas, marcar como inativo
-                update_data = {'parcelas_mensais': parcelas_mensais, 'ativo': False}
-                logger.info(f"Item {item_id} marcado como inativo - todas as parcelas foram pagas")
-            else:
-                update_data = {'parcelas_mensais': parcelas_mensais}
-        else:
-            update_data = {'parcelas_mensais': parcelas_mensais}
-        
-        success = manager.update_item(item_id, update_data)
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Erro ao atualizar parcela")
-        
         logger.info(f"Parcela {mes} marcada como paga para {pessoa} no item {item_id}")
         return {"message": f"Parcela {mes} marcada como paga para {pessoa}"}
         
@@ -525,17 +605,93 @@ async def mark_installment_paid(
         logger.error(f"Erro ao marcar parcela como paga: {e}")
         raise HTTPException(status_code=500, detail="Erro ao marcar parcela como paga")
 
+@app.post("/payments/installments/pay-batch", response_model=BatchPaymentResponse)
+async def mark_installments_paid_batch(
+    pagamentos: List[InstallmentPaymentRequest],
+    current_user: dict = Depends(get_current_user),
+    storage: AsyncStorage = Depends(get_storage)
+):
+    """
+    Marca várias parcelas (item, mês, pessoa) como pagas de uma só vez
+    
+    Todos os itens envolvidos são lidos em uma única leitura e as alterações
+    são gravadas em uma única escrita, numa só operação do backend (sem outra
+    escrita entre a leitura e a gravação). O resultado é informado por parcela.
+    """
+    try:
+        item_ids = list(dict.fromkeys(p.item_id for p in pagamentos))
+        resultados = []
+        
+        def pay_all(items: dict) -> set:
+            # Índice mês -> parcelas de cada item, montado uma vez por item (installments_by_month)
+            parcelas_por_mes = {}
+            for pagamento in pagamentos:
+                resultado = InstallmentPaymentResult(
+                    item_id=pagamento.item_id,
+                    mes=pagamento.mes,
+                    pessoa=pagamento.pessoa,
+                    sucesso=False,
+                    mensagem=""
+                )
+                current_item = items.get(pagamento.item_id)
+                
+                if not current_item:
+                    resultado.mensagem = "Item não encontrado"
+                else:
+                    # Marca a parcela como paga em memória (inativa o item se todas foram pagas)
+                    try:
+                        if pagamento.item_id not in parcelas_por_mes:
+                            normalize_fixed_bill_installments(current_item)
+                            parcelas = current_item.get('parcelas_mensais')
+                            parcelas_por_mes[pagamento.item_id] = (
+                                installments_by_month(parcelas) if isinstance(parcelas, list) else None
+                            )
+                        resultado.item_inativado = apply_installment_payment(
+                            current_item, pagamento.mes, pagamento.pessoa, parcelas_por_mes[pagamento.item_id]
+                        )
+                        resultado.sucesso = True
+                        resultado.mensagem = f"Parcela {pagamento.mes} marcada como paga para {pagamento.pessoa}"
+                        if resultado.item_inativado:
+                            logger.info(f"Item {pagamento.item_id} marcado como inativo - todas as parcelas foram pagas")
+                    except (LookupError, ValueError) as e:
+                        resultado.mensagem = str(e)
+                
+                resultados.append(resultado)
+            
+            # Grava só os itens alterados
+            return {r.item_id for r in resultados if r.sucesso}
+        
+        saved_items = await storage.modify_items(item_ids, pay_all)
+        
+        for resultado in resultados:
+            if resultado.sucesso and resultado.item_id not in saved_items:
+                resultado.sucesso = False
+                resultado.item_inativado = False
+                resultado.mensagem = "Item não encontrado"
+        
+        total_pagos = sum(1 for r in resultados if r.sucesso)
+        logger.info(f"Pagamento em lote: {total_pagos} de {len(resultados)} parcelas marcadas como pagas")
+        return BatchPaymentResponse(
+            total_pagos=total_pagos,
+            total_erros=len(resultados) - total_pagos,
+            resultados=resultados
+        )
+        
+    except Exception as e:
+        logger.error(f"Erro ao marcar parcelas em lote: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao marcar parcelas como pagas")
+
 @app.delete("/payments/items/{item_id}")
 async def delete_payment_item(
     item_id: str,
     current_user: dict = Depends(get_current_user),
-    manager: GoogleSheetsServiceManager = Depends(get_sheets_manager)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Remove um item de pagamento (soft delete)
     """
     try:
-        success = manager.delete_item(item_id)
+        success = await storage.delete_item(item_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="Item não encontrado")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Migração única das parcelas mensais para a aba dedicada (layout 'tab')
+
+Copia as parcelas guardadas como JSON na coluna N da aba principal para a aba
+de parcelas (uma linha por parcela) e limpa a coluna N. Depois de executar,
+configure INSTALLMENTS_LAYOUT=tab e reinicie o backend.
+
+Uso (a partir de backend/):
+    python migrate_parcelas.py [--keep-json]
+"""
+import sys
+import argparse
+
+from google_sheets_service import GoogleSheetsServiceManager
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra as parcelas mensais da coluna N para a aba de parcelas")
+    parser.add_argument('--keep-json', action='store_true', help="mantém o JSON na coluna N após a migração")
+    args = parser.parse_args()
+    
+    try:
+        manager = GoogleSheetsServiceManager()
+        total = manager.migrate_installments_to_tab(keep_json=args.keep_json)
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        return 1
+    
+    print(f"✅ {total} parcelas migradas para a aba '{manager.installments_sheet_name}'")
+    print("📝 Configure INSTALLMENTS_LAYOUT=tab no .env e reinicie o backend")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -38,6 +38,62 @@ class PaymentSummary(BaseModel):
     mes_atual: str  # Mês atual no formato MM/YYYY
     itens: List[PaymentItem]
 
+class MonthInstallment(BaseModel):
+    item_id: str
+    nome: str
+    conta_fixa: bool
+    ativo: bool
+    valor_pessoa1: float
+    valor_pessoa2: float
+    pago_pessoa1: bool
+    pago_pessoa2: bool
+
+class MonthSummary(BaseModel):
+    mes: str  # Formato MM/YYYY
+    total_pessoa1: float
+    total_pessoa2: float
+    valor_pendente_pessoa1: float  # Parcelas do mês ainda não pagas (itens ativos)
+    valor_pendente_pessoa2: float  # Parcelas do mês ainda não pagas (itens ativos)
+    parcelas: List[MonthInstallment]
+
+class ForecastMonth(BaseModel):
+    mes: str  # Formato MM/YYYY
+    total_pessoa1: float  # Pago + pendente
+    total_pessoa2: float  # Pago + pendente
+    valor_pago_pessoa1: float
+    valor_pago_pessoa2: float
+    valor_pendente_pessoa1: float  # Parcelas ainda não pagas (itens ativos)
+    valor_pendente_pessoa2: float  # Parcelas ainda não pagas (itens ativos)
+
+class ReportMonth(BaseModel):
+    mes: str  # Formato MM/YYYY
+    valor_cobrado_pessoa1: float  # Pago + pendente dos itens ativos
+    valor_cobrado_pessoa2: float  # Pago + pendente dos itens ativos
+    valor_pago_pessoa1: float
+    valor_pago_pessoa2: float
+    itens_ativos: int  # Itens ativos com parcela no mês
+
+class AnnualReport(BaseModel):
+    ano: int
+    valor_cobrado_pessoa1: float
+    valor_cobrado_pessoa2: float
+    valor_pago_pessoa1: float
+    valor_pago_pessoa2: float
+    meses: List[ReportMonth]
+
+class OverdueInstallment(BaseModel):
+    item_id: str
+    nome: str
+    mes: str  # Formato MM/YYYY
+    valor: float
+
+class OverdueSummary(BaseModel):
+    mes_atual: str  # Parcelas de meses anteriores a este estão atrasadas
+    total_pessoa1: float
+    total_pessoa2: float
+    parcelas_pessoa1: List[OverdueInstallment]  # Em ordem de mês
+    parcelas_pessoa2: List[OverdueInstallment]  # Em ordem de mês
+
 class PaymentItemCreate(BaseModel):
     nome: str
     valor: float
@@ -62,3 +118,21 @@ class PaymentItemUpdate(BaseModel):
     pago_pessoa1: Optional[bool] = None  # DEPRECATED
     pago_pessoa2: Optional[bool] = None  # DEPRECATED
     parcelas_mensais: Optional[List[PaymentInstallment]] = None  # Para atualizar parcelas específicas
+
+class InstallmentPaymentRequest(BaseModel):
+    item_id: str
+    mes: str  # Formato MM/YYYY
+    pessoa: str  # pessoa1 ou pessoa2
+
+class InstallmentPaymentResult(BaseModel):
+    item_id: str
+    mes: str
+    pessoa: str
+    sucesso: bool
+    mensagem: str
+    item_inativado: bool = False  # Se o item foi inativado por ter todas as parcelas pagas
+
+class BatchPaymentResponse(BaseModel):
+    total_pagos: int
+    total_erros: int
+    resultados: List[InstallmentPaymentResult]
@@ -0,0 +1,199 @@
+"""
+Decodificação das linhas da aba principal da planilha em itens
+
+O RowDecoder é montado uma vez a partir da linha de cabeçalhos: cada campo do
+item é associado à coluna com o seu cabeçalho (SHEET_HEADERS) e a um conversor.
+As células ausentes no final da linha (a API omite as vazias) recebem o valor
+padrão do campo. O mesmo mapeamento cabeçalho -> coluna monta as linhas
+gravadas (encode), então leitura e escrita seguem a ordem real das colunas.
+
+O JSON das parcelas mensais é lido com orjson quando instalado (opcional,
+`pip install orjson`); sem ele, com o json da biblioteca padrão. Linhas com
+valores inválidos não são descartadas em silêncio: decode_rows as devolve com o
+número da linha e o motivo, e registra um aviso no log.
+"""
+import json
+import logging
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from installments import installments_from_json
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele o json da biblioteca padrão é usado
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def loads_json(text: str) -> Any:
+    """json.loads, com orjson quando disponível"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson recusa alguns textos aceitos pelo json (NaN, inteiros muito grandes)
+            pass
+    return json.loads(text)
+
+# Conversores das células. O texto gravado por str(bool) ('True'/'False') é
+# resolvido sem lower().
+def _text(cell: str) -> str:
+    return cell
+
+def _bool(cell: str) -> bool:
+    return cell == 'True' or (cell != 'False' and cell.lower() == 'true')
+
+def _float_or_zero(cell: str) -> float:
+    return float(cell) if cell else 0.0
+
+def _int_or_one(cell: str) -> int:
+    return int(cell) if cell else 1
+
+def _optional_float(cell: str) -> Optional[float]:
+    return float(cell) if cell and cell != 'None' else None
+
+# Campos do item na ordem das colunas de SHEET_HEADERS: (chave, conversor, valor sem a célula).
+# parcelas_mensais é decodificado à parte (decode_installments).
+ITEM_FIELDS: Tuple[Tuple[str, Callable[[str], Any], Any], ...] = (
+    ('id', _text, ''),
+    ('nome', _text, ''),
+    ('valor', _float_or_zero, 0.0),
+    ('parcelas', _int_or_one, 1),
+    ('percentual_pessoa1', _float_or_zero, 0.0),
+    ('percentual_pessoa2', _float_or_zero, 0.0),
+    ('data_criacao', _text, ''),
+    ('ativo', _bool, True),
+    ('conta_fixa', _bool, False),
+    ('valor_manual_pessoa1', _optional_float, None),
+    ('valor_manual_pessoa2', _optional_float, None),
+    ('pago_pessoa1', _bool, False),
+    ('pago_pessoa2', _bool, False),
+    ('parcelas_mensais', _text, None),
+    ('comecar_mes_atual', _bool, True)
+)
+
+# Campos sem os quais a linha é ignorada (até a data de criação, colunas A:G)
+REQUIRED_FIELDS = ('id', 'nome', 'valor', 'parcelas', 'percentual_pessoa1', 'percentual_pessoa2', 'data_criacao')
+
+def _normalize_header(header: Any) -> str:
+    return str(header).strip().casefold()
+
+class MalformedRowError(ValueError):
+    """Linha da planilha com valor que não pode ser convertido"""
+
+class RowDecoder:
+    def __init__(self, headers: Optional[List[str]], default_headers: List[str], decode_installments: bool = True):
+        """
+        headers é a linha 1 da planilha; default_headers (SHEET_HEADERS) dá o
+        cabeçalho de cada campo de ITEM_FIELDS e a posição usada quando o
+        cabeçalho não é encontrado.
+        """
+        positions = {}
+        for index, header in enumerate(headers or []):
+            positions.setdefault(_normalize_header(header), index)
+
+        self.columns: Dict[str, int] = {}
+        missing = []
+        for index, (key, _, _) in enumerate(ITEM_FIELDS):
+            position = positions.get(_normalize_header(default_headers[index]))
+            if position is None:
+                position = index
+                if headers:
+                    missing.append(default_headers[index])
+            self.columns[key] = position
+        if missing:
+            logger.warning(f"Cabeçalhos não encontrados na planilha, usando a posição padrão: {', '.join(missing)}")
+
+        self.decode_installments = decode_installments
+        self.min_cells = max(self.columns[key] for key in REQUIRED_FIELDS) + 1
+        self.width = max(self.columns.values()) + 1
+        self._installments_column = self.columns['parcelas_mensais']
+        # (chave, coluna, conversor, valor sem a célula) de cada campo, na ordem de ITEM_FIELDS;
+        # parcelas_mensais nunca é lido aqui (coluna além da linha) e vira uma lista nova em decode_fields
+        self._fields = [(key, self.columns[key] if key != 'parcelas_mensais' else self.width, converter, default)
+                        for key, converter, default in ITEM_FIELDS]
+
+    def decode_fields(self, row: List[str]) -> Dict[str, Any]:
+        """Campos do item na linha, sem decodificar as parcelas (parcelas_mensais vazio)"""
+        cells = len(row)
+        item = {key: converter(row[position]) if position < cells else default
+                for key, position, converter, default in self._fields}
+        item['parcelas_mensais'] = []
+        return item
+
+    def encode(self, cells: Dict[str, str]) -> List[str]:
+        """
+        Linha a gravar com o texto de cada campo (chaves de ITEM_FIELDS) na coluna do seu cabeçalho
+
+        Colunas sem campo ficam vazias.
+        """
+        row = [''] * self.width
+        for key, cell in cells.items():
+            row[self.columns[key]] = cell
+        return row
+
+    def _decode_installments(self, row: List[str], item: Dict[str, Any]):
+        position = self._installments_column
+        cell = row[position] if position < len(row) else ''
+        if cell:
+            try:
+                item['parcelas_mensais'] = installments_from_json(loads_json(cell))
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                raise MalformedRowError(f"parcelas mensais inválidas: {e}") from e
+
+    def decode(self, row: List[str]) -> Dict[str, Any]:
+        """
+        Decodifica uma linha em item
+
+        Raises:
+            MalformedRowError: Se algum valor (número, JSON das parcelas) é inválido
+        """
+        try:
+            item = self.decode_fields(row)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise MalformedRowError(f"valor inválido: {e}") from e
+        if self.decode_installments:
+            self._decode_installments(row, item)
+        return item
+
+    def decode_rows(self, rows: List[List[str]],
+                    first_row_number: int = 2) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Decodifica as linhas da planilha
+
+        Retorna ([(número da linha, item)], linhas inválidas). Linhas vazias são
+        ignoradas. Cada linha inválida é um dicionário {'linha', 'id', 'erro'};
+        se só o JSON das parcelas é inválido, o item também é devolvido, com as
+        parcelas vazias.
+        """
+        malformed = []
+        decoded = []
+        append = decoded.append
+        decode_fields = self.decode_fields
+        min_cells = self.min_cells
+        installments_column = self._installments_column if self.decode_installments else None
+
+        for row_number, row in enumerate(rows, first_row_number):
+            cells = len(row)
+            if cells < min_cells:
+                if any(row):
+                    self._report(malformed, row_number, row, "linha incompleta")
+                continue
+            try:
+                item = decode_fields(row)
+            except (ValueError, TypeError, AttributeError) as e:
+                self._report(malformed, row_number, row, f"valor inválido: {e}")
+                continue
+            if installments_column is not None and installments_column < cells and row[installments_column]:
+                try:
+                    item['parcelas_mensais'] = installments_from_json(loads_json(row[installments_column]))
+                except (ValueError, TypeError, KeyError, AttributeError) as e:
+                    self._report(malformed, row_number, row, f"parcelas mensais inválidas: {e}")
+            append((row_number, item))
+
+        return decoded, malformed
+
+    def _report(self, malformed: List[Dict[str, Any]], row_number: int, row: List[str], error: str):
+        item_id = row[self.columns['id']] if len(row) > self.columns['id'] else ''
+        malformed.append({'linha': row_number, 'id': item_id, 'erro': error})
+        logger.warning(f"Linha {row_number} da planilha (item {item_id or '?'}) inválida: {error}")
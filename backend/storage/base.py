@@ -0,0 +1,120 @@
+"""
+Interface comum dos backends de armazenamento dos itens de pagamento
+"""
+from typing import List, Dict, Any, Optional, Protocol, Callable, Iterable
+
+from installments import PACKED_INSTALLMENTS
+
+class StorageBackend(Protocol):
+    """
+    Operações que um backend de armazenamento precisa oferecer
+
+    Os itens são dicionários no formato usado em toda a API (ver
+    utils.to_payment_item). Implementações: GoogleSheetsServiceManager
+    (google_sheets_service.py) e SQLiteStorageManager (storage/sqlite_backend.py).
+
+    Nas leituras (get_all_items, query_items) parcelas_mensais pode vir como
+    installments.CompactInstallments, somente leitura; load_items devolve listas
+    de dicionários, que podem ser alteradas e gravadas com save_items. Nas contas
+    fixas parcelas_mensais pode ser uma installments.RecurringInstallments (regra
+    de recorrência), que os backends gravam como regra.
+    """
+
+    def get_all_items(self, include_installments: bool = True) -> List[Dict[str, Any]]:
+        """Retorna todos os itens, na ordem de criação"""
+        ...
+
+    def refresh(self):
+        """Recarrega os itens se a cópia em memória expirou, avisando os listeners (sem cópia: nada a fazer)"""
+        ...
+
+    def query_items(self, ativo: Optional[bool] = None, conta_fixa: Optional[bool] = None,
+                    mes: Optional[str] = None, include_installments: bool = True) -> List[Dict[str, Any]]:
+        """Retorna os itens que atendem aos filtros (mes no formato MM/YYYY: itens com parcela no mês)"""
+        ...
+
+    def load_items(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Carrega os itens informados para uma operação de escrita"""
+        ...
+
+    def load_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Carrega um único item para uma operação de escrita"""
+        ...
+
+    def save_items(self, items: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Grava os itens completos em uma única operação; retorna os itens gravados"""
+        ...
+
+    def save_item(self, item_id: str, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Grava um único item; retorna None se ele não existe"""
+        ...
+
+    def modify_items(self, item_ids: List[str],
+                     modify: Callable[[Dict[str, Dict[str, Any]]], Optional[Iterable[str]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Carrega os itens, aplica modify e grava o resultado, sem outra escrita no meio
+
+        É o caminho das operações de leitura-alteração-gravação (marcar pagamento,
+        editar item): chamar load_items e save_items separadamente deixa que uma
+        escrita concorrente seja sobrescrita. modify recebe {id: item} só com os
+        itens existentes e os altera no lugar; retorna os IDs a gravar (None:
+        todos). Exceções de modify interrompem a operação sem gravar nada.
+        Retorna os itens gravados.
+        """
+        ...
+
+    def modify_item(self, item_id: str, modify: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """modify_items para um item; retorna None (sem chamar modify) se ele não existe"""
+        ...
+
+    def add_item(self, item_data: Dict[str, Any]) -> str:
+        """Adiciona um item e retorna seu ID (usa item_data['id'] se informado)"""
+        ...
+
+    def update_item(self, item_id: str, item_data: Dict[str, Any]) -> bool:
+        """Atualiza campos de um item; retorna False se ele não existe"""
+        ...
+
+    def delete_item(self, item_id: str) -> bool:
+        """Remove um item; retorna False se ele não existe"""
+        ...
+
+    def add_listener(self, listener: 'StorageListener'):
+        """Registra um listener que acompanha as alterações dos itens (ver StorageListener)"""
+        ...
+
+def filter_items(items: List[Dict[str, Any]], ativo: Optional[bool] = None,
+                 conta_fixa: Optional[bool] = None, mes: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Aplica os filtros de query_items a uma lista de itens em memória"""
+    result = []
+    for item in items:
+        if ativo is not None and item.get('ativo', True) != ativo:
+            continue
+        if conta_fixa is not None and item.get('conta_fixa', False) != conta_fixa:
+            continue
+        if mes is not None and not _has_month(item.get('parcelas_mensais'), mes):
+            continue
+        result.append(item)
+    return result
+
+def _has_month(parcelas_mensais, mes: str) -> bool:
+    if isinstance(parcelas_mensais, PACKED_INSTALLMENTS):
+        return parcelas_mensais.has_month(mes)
+    return any(p['mes'] == mes for p in parcelas_mensais or [])
+
+class StorageListener:
+    """
+    Recebe as alterações de um backend para manter índices/agregados em memória
+
+    Registrado com add_listener; os métodos são chamados pelo backend (sob o
+    seu lock, na ordem das escritas) e não devem alterar os itens recebidos.
+    """
+
+    def on_load(self, items: List[Dict[str, Any]]):
+        """Conjunto completo de itens (carga inicial ou recarga do armazenamento)"""
+
+    def on_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        """Item adicionado (old_item None) ou alterado"""
+
+    def on_delete(self, old_item: Dict[str, Any]):
+        """Item removido"""
@@ -0,0 +1,79 @@
+"""
+Versão dos dados, para ETag / If-None-Match nas rotas de leitura
+
+O DataVersion avança a cada escrita no backend e a cada recarga em que o
+conteúdo lido mudou (alteração feita direto na planilha, por exemplo). As
+rotas de leitura enviam a versão no ETag e respondem 304 quando o cliente já
+tem a mesma versão, sem montar a resposta.
+"""
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+from installments import CompactInstallments, RecurringInstallments, current_month_key
+from storage.base import StorageListener
+
+def _installments_signature(parcelas_mensais: Any) -> Any:
+    if isinstance(parcelas_mensais, CompactInstallments):
+        return (parcelas_mensais.months.tobytes(), parcelas_mensais.valores_pessoa1.tobytes(),
+                parcelas_mensais.valores_pessoa2.tobytes(), parcelas_mensais.pagos)
+    if isinstance(parcelas_mensais, RecurringInstallments):
+        return (parcelas_mensais.inicio, parcelas_mensais.valor_pessoa1, parcelas_mensais.valor_pessoa2,
+                frozenset(parcelas_mensais.pagos_pessoa1), frozenset(parcelas_mensais.pagos_pessoa2))
+    return tuple(tuple(p.items()) for p in parcelas_mensais or [])
+
+def _item_hash(item: Dict[str, Any]) -> int:
+    return hash(tuple(
+        _installments_signature(value) if key == 'parcelas_mensais' else value
+        for key, value in item.items()
+    ))
+
+# Soma dos hashes dos itens (módulo 2^64): pode ser ajustada item a item a cada escrita.
+# Não depende da ordem; só mover linhas na planilha não muda a versão.
+_MASK = (1 << 64) - 1
+
+class DataVersion(StorageListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Identifica o processo: após um reinício, ETags antigos não coincidem por acaso
+        self._token = os.urandom(4).hex()
+        self._version = 0
+        # Assinatura do conteúdo atual (soma dos hashes dos itens; None = nada carregado)
+        self._signature: Optional[int] = None
+
+    def on_load(self, items: List[Dict[str, Any]]):
+        # Recarga sem mudanças (cache expirado, planilha igual) mantém a versão
+        signature = sum(map(_item_hash, items)) & _MASK
+        with self._lock:
+            if signature != self._signature:
+                self._signature = signature
+                self._version += 1
+
+    def on_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        delta = _item_hash(new_item) - (_item_hash(old_item) if old_item is not None else 0)
+        if old_item is not None and delta == 0:
+            # Mesmo conteúdo (ex.: gravação sem alterações): as respostas não mudam
+            return
+        with self._lock:
+            self._version += 1
+            if self._signature is not None:
+                self._signature = (self._signature + delta) & _MASK
+
+    def on_delete(self, old_item: Dict[str, Any]):
+        delta = _item_hash(old_item)
+        with self._lock:
+            self._version += 1
+            if self._signature is not None:
+                self._signature = (self._signature - delta) & _MASK
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def etag(self) -> str:
+        """
+        ETag das respostas de leitura na versão atual
+
+        Inclui o mês atual: o resumo e a janela das contas fixas mudam na virada do mês.
+        """
+        return f'"{self._token}-{self._version}-{current_month_key()}"'
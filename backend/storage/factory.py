@@ -0,0 +1,38 @@
+"""
+Seleção do backend de armazenamento a partir das variáveis de ambiente
+
+STORAGE_BACKEND=sheets (padrão) usa o Google Sheets; STORAGE_BACKEND=sqlite usa
+o banco local em SQLITE_PATH; STORAGE_BACKEND=fake usa o Google Sheets simulado
+em memória (fake_sheets.py), sem credenciais, para desenvolvimento e benchmarks.
+"""
+import os
+import logging
+
+from storage.base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND_SHEETS = 'sheets'
+STORAGE_BACKEND_SQLITE = 'sqlite'
+STORAGE_BACKEND_FAKE = 'fake'
+
+def create_storage_backend(backend: str = None) -> StorageBackend:
+    """Cria o backend configurado (ou o informado em backend)"""
+    backend = (backend or os.getenv('STORAGE_BACKEND', STORAGE_BACKEND_SHEETS)).strip().lower()
+    logger.info(f"Backend de armazenamento: {backend}")
+    
+    if backend == STORAGE_BACKEND_SHEETS:
+        from google_sheets_service import GoogleSheetsServiceManager
+        return GoogleSheetsServiceManager()
+    if backend == STORAGE_BACKEND_FAKE:
+        from google_sheets_service import GoogleSheetsServiceManager
+        from fake_sheets import FakeSheetsService
+        return GoogleSheetsServiceManager(service=FakeSheetsService.from_env())
+    if backend == STORAGE_BACKEND_SQLITE:
+        from storage.sqlite_backend import SQLiteStorageManager
+        return SQLiteStorageManager()
+    
+    raise ValueError(
+        f"STORAGE_BACKEND inválido: {backend!r} "
+        f"(use '{STORAGE_BACKEND_SHEETS}', '{STORAGE_BACKEND_SQLITE}' ou '{STORAGE_BACKEND_FAKE}')"
+    )
@@ -0,0 +1,180 @@
+"""
+Índices secundários dos itens, para a listagem filtrada e paginada
+
+O ItemsIndex acompanha o backend (StorageListener) e guarda, ao lado dos itens
+em cache, listas ordenadas pela chave de criação (o ID, que é um timestamp em
+milissegundos) por status ativo e por conta fixa, a lista ordenada dos nomes e
+o intervalo de meses das parcelas de cada item. Uma consulta percorre só o
+índice mais seletivo a partir do cursor, até completar a página: o custo
+acompanha o tamanho da página, não a quantidade de itens.
+"""
+import base64
+import binascii
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from installments import CompactInstallments, RecurringInstallments, canonical_month_key
+from storage.base import StorageListener
+
+# Chave de ordenação: IDs numéricos (timestamps) em ordem numérica, os demais depois, em ordem de texto
+SortKey = Tuple[int, str]
+
+def sort_key(item_id: str) -> SortKey:
+    return len(item_id), item_id
+
+# Meses das parcelas de um item: (primeiro, último) quando são consecutivos (último None na
+# regra de conta fixa, que não termina) ou o array ordenado dos meses
+MonthSpan = Union[Tuple[int, Optional[int]], array, None]
+
+def month_span(parcelas_mensais: Any) -> MonthSpan:
+    if isinstance(parcelas_mensais, RecurringInstallments):
+        return parcelas_mensais.inicio, None
+    if isinstance(parcelas_mensais, CompactInstallments):
+        keys = parcelas_mensais.months
+    else:
+        keys = [key for key in map(canonical_month_key, (p.get('mes') for p in parcelas_mensais or []))
+                if key is not None]
+    if not keys:
+        return None
+    keys = array('i', sorted(set(keys)))
+    if keys[-1] - keys[0] == len(keys) - 1:
+        return keys[0], keys[-1]
+    return keys
+
+def span_overlaps(span: MonthSpan, first: Optional[int], last: Optional[int]) -> bool:
+    """Indica se o item tem parcela em algum mês entre first e last (chaves de month_key, inclusive)"""
+    if span is None:
+        return False
+    if isinstance(span, tuple):
+        start, end = span
+        return (last is None or start <= last) and (first is None or end is None or end >= first)
+    i = bisect_left(span, first) if first is not None else 0
+    return i < len(span) and (last is None or span[i] <= last)
+
+def _remove(keys: list, key):
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+class ItemsIndex(StorageListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._order: List[SortKey] = []
+        self._flags: Dict[Tuple[str, bool], List[SortKey]] = {
+            ('ativo', True): [], ('ativo', False): [],
+            ('conta_fixa', True): [], ('conta_fixa', False): []
+        }
+        self._names: List[Tuple[str, SortKey]] = []
+        self._spans: Dict[str, MonthSpan] = {}
+
+    @staticmethod
+    def _flag_values(item: Dict[str, Any]) -> Tuple[Tuple[str, bool], Tuple[str, bool]]:
+        return ('ativo', bool(item.get('ativo', True))), ('conta_fixa', bool(item.get('conta_fixa', False)))
+
+    def _add(self, item: Dict[str, Any]):
+        key = sort_key(item['id'])
+        self._items[item['id']] = item
+        insort(self._order, key)
+        for flag in self._flag_values(item):
+            insort(self._flags[flag], key)
+        insort(self._names, (item.get('nome', '').casefold(), key))
+        self._spans[item['id']] = month_span(item.get('parcelas_mensais'))
+
+    def _remove(self, item_id: str):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        key = sort_key(item_id)
+        _remove(self._order, key)
+        for flag in self._flag_values(item):
+            _remove(self._flags[flag], key)
+        _remove(self._names, (item.get('nome', '').casefold(), key))
+        del self._spans[item_id]
+
+    def on_load(self, items: List[Dict[str, Any]]):
+        with self._lock:
+            self._reset()
+            for item in items:
+                self._items[item['id']] = item
+                self._spans[item['id']] = month_span(item.get('parcelas_mensais'))
+            # Carga completa: ordena uma vez em vez de inserir item a item
+            self._order = sorted(map(sort_key, self._items))
+            for key in self._order:
+                for flag in self._flag_values(self._items[key[1]]):
+                    self._flags[flag].append(key)
+            self._names = sorted((item.get('nome', '').casefold(), sort_key(item_id))
+                                 for item_id, item in self._items.items())
+
+    def on_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        with self._lock:
+            self._remove(new_item['id'])
+            self._add(new_item)
+
+    def on_delete(self, old_item: Dict[str, Any]):
+        with self._lock:
+            self._remove(old_item['id'])
+
+    def query(self, ativo: Optional[bool] = None, conta_fixa: Optional[bool] = None,
+              mes_inicio: Optional[int] = None, mes_fim: Optional[int] = None,
+              nome_prefixo: Optional[str] = None, limit: Optional[int] = None,
+              after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Itens que atendem aos filtros, em ordem de criação, a partir do item após `after` (ID)
+
+        mes_inicio/mes_fim são chaves de month_key (intervalo inclusivo; o item
+        precisa ter parcela em algum mês do intervalo). nome_prefixo não diferencia
+        maiúsculas de minúsculas. Retorna a página e o ID do último item dela se
+        houver mais itens (o cursor da próxima página), senão None.
+        """
+        with self._lock:
+            # Índice que conduz a busca: o prefixo do nome ou a menor lista de status
+            if nome_prefixo:
+                prefix = nome_prefixo.casefold()
+                start = bisect_left(self._names, (prefix,))
+                end = bisect_left(self._names, (prefix + '\U0010ffff',))
+                driver = sorted(key for _, key in islice(self._names, start, end))
+            else:
+                candidates = [self._order]
+                if ativo is not None:
+                    candidates.append(self._flags[('ativo', ativo)])
+                if conta_fixa is not None:
+                    candidates.append(self._flags[('conta_fixa', conta_fixa)])
+                driver = min(candidates, key=len)
+
+            position = bisect_right(driver, sort_key(after)) if after is not None else 0
+            filter_months = mes_inicio is not None or mes_fim is not None
+            page = []
+            for _, item_id in islice(driver, position, None):
+                item = self._items[item_id]
+                if ativo is not None and bool(item.get('ativo', True)) != ativo:
+                    continue
+                if conta_fixa is not None and bool(item.get('conta_fixa', False)) != conta_fixa:
+                    continue
+                if filter_months and not span_overlaps(self._spans[item_id], mes_inicio, mes_fim):
+                    continue
+                if limit is not None and len(page) == limit:
+                    # Há pelo menos mais um item: a página termina no anterior
+                    return page, page[-1]['id']
+                page.append(item)
+            return page, None
+
+def encode_cursor(item_id: str) -> str:
+    """Cursor opaco da próxima página (ID do último item entregue)"""
+    return base64.urlsafe_b64encode(item_id.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> str:
+    """ID do cursor de encode_cursor; ValueError se o cursor é inválido"""
+    try:
+        item_id = base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+    if not item_id:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return item_id
@@ -0,0 +1,245 @@
+"""
+Índice invertido mês -> parcelas, para a consulta de um mês (/payments/months)
+
+O MonthIndex acompanha o backend (StorageListener) e guarda, para cada mês,
+os itens com parcela naquele mês e as posições dessas parcelas. As contas
+fixas em regra (RecurringInstallments) valem para todos os meses a partir do
+início e ficam numa lista à parte, ordenada pelo mês inicial. Consultar um mês
+lê só as parcelas daquele mês, sem percorrer as parcelas de todos os itens.
+
+Os totais de cada mês (month_totals, usados em /payments/forecast e
+/payments/reports) ficam em cache até a próxima escrita que alcance aquele mês;
+numa recarga da planilha, só os meses dos itens que mudaram são descartados.
+"""
+import threading
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from installments import (
+    CompactInstallments, RecurringInstallments, PAGO_PESSOA1, PAGO_PESSOA2, canonical_month_key
+)
+from storage.base import StorageListener
+from storage.items_index import SortKey, sort_key
+
+def _month_positions(parcelas_mensais: Any) -> Dict[int, Tuple[int, ...]]:
+    """Mês (chave de month_key) -> posições das parcelas daquele mês"""
+    if isinstance(parcelas_mensais, CompactInstallments):
+        keys = parcelas_mensais.months
+    else:
+        keys = [canonical_month_key(p.get('mes')) for p in parcelas_mensais or []]
+    positions: Dict[int, List[int]] = {}
+    for i, key in enumerate(keys):
+        if key is not None:
+            positions.setdefault(key, []).append(i)
+    return {key: tuple(value) for key, value in positions.items()}
+
+def _installment_values(parcelas_mensais: Any, i: int) -> Tuple[float, float, bool, bool]:
+    """(valor_pessoa1, valor_pessoa2, pago_pessoa1, pago_pessoa2) da parcela na posição i"""
+    if isinstance(parcelas_mensais, CompactInstallments):
+        pago = parcelas_mensais.pagos[i]
+        return (parcelas_mensais.valores_pessoa1[i], parcelas_mensais.valores_pessoa2[i],
+                bool(pago & PAGO_PESSOA1), bool(pago & PAGO_PESSOA2))
+    parcela = parcelas_mensais[i]
+    return (float(parcela['valor_pessoa1']), float(parcela['valor_pessoa2']),
+            bool(parcela.get('pago_pessoa1', False)), bool(parcela.get('pago_pessoa2', False)))
+
+# Totais de um mês: (total_pessoa1, total_pessoa2, pago_pessoa1, pago_pessoa2,
+# pendente_pessoa1, pendente_pessoa2, itens ativos com parcela no mês)
+MonthTotals = Tuple[float, float, float, float, float, float, int]
+
+class MonthIndex(StorageListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        # Meses cujos totais foram calculados (e não vieram do cache)
+        self.computed_months = 0
+
+    def _reset(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        # Mês -> item -> posições das parcelas do mês
+        self._by_month: Dict[int, Dict[str, Tuple[int, ...]]] = {}
+        # Meses de cada item em _by_month, para removê-lo
+        self._item_months: Dict[str, Tuple[int, ...]] = {}
+        # Contas fixas em regra: (mês inicial, chave do item), em ordem
+        self._rules: List[Tuple[int, SortKey]] = []
+        # Mês -> totais já calculados (month_totals)
+        self._totals: Dict[int, MonthTotals] = {}
+
+    def _invalidate(self, item: Dict[str, Any], months: Optional[Tuple[int, ...]] = None):
+        """Descarta os totais em cache dos meses em que o item tem parcela"""
+        parcelas_mensais = item.get('parcelas_mensais')
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            for key in [key for key in self._totals if key >= parcelas_mensais.inicio]:
+                del self._totals[key]
+        else:
+            if months is None:
+                months = self._item_months.get(item['id'], ())
+            for key in months:
+                self._totals.pop(key, None)
+
+    def _add(self, item: Dict[str, Any], invalidate: bool = True):
+        item_id = item['id']
+        self._items[item_id] = item
+        parcelas_mensais = item.get('parcelas_mensais')
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            insort(self._rules, (parcelas_mensais.inicio, sort_key(item_id)))
+            if invalidate:
+                self._invalidate(item)
+            return
+        positions = _month_positions(parcelas_mensais)
+        for key, item_positions in positions.items():
+            self._by_month.setdefault(key, {})[item_id] = item_positions
+        self._item_months[item_id] = tuple(positions)
+        if invalidate:
+            self._invalidate(item)
+
+    def _remove(self, item_id: str, invalidate: bool = True):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        if invalidate:
+            self._invalidate(item)
+        parcelas_mensais = item.get('parcelas_mensais')
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            rule = (parcelas_mensais.inicio, sort_key(item_id))
+            i = bisect_left(self._rules, rule)
+            if i < len(self._rules) and self._rules[i] == rule:
+                del self._rules[i]
+            return
+        for key in self._item_months.pop(item_id, ()):
+            month_items = self._by_month[key]
+            del month_items[item_id]
+            if not month_items:
+                del self._by_month[key]
+
+    def on_load(self, items: List[Dict[str, Any]]):
+        with self._lock:
+            old_items, totals = self._items, self._totals
+            self._reset()
+            for item in items:
+                self._add(item, invalidate=False)
+            # Recarga do cache: mantém os totais dos meses que nenhum item alterado alcança
+            self._totals = totals
+            for item in items:
+                old_item = old_items.pop(item['id'], None)
+                if old_item != item:
+                    self._invalidate(item)
+                    if old_item is not None:
+                        self._invalidate(old_item, tuple(_month_positions(old_item.get('parcelas_mensais'))))
+            for old_item in old_items.values():
+                self._invalidate(old_item, tuple(_month_positions(old_item.get('parcelas_mensais'))))
+
+    def on_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        with self._lock:
+            changed = self._changed_rule_months(self._items.get(new_item['id']), new_item)
+            self._remove(new_item['id'], invalidate=changed is None)
+            self._add(new_item, invalidate=changed is None)
+            for key in changed or ():
+                self._totals.pop(key, None)
+
+    @staticmethod
+    def _changed_rule_months(old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]) -> Optional[Set[int]]:
+        """
+        Meses alterados entre duas versões de uma conta fixa em regra que só diferem nos pagamentos
+
+        É o caso de marcar um pagamento: só os meses pagos ou desmarcados perdem os
+        totais em cache, não todos os meses desde o início. None nos demais casos.
+        """
+        if old_item is None:
+            return None
+        old, new = old_item.get('parcelas_mensais'), new_item.get('parcelas_mensais')
+        if not (isinstance(old, RecurringInstallments) and isinstance(new, RecurringInstallments)):
+            return None
+        if ((old.inicio, old.valor_pessoa1, old.valor_pessoa2, old_item.get('ativo', True))
+                != (new.inicio, new.valor_pessoa1, new.valor_pessoa2, new_item.get('ativo', True))):
+            return None
+        return (old.pagos_pessoa1 ^ new.pagos_pessoa1) | (old.pagos_pessoa2 ^ new.pagos_pessoa2)
+
+    def on_delete(self, old_item: Dict[str, Any]):
+        with self._lock:
+            self._remove(old_item['id'])
+
+    def _month_item_ids(self, key: int) -> List[SortKey]:
+        """Chaves dos itens com parcela no mês, em ordem de criação"""
+        started = self._rules[:bisect_left(self._rules, (key + 1,))]
+        return sorted([*map(sort_key, self._by_month.get(key, {})), *(rule_key for _, rule_key in started)])
+
+    def _compute_totals(self, key: int) -> MonthTotals:
+        pago1 = pago2 = pendente1 = pendente2 = 0.0
+        ativos = 0
+        items = self._items
+        for item_id, positions in self._by_month.get(key, {}).items():
+            item = items[item_id]
+            parcelas_mensais = item['parcelas_mensais']
+            ativo = item.get('ativo', True)
+            if ativo:
+                ativos += 1
+            if isinstance(parcelas_mensais, CompactInstallments):
+                valores_pessoa1, valores_pessoa2, pagos = (
+                    parcelas_mensais.valores_pessoa1, parcelas_mensais.valores_pessoa2, parcelas_mensais.pagos)
+                values = [(valores_pessoa1[i], valores_pessoa2[i], pagos[i] & PAGO_PESSOA1, pagos[i] & PAGO_PESSOA2)
+                          for i in positions]
+            else:
+                values = [_installment_values(parcelas_mensais, i) for i in positions]
+            for valor1, valor2, pago_pessoa1, pago_pessoa2 in values:
+                if pago_pessoa1:
+                    pago1 += valor1
+                elif ativo:
+                    pendente1 += valor1
+                if pago_pessoa2:
+                    pago2 += valor2
+                elif ativo:
+                    pendente2 += valor2
+        for _, (_, item_id) in self._rules[:bisect_left(self._rules, (key + 1,))]:
+            item = items[item_id]
+            regra = item['parcelas_mensais']
+            ativo = item.get('ativo', True)
+            if ativo:
+                ativos += 1
+            if key in regra.pagos_pessoa1:
+                pago1 += regra.valor_pessoa1
+            elif ativo:
+                pendente1 += regra.valor_pessoa1
+            if key in regra.pagos_pessoa2:
+                pago2 += regra.valor_pessoa2
+            elif ativo:
+                pendente2 += regra.valor_pessoa2
+        self.computed_months += 1
+        return pago1 + pendente1, pago2 + pendente2, pago1, pago2, pendente1, pendente2, ativos
+
+    def month_totals(self, first: int, count: int = 1) -> List[MonthTotals]:
+        """
+        Totais por pessoa de count meses a partir de first (chave de month_key)
+
+        Cada mês soma o já pago (de todos os itens) e o pendente (só dos itens ativos:
+        um item desativado não é mais cobrado); total = pago + pendente. Os totais
+        ficam em cache até uma escrita alcançar o mês (um pagamento marcado depois,
+        num mês já fechado, descarta só aquele mês).
+        """
+        with self._lock:
+            result = []
+            for key in range(first, first + count):
+                totals = self._totals.get(key)
+                if totals is None:
+                    totals = self._totals[key] = self._compute_totals(key)
+                result.append(totals)
+            return result
+
+    def month(self, key: int) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Parcelas do mês (chave de month_key) como pares (item, parcela), em ordem de criação dos itens
+
+        Um item com mais de uma parcela no mesmo mês aparece uma vez por parcela, na
+        ordem da lista. As contas fixas em regra entram a partir do mês inicial.
+        """
+        with self._lock:
+            month_items = self._by_month.get(key, {})
+            result = []
+            for _, item_id in self._month_item_ids(key):
+                item = self._items[item_id]
+                parcelas_mensais = item['parcelas_mensais']
+                if isinstance(parcelas_mensais, RecurringInstallments):
+                    result.append((item, parcelas_mensais.installment(key)))
+                else:
+                    result.extend((item, parcelas_mensais[i]) for i in month_items[item_id])
+            return result
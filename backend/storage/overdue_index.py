@@ -0,0 +1,199 @@
+"""
+Índice das parcelas não pagas por pessoa, para /payments/overdue
+
+O OverdueIndex acompanha o backend (StorageListener) e guarda, para cada
+pessoa, as parcelas não pagas dos itens ativos numa lista ordenada por mês.
+As atrasadas (meses anteriores ao atual) são o início da lista: a consulta
+lê só elas, sem percorrer o histórico de parcelas pagas. As contas fixas em
+regra não têm lista de parcelas: cada regra guarda, por pessoa, a lista
+ordenada dos seus meses não pagos até o último mês consultado, ajustada a cada
+pagamento marcado (on_upsert) e estendida só quando o mês vira.
+"""
+import threading
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Optional, Tuple
+
+from installments import CompactInstallments, RecurringInstallments, PAGO_PESSOA1, PAGO_PESSOA2, canonical_month_key
+from storage.base import StorageListener
+from storage.items_index import SortKey, sort_key
+
+PESSOAS = ('pessoa1', 'pessoa2')
+
+# Parcela não paga: (mês, chave do item, posição na lista de parcelas, valor)
+UnpaidEntry = Tuple[int, SortKey, int, float]
+
+def _unpaid_entries(item: Dict[str, Any]) -> Dict[str, List[UnpaidEntry]]:
+    """Parcelas não pagas (com valor) de cada pessoa, fora as contas fixas em regra"""
+    entries: Dict[str, List[UnpaidEntry]] = {pessoa: [] for pessoa in PESSOAS}
+    key = sort_key(item['id'])
+    parcelas_mensais = item.get('parcelas_mensais')
+    if isinstance(parcelas_mensais, CompactInstallments):
+        rows = zip(parcelas_mensais.months, parcelas_mensais.valores_pessoa1, parcelas_mensais.valores_pessoa2,
+                   (pago & PAGO_PESSOA1 for pago in parcelas_mensais.pagos),
+                   (pago & PAGO_PESSOA2 for pago in parcelas_mensais.pagos))
+    else:
+        rows = ((canonical_month_key(p.get('mes')), float(p['valor_pessoa1']), float(p['valor_pessoa2']),
+                 p.get('pago_pessoa1', False), p.get('pago_pessoa2', False)) for p in parcelas_mensais or [])
+    for i, (month, valor1, valor2, pago1, pago2) in enumerate(rows):
+        if month is None:
+            continue
+        if not pago1 and valor1:
+            entries['pessoa1'].append((month, key, i, valor1))
+        if not pago2 and valor2:
+            entries['pessoa2'].append((month, key, i, valor2))
+    return entries
+
+def _rule_unpaid_months(regra: RecurringInstallments, pessoa: str, first: int, end: int) -> List[int]:
+    """Meses não pagos da regra pela pessoa entre first e end (exclusivo); nenhum se o valor é zero"""
+    valor = regra.valor_pessoa1 if pessoa == 'pessoa1' else regra.valor_pessoa2
+    if not valor:
+        return []
+    pagos = regra.pagos_pessoa1 if pessoa == 'pessoa1' else regra.pagos_pessoa2
+    return [month for month in range(max(first, regra.inicio), end) if month not in pagos]
+
+class OverdueIndex(StorageListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Mês (exclusivo) até o qual os meses não pagos das regras estão calculados; None antes da
+        # primeira consulta. Mantido entre recargas: a virada do mês só acrescenta os meses novos
+        self._horizon: Optional[int] = None
+        self._reset()
+
+    def _reset(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        # Pessoa -> parcelas não pagas, ordenadas por mês e item
+        self._unpaid: Dict[str, List[UnpaidEntry]] = {pessoa: [] for pessoa in PESSOAS}
+        # Item -> suas parcelas em _unpaid, para removê-las
+        self._item_entries: Dict[str, Dict[str, List[UnpaidEntry]]] = {}
+        # Contas fixas ativas em regra: (mês inicial, chave do item), em ordem
+        self._rules: List[Tuple[int, SortKey]] = []
+        # Regra -> pessoa -> meses não pagos antes de _horizon, em ordem
+        self._rule_unpaid: Dict[str, Dict[str, List[int]]] = {}
+
+    def _add(self, item: Dict[str, Any], sort: bool = True):
+        if not item.get('ativo', True):
+            return
+        item_id = item['id']
+        self._items[item_id] = item
+        parcelas_mensais = item.get('parcelas_mensais')
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            insort(self._rules, (parcelas_mensais.inicio, sort_key(item_id)))
+            horizon = self._horizon if self._horizon is not None else parcelas_mensais.inicio
+            self._rule_unpaid[item_id] = {
+                pessoa: _rule_unpaid_months(parcelas_mensais, pessoa, parcelas_mensais.inicio, horizon)
+                for pessoa in PESSOAS
+            }
+            return
+        entries = self._item_entries[item_id] = _unpaid_entries(item)
+        for pessoa, person_entries in entries.items():
+            if sort:
+                for entry in person_entries:
+                    insort(self._unpaid[pessoa], entry)
+            else:
+                self._unpaid[pessoa].extend(person_entries)
+
+    def _remove(self, item_id: str):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        parcelas_mensais = item.get('parcelas_mensais')
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            rule = (parcelas_mensais.inicio, sort_key(item_id))
+            i = bisect_left(self._rules, rule)
+            if i < len(self._rules) and self._rules[i] == rule:
+                del self._rules[i]
+            del self._rule_unpaid[item_id]
+            return
+        for pessoa, person_entries in self._item_entries.pop(item_id).items():
+            unpaid = self._unpaid[pessoa]
+            for entry in person_entries:
+                i = bisect_left(unpaid, entry)
+                if i < len(unpaid) and unpaid[i] == entry:
+                    del unpaid[i]
+
+    def on_load(self, items: List[Dict[str, Any]]):
+        with self._lock:
+            self._reset()
+            for item in items:
+                self._add(item, sort=False)
+            for unpaid in self._unpaid.values():
+                unpaid.sort()
+
+    def on_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        with self._lock:
+            if not self._update_rule_payments(new_item):
+                self._remove(new_item['id'])
+                self._add(new_item)
+
+    def _update_rule_payments(self, new_item: Dict[str, Any]) -> bool:
+        """
+        Ajusta os meses não pagos de uma regra ativa que só mudou nos pagamentos
+
+        Só os meses pagos ou desmarcados são tocados, não todos desde o início.
+        Retorna False nos demais casos (o item é removido e adicionado de novo).
+        """
+        old_item = self._items.get(new_item['id'])
+        if old_item is None or not new_item.get('ativo', True):
+            return False
+        old, new = old_item.get('parcelas_mensais'), new_item.get('parcelas_mensais')
+        if not (isinstance(old, RecurringInstallments) and isinstance(new, RecurringInstallments)):
+            return False
+        if (old.inicio, old.valor_pessoa1, old.valor_pessoa2) != (new.inicio, new.valor_pessoa1, new.valor_pessoa2):
+            return False
+        self._items[new_item['id']] = new_item
+        rule_unpaid = self._rule_unpaid[new_item['id']]
+        horizon = self._horizon if self._horizon is not None else new.inicio
+        for pessoa, old_pagos, new_pagos in (('pessoa1', old.pagos_pessoa1, new.pagos_pessoa1),
+                                             ('pessoa2', old.pagos_pessoa2, new.pagos_pessoa2)):
+            if not (new.valor_pessoa1 if pessoa == 'pessoa1' else new.valor_pessoa2):
+                continue
+            unpaid = rule_unpaid[pessoa]
+            for month in old_pagos ^ new_pagos:
+                if not new.inicio <= month < horizon:
+                    continue
+                if month in new_pagos:
+                    i = bisect_left(unpaid, month)
+                    if i < len(unpaid) and unpaid[i] == month:
+                        del unpaid[i]
+                else:
+                    insort(unpaid, month)
+        return True
+
+    def _extend_rules(self, current: int):
+        """Acrescenta aos meses não pagos das regras os meses de _horizon até current (exclusivo)"""
+        for item_id, rule_unpaid in self._rule_unpaid.items():
+            regra = self._items[item_id]['parcelas_mensais']
+            first = self._horizon if self._horizon is not None else regra.inicio
+            for pessoa in PESSOAS:
+                rule_unpaid[pessoa].extend(_rule_unpaid_months(regra, pessoa, first, current))
+        self._horizon = current
+
+    def on_delete(self, old_item: Dict[str, Any]):
+        with self._lock:
+            self._remove(old_item['id'])
+
+    def overdue(self, current: int) -> Dict[str, List[Tuple[Dict[str, Any], int, float]]]:
+        """
+        Parcelas atrasadas (mês anterior a current, chave de month_key) de cada pessoa
+
+        Cada pessoa recebe triplas (item, mês, valor) em ordem de mês e de criação
+        dos itens. Itens inativos ficam de fora.
+        """
+        with self._lock:
+            if self._horizon is None or current > self._horizon:
+                self._extend_rules(current)
+            result = {}
+            started = self._rules[:bisect_left(self._rules, (current,))]
+            for pessoa in PESSOAS:
+                unpaid = self._unpaid[pessoa]
+                entries = [(month, item_key, valor)
+                           for month, item_key, _, valor in unpaid[:bisect_left(unpaid, (current,))]]
+                if started:
+                    for _, item_key in started:
+                        regra = self._items[item_key[1]]['parcelas_mensais']
+                        valor = regra.valor_pessoa1 if pessoa == 'pessoa1' else regra.valor_pessoa2
+                        months = self._rule_unpaid[item_key[1]][pessoa]
+                        entries.extend((month, item_key, valor) for month in months[:bisect_left(months, current)])
+                    entries.sort(key=lambda entry: entry[:2])
+                result[pessoa] = [(self._items[item_key[1]], month, valor) for month, item_key, valor in entries]
+            return result
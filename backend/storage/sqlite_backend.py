@@ -0,0 +1,366 @@
+"""
+Backend de armazenamento local em SQLite
+
+Guarda os itens e as parcelas mensais em tabelas normalizadas, com índices por
+ID, mês e status ativo; as contas fixas guardam a regra de recorrência. Selecionado com STORAGE_BACKEND=sqlite (arquivo em
+SQLITE_PATH).
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Callable
+
+from storage.base import StorageListener
+from installments import RecurringInstallments, month_from_key, month_key
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    valor REAL NOT NULL,
+    parcelas INTEGER NOT NULL,
+    percentual_pessoa1 REAL NOT NULL,
+    percentual_pessoa2 REAL NOT NULL,
+    data_criacao TEXT NOT NULL DEFAULT '',
+    ativo INTEGER NOT NULL DEFAULT 1,
+    conta_fixa INTEGER NOT NULL DEFAULT 0,
+    valor_manual_pessoa1 REAL,
+    valor_manual_pessoa2 REAL,
+    pago_pessoa1 INTEGER NOT NULL DEFAULT 0,
+    pago_pessoa2 INTEGER NOT NULL DEFAULT 0,
+    comecar_mes_atual INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_items_ativo ON items (ativo);
+CREATE INDEX IF NOT EXISTS idx_items_posicao ON items (posicao);
+
+CREATE TABLE IF NOT EXISTS parcelas (
+    item_id TEXT NOT NULL REFERENCES items (id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    mes TEXT NOT NULL,
+    mes_chave INTEGER NOT NULL,
+    valor_pessoa1 REAL NOT NULL,
+    valor_pessoa2 REAL NOT NULL,
+    pago_pessoa1 INTEGER NOT NULL DEFAULT 0,
+    pago_pessoa2 INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (item_id, posicao)
+);
+CREATE INDEX IF NOT EXISTS idx_parcelas_mes ON parcelas (mes_chave);
+
+-- Regra de recorrência das contas fixas (no lugar das linhas em parcelas);
+-- meses pagos como listas JSON de 'MM/YYYY'
+CREATE TABLE IF NOT EXISTS recorrencias (
+    item_id TEXT PRIMARY KEY REFERENCES items (id) ON DELETE CASCADE,
+    inicio_chave INTEGER NOT NULL,
+    valor_pessoa1 REAL NOT NULL,
+    valor_pessoa2 REAL NOT NULL,
+    pagos_pessoa1 TEXT NOT NULL DEFAULT '[]',
+    pagos_pessoa2 TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_recorrencias_inicio ON recorrencias (inicio_chave);
+"""
+
+ITEM_COLUMNS = [
+    'id', 'nome', 'valor', 'parcelas', 'percentual_pessoa1', 'percentual_pessoa2',
+    'data_criacao', 'ativo', 'conta_fixa', 'valor_manual_pessoa1', 'valor_manual_pessoa2',
+    'pago_pessoa1', 'pago_pessoa2', 'comecar_mes_atual'
+]
+
+# IDs por consulta com IN (...): abaixo do SQLITE_MAX_VARIABLE_NUMBER (999 em versões antigas)
+MAX_QUERY_IDS = 500
+
+def _chunks(item_ids: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(item_ids), MAX_QUERY_IDS):
+        yield item_ids[start:start + MAX_QUERY_IDS]
+
+class SQLiteStorageManager:
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('SQLITE_PATH', 'controle_financeiro.db')
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        if self.path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.executescript(SCHEMA)
+        self._listeners: List[StorageListener] = []
+        self._last_item_id = 0
+        logger.info(f"Banco SQLite aberto em {self.path}")
+    
+    def refresh(self):
+        """Sem cache: as leituras vão sempre ao banco"""
+    
+    def add_listener(self, listener: StorageListener):
+        """Registra um listener; ele recebe todos os itens agora e depois cada escrita"""
+        with self._lock:
+            self._listeners.append(listener)
+            listener.on_load(self._select_items())
+    
+    @staticmethod
+    def _row_to_item(row: sqlite3.Row) -> Dict[str, Any]:
+        """Converte uma linha da tabela items em um item"""
+        return {
+            'id': row['id'],
+            'nome': row['nome'],
+            'valor': row['valor'],
+            'parcelas': row['parcelas'],
+            'percentual_pessoa1': row['percentual_pessoa1'],
+            'percentual_pessoa2': row['percentual_pessoa2'],
+            'data_criacao': row['data_criacao'],
+            'ativo': bool(row['ativo']),
+            'conta_fixa': bool(row['conta_fixa']),
+            'valor_manual_pessoa1': row['valor_manual_pessoa1'],
+            'valor_manual_pessoa2': row['valor_manual_pessoa2'],
+            'pago_pessoa1': bool(row['pago_pessoa1']),
+            'pago_pessoa2': bool(row['pago_pessoa2']),
+            'parcelas_mensais': [],
+            'comecar_mes_atual': bool(row['comecar_mes_atual'])
+        }
+    
+    @staticmethod
+    def _item_values(item_id: str, item: Dict[str, Any]) -> List[Any]:
+        """Valores das colunas de ITEM_COLUMNS para um item"""
+        return [
+            item_id,
+            item['nome'],
+            float(item['valor']),
+            int(item['parcelas']),
+            float(item['percentual_pessoa1']),
+            float(item['percentual_pessoa2']),
+            item.get('data_criacao') or '',
+            int(bool(item.get('ativo', True))),
+            int(bool(item.get('conta_fixa', False))),
+            item.get('valor_manual_pessoa1'),
+            item.get('valor_manual_pessoa2'),
+            int(bool(item.get('pago_pessoa1', False))),
+            int(bool(item.get('pago_pessoa2', False))),
+            int(bool(item.get('comecar_mes_atual', True)))
+        ]
+    
+    def _select_by_item_ids(self, query: str, item_ids: Optional[Iterable[str]], order: str = '') -> Iterable[sqlite3.Row]:
+        """Linhas de query (de todos os itens, ou só dos IDs informados, em blocos de MAX_QUERY_IDS)"""
+        if item_ids is None:
+            yield from self._conn.execute(f'{query} {order}')
+            return
+        for chunk in _chunks(list(item_ids)):
+            placeholders = ','.join('?' * len(chunk))
+            yield from self._conn.execute(f'{query} WHERE item_id IN ({placeholders}) {order}', chunk)
+    
+    def _attach_installments(self, items: Dict[str, Dict[str, Any]], item_ids: Optional[Iterable[str]] = None):
+        """Preenche parcelas_mensais dos itens (de todos, ou só dos IDs informados)"""
+        for row in self._select_by_item_ids('SELECT * FROM parcelas', item_ids, 'ORDER BY item_id, posicao'):
+            item = items.get(row['item_id'])
+            if item is not None and isinstance(item['parcelas_mensais'], list):
+                item['parcelas_mensais'].append({
+                    'mes': row['mes'],
+                    'valor_pessoa1': row['valor_pessoa1'],
+                    'valor_pessoa2': row['valor_pessoa2'],
+                    'pago_pessoa1': bool(row['pago_pessoa1']),
+                    'pago_pessoa2': bool(row['pago_pessoa2'])
+                })
+    
+    def _attach_recurrences(self, items: Dict[str, Dict[str, Any]], item_ids: Optional[Iterable[str]] = None):
+        """Preenche parcelas_mensais das contas fixas guardadas como regra de recorrência"""
+        for row in self._select_by_item_ids('SELECT * FROM recorrencias', item_ids):
+            item = items.get(row['item_id'])
+            if item is not None:
+                item['parcelas_mensais'] = RecurringInstallments.from_json({
+                    'inicio': month_from_key(row['inicio_chave']),
+                    'valor_pessoa1': row['valor_pessoa1'],
+                    'valor_pessoa2': row['valor_pessoa2'],
+                    'pagos_pessoa1': json.loads(row['pagos_pessoa1']),
+                    'pagos_pessoa2': json.loads(row['pagos_pessoa2'])
+                })
+    
+    def _write_installments(self, item_id: str, parcelas_mensais: List[Dict[str, Any]]):
+        """Substitui as parcelas (ou a regra de recorrência) de um item"""
+        self._conn.execute('DELETE FROM parcelas WHERE item_id = ?', (item_id,))
+        self._conn.execute('DELETE FROM recorrencias WHERE item_id = ?', (item_id,))
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            regra = parcelas_mensais.to_json()
+            self._conn.execute(
+                'INSERT INTO recorrencias (item_id, inicio_chave, valor_pessoa1, valor_pessoa2, pagos_pessoa1, '
+                'pagos_pessoa2) VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    item_id, parcelas_mensais.inicio, regra['valor_pessoa1'], regra['valor_pessoa2'],
+                    json.dumps(regra['pagos_pessoa1']), json.dumps(regra['pagos_pessoa2'])
+                )
+            )
+            return
+        self._conn.executemany(
+            'INSERT INTO parcelas (item_id, posicao, mes, mes_chave, valor_pessoa1, valor_pessoa2, '
+            'pago_pessoa1, pago_pessoa2) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (
+                    item_id, position, p['mes'], month_key(p['mes']),
+                    float(p['valor_pessoa1']), float(p['valor_pessoa2']),
+                    int(bool(p.get('pago_pessoa1', False))), int(bool(p.get('pago_pessoa2', False)))
+                ) for position, p in enumerate(parcelas_mensais or [])
+            ]
+        )
+    
+    def _select_items(self, where: str = '', params: Iterable[Any] = (), include_installments: bool = True) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(f'SELECT * FROM items {where} ORDER BY posicao', list(params))
+            items = {row['id']: self._row_to_item(row) for row in rows}
+            if include_installments and items:
+                if where:
+                    self._attach_recurrences(items, items.keys())
+                    self._attach_installments(items, items.keys())
+                else:
+                    self._attach_recurrences(items)
+                    self._attach_installments(items)
+            return list(items.values())
+    
+    def get_all_items(self, include_installments: bool = True) -> List[Dict[str, Any]]:
+        """Busca todos os itens"""
+        items = self._select_items(include_installments=include_installments)
+        logger.info(f"Carregados {len(items)} itens do SQLite")
+        return items
+    
+    def query_items(self, ativo: Optional[bool] = None, conta_fixa: Optional[bool] = None,
+                    mes: Optional[str] = None, include_installments: bool = True) -> List[Dict[str, Any]]:
+        """Busca os itens que atendem aos filtros usando os índices do banco"""
+        conditions = []
+        params = []
+        if ativo is not None:
+            conditions.append('ativo = ?')
+            params.append(int(ativo))
+        if conta_fixa is not None:
+            conditions.append('conta_fixa = ?')
+            params.append(int(conta_fixa))
+        if mes is not None:
+            conditions.append(
+                '(id IN (SELECT item_id FROM parcelas WHERE mes_chave = ?) '
+                'OR id IN (SELECT item_id FROM recorrencias WHERE inicio_chave <= ?))'
+            )
+            params.extend([month_key(mes)] * 2)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._select_items(where, params, include_installments)
+    
+    def load_items(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Carrega os itens informados"""
+        items = {}
+        for chunk in _chunks(list(item_ids)):
+            placeholders = ','.join('?' * len(chunk))
+            items.update((item['id'], item) for item in self._select_items(f'WHERE id IN ({placeholders})', chunk))
+        return items
+    
+    def load_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Carrega um único item"""
+        return self.load_items([item_id]).get(item_id)
+    
+    def save_items(self, items: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Grava os itens completos em uma única transação"""
+        assignments = ', '.join(f'{column} = ?' for column in ITEM_COLUMNS[1:])
+        with self._lock:
+            previous_items = self.load_items(list(items)) if self._listeners else {}
+            saved_ids = []
+            with self._conn:
+                for item_id, item in items.items():
+                    values = self._item_values(item_id, item)
+                    cursor = self._conn.execute(f'UPDATE items SET {assignments} WHERE id = ?', values[1:] + [item_id])
+                    if cursor.rowcount == 0:
+                        logger.warning(f"Item {item_id} não encontrado")
+                        continue
+                    self._write_installments(item_id, item.get('parcelas_mensais'))
+                    saved_ids.append(item_id)
+            
+            # Listeners só depois do commit: uma transação desfeita não chega aos índices
+            saved_items = self.load_items(saved_ids)
+            for item_id, item in saved_items.items():
+                for listener in self._listeners:
+                    listener.on_upsert(previous_items.get(item_id), item)
+        
+        logger.info(f"{len(saved_ids)} item(ns) atualizado(s) no SQLite")
+        return saved_items
+    
+    def save_item(self, item_id: str, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Grava um único item; retorna None se ele não existe"""
+        return self.save_items({item_id: item}).get(item_id)
+    
+    def modify_items(self, item_ids: List[str],
+                     modify: Callable[[Dict[str, Dict[str, Any]]], Optional[Iterable[str]]]) -> Dict[str, Dict[str, Any]]:
+        """Carrega os itens, aplica modify e grava o resultado sob o mesmo lock (ver StorageBackend.modify_items)"""
+        with self._lock:
+            items = self.load_items(item_ids)
+            changed_ids = modify(items)
+            if changed_ids is not None:
+                items = {item_id: items[item_id] for item_id in changed_ids if item_id in items}
+            return self.save_items(items) if items else {}
+    
+    def modify_item(self, item_id: str, modify: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Versão de modify_items para um item; retorna None (sem chamar modify) se ele não existe"""
+        def modify_one(items: Dict[str, Dict[str, Any]]):
+            for item in items.values():
+                modify(item)
+        
+        return self.modify_items([item_id], modify_one).get(item_id)
+    
+    def _item_exists(self, item_id: str) -> bool:
+        return self._conn.execute('SELECT 1 FROM items WHERE id = ?', (item_id,)).fetchone() is not None
+    
+    def _new_item_id(self) -> str:
+        """Gera um ID baseado no timestamp em milissegundos, sempre crescente e ainda não usado"""
+        self._last_item_id = max(int(time.time() * 1000), self._last_item_id + 1)
+        while self._item_exists(str(self._last_item_id)):
+            self._last_item_id += 1
+        return str(self._last_item_id)
+    
+    def add_item(self, item_data: Dict[str, Any]) -> str:
+        """Adiciona um novo item"""
+        with self._lock:
+            with self._conn:
+                # Usa o ID informado (ex.: sincronização entre backends), se ainda não existir,
+                # ou gera um baseado no timestamp (como na planilha)
+                item_id = item_data.get('id')
+                if not item_id or self._item_exists(item_id):
+                    item_id = self._new_item_id()
+                
+                position = self._conn.execute('SELECT COALESCE(MAX(posicao), 0) + 1 FROM items').fetchone()[0]
+                columns = ['posicao'] + ITEM_COLUMNS
+                self._conn.execute(
+                    f"INSERT INTO items ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [position] + self._item_values(item_id, item_data)
+                )
+                self._write_installments(item_id, item_data.get('parcelas_mensais'))
+            
+            if self._listeners:
+                new_item = self.load_item(item_id)
+                for listener in self._listeners:
+                    listener.on_upsert(None, new_item)
+        
+        logger.info(f"Item adicionado com ID: {item_id}")
+        return item_id
+    
+    def update_item(self, item_id: str, item_data: Dict[str, Any]) -> bool:
+        """Atualiza um item existente"""
+        with self._lock:
+            current_item = self.load_item(item_id)
+            if current_item is None:
+                logger.warning(f"Item {item_id} não encontrado")
+                return False
+            return self.save_item(item_id, {**current_item, **item_data}) is not None
+    
+    def delete_item(self, item_id: str) -> bool:
+        """Remove completamente um item e suas parcelas"""
+        with self._lock:
+            old_item = self.load_item(item_id) if self._listeners else None
+            with self._conn:
+                cursor = self._conn.execute('DELETE FROM items WHERE id = ?', (item_id,))
+            if old_item is not None and cursor.rowcount:
+                for listener in self._listeners:
+                    listener.on_delete(old_item)
+        
+        if cursor.rowcount == 0:
+            logger.warning(f"Item {item_id} não encontrado")
+            return False
+        
+        logger.info(f"Item {item_id} removido do SQLite")
+        return True
@@ -0,0 +1,131 @@
+"""
+Totais do resumo mensal mantidos de forma incremental
+
+O SummaryIndex guarda a contribuição de cada item ativo para os totais do
+/payments/summary (utils.calculate_item_totals) e ajusta os totais por
+diferença a cada escrita no backend, em vez de percorrer todos os itens e
+parcelas a cada requisição. Na virada do mês os totais são recalculados.
+
+Contribuições e totais ficam em centavos inteiros (utils.to_cents): somas e
+subtrações repetidas não acumulam erro de arredondamento e os totais batem
+sempre com calculate_monthly_payments.
+"""
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+
+from models import PaymentSummary
+from storage.base import StorageListener
+from utils import (
+    calculate_item_totals, calculate_items_totals, build_payment_summary,
+    get_current_month_year, to_cents, to_payment_item
+)
+
+class SummaryIndex(StorageListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Mês (MM/YYYY) para o qual as contribuições foram calculadas; None = não carregado
+        self._month: Optional[str] = None
+        self._contributions: Dict[str, Tuple[Union[int, float], ...]] = {}
+        self._totals = [0] * 6
+        # Contribuições não finitas (inf/NaN) por total, contadas à parte para não estragar as somas
+        self._non_finite = [Counter() for _ in range(6)]
+        self._non_finite_count = 0
+        # Contas parceladas ativas já quitadas (contam nos totais, mas ficam fora de itens)
+        self._paid_off: Set[str] = set()
+        self.rebuilds = 0
+
+    def _add(self, item: Dict[str, Any], contribution: Tuple[Tuple[float, ...], bool] = None):
+        if not item.get('ativo', True):
+            return
+        valores, quitado = contribution or calculate_item_totals(item, self._month)
+        centavos = to_cents(valores)
+        self._contributions[item['id']] = centavos
+        for i, valor in enumerate(centavos):
+            if isinstance(valor, int):
+                self._totals[i] += valor
+            else:
+                self._non_finite[i][str(valor)] += 1
+                self._non_finite_count += 1
+        if quitado:
+            self._paid_off.add(item['id'])
+
+    def _remove(self, item_id: str):
+        valores = self._contributions.pop(item_id, None)
+        if valores is None:
+            return
+        self._paid_off.discard(item_id)
+        for i, valor in enumerate(valores):
+            if isinstance(valor, int):
+                self._totals[i] -= valor
+            else:
+                self._non_finite[i][str(valor)] -= 1
+                self._non_finite_count -= 1
+
+    def _rebuild(self, items: List[Dict[str, Any]], month: str):
+        """Recalcula tudo a partir dos itens"""
+        self._month = month
+        self._contributions = {}
+        self._totals = [0] * 6
+        self._non_finite = [Counter() for _ in range(6)]
+        self._non_finite_count = 0
+        self._paid_off = set()
+        active_items = [item for item in items if item.get('ativo', True)]
+        for item, contribution in zip(active_items, calculate_items_totals(active_items, month)):
+            self._add(item, contribution)
+        self.rebuilds += 1
+
+    def _current_totals(self) -> List[Union[int, float]]:
+        """Totais em centavos; inf/NaN se algum item contribui com valor não finito"""
+        if not self._non_finite_count:
+            return list(self._totals)
+        return [
+            sum(map(float, non_finite.elements()), float(total)) if +non_finite else total
+            for total, non_finite in zip(self._totals, self._non_finite)
+        ]
+
+    def on_load(self, items: List[Dict[str, Any]]):
+        with self._lock:
+            self._rebuild(items, get_current_month_year())
+
+    def on_upsert(self, old_item: Optional[Dict[str, Any]], new_item: Dict[str, Any]):
+        with self._lock:
+            if self._month is None:
+                return
+            if old_item is not None:
+                self._remove(old_item['id'])
+            self._add(new_item)
+
+    def on_delete(self, old_item: Dict[str, Any]):
+        with self._lock:
+            if self._month is not None:
+                self._remove(old_item['id'])
+
+    def totals(self, items: List[Dict[str, Any]]) -> Tuple[List[int], Set[str]]:
+        """
+        Retorna os totais (em centavos) e os IDs das contas quitadas
+
+        items (a lista completa atual) só é percorrida se o índice ainda não foi
+        carregado ou se o mês virou desde o último cálculo.
+        """
+        month = get_current_month_year()
+        with self._lock:
+            if month != self._month:
+                self._rebuild(items, month)
+            return self._current_totals(), set(self._paid_off)
+
+    def current_totals(self) -> Optional[List[int]]:
+        """Totais já calculados para o mês atual, sem percorrer itens; None se precisam de totals(items)"""
+        month = get_current_month_year()
+        with self._lock:
+            return self._current_totals() if month == self._month else None
+
+    def summary_parts(self, items: List[Dict[str, Any]]) -> Tuple[List[int], List[Dict[str, Any]]]:
+        """Totais e itens listados no resumo (ativos e não quitados), na ordem de items"""
+        totais, paid_off = self.totals(items)
+        return totais, [item for item in items if item.get('ativo', True) and item['id'] not in paid_off]
+
+    def summary(self, items: List[Dict[str, Any]]) -> PaymentSummary:
+        """Resumo mensal equivalente a calculate_monthly_payments(items)"""
+        totais, summary_items = self.summary_parts(items)
+        return build_payment_summary(totais, [to_payment_item(item) for item in summary_items])
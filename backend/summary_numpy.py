@@ -0,0 +1,136 @@
+"""
+Cálculo vetorizado (NumPy) das contribuições dos itens para o resumo mensal
+
+Ativado com SUMMARY_ENGINE=numpy (ver utils.calculate_items_totals). Achata as
+parcelas de todos os itens em arrays contíguos (valores, pagamentos, mês atual)
+e calcula os valores de utils.calculate_item_totals com operações mascaradas.
+As parcelas compactas do cache (installments.CompactInstallments) já estão em
+arrays e são só concatenadas.
+
+O resultado é idêntico bit a bit ao cálculo em Python: as somas por item são
+feitas na mesma ordem do laço original, e as somas feitas com sum() reproduzem
+o algoritmo do Python em uso (soma simples até o 3.11, soma compensada de
+Neumaier a partir do 3.12).
+"""
+import sys
+from itertools import chain
+from operator import attrgetter, itemgetter, methodcaller
+from typing import List, Dict, Any, Tuple
+
+from installments import CompactInstallments, RecurringInstallments, PAGO_PESSOA1, PAGO_PESSOA2, canonical_month_key
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele o cálculo em Python é usado
+    np = None
+
+# sum() de floats usa soma compensada (Neumaier) a partir do Python 3.12
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+def is_available() -> bool:
+    return np is not None
+
+def _sequential_sum(rows: 'np.ndarray', values: 'np.ndarray', count: int) -> 'np.ndarray':
+    """Soma os valores de cada item com `+=` na ordem das parcelas, como o laço original"""
+    total = np.zeros(count)
+    # ufunc.at não usa buffer: aplica as somas exatamente na ordem dos índices
+    np.add.at(total, rows, values)
+    return total
+
+def _python_sum(rows: 'np.ndarray', cols: 'np.ndarray', values: 'np.ndarray', count: int) -> 'np.ndarray':
+    """Soma os valores de cada item exatamente como sum() do Python faria"""
+    if not _COMPENSATED_SUM:
+        return _sequential_sum(rows, values, count)
+    
+    # Soma compensada, coluna a coluna (parcela 1, 2, ...) em todos os itens ao mesmo tempo
+    dense = np.zeros((count, int(cols.max()) + 1 if len(cols) else 0))
+    dense[rows, cols] = values
+    total = np.zeros(count)
+    compensation = np.zeros(count)
+    for j in range(dense.shape[1]):
+        x = dense[:, j]
+        t = total + x
+        compensation += np.where(np.abs(total) >= np.abs(x), (total - t) + x, (x - t) + total)
+        total = t
+    return np.where((compensation != 0) & np.isfinite(compensation), total + compensation, total)
+
+def _dict_columns(parcelas_por_item: List[Any], current_month: str, total: int) -> Tuple['np.ndarray', ...]:
+    """Parcelas (dicionários) de todos os itens em arrays contíguos; a extração roda toda em C (map/itemgetter)"""
+    parcelas = list(chain.from_iterable(parcelas_por_item))
+    
+    def column(getter, dtype):
+        return np.fromiter(map(getter, parcelas), dtype=dtype, count=total)
+    
+    mes_atual = np.fromiter(map(current_month.__eq__, map(itemgetter('mes'), parcelas)), dtype=bool, count=total)
+    valor1 = column(itemgetter('valor_pessoa1'), np.float64)
+    valor2 = column(itemgetter('valor_pessoa2'), np.float64)
+    pago1 = column(methodcaller('get', 'pago_pessoa1', False), bool)
+    pago2 = column(methodcaller('get', 'pago_pessoa2', False), bool)
+    return mes_atual, valor1, valor2, pago1, pago2
+
+def _compact_columns(parcelas_por_item: List[Any], current_month: str) -> Tuple['np.ndarray', ...]:
+    """Parcelas compactas (CompactInstallments) de todos os itens, concatenando os arrays sem conversão"""
+    compactas = [parcelas for parcelas in parcelas_por_item if parcelas]
+    
+    def column(attribute, dtype):
+        # bytes.join copia os buffers dos arrays direto, sem criar um ndarray por item
+        return np.frombuffer(b''.join(map(attrgetter(attribute), compactas)), dtype=dtype)
+    
+    months = column('months', np.intc)
+    pagos = column('pagos', np.uint8)
+    key = canonical_month_key(current_month)
+    mes_atual = months == key if key is not None else np.zeros(len(months), dtype=bool)
+    pago1 = (pagos & PAGO_PESSOA1) != 0
+    pago2 = (pagos & PAGO_PESSOA2) != 0
+    return mes_atual, column('valores_pessoa1', np.float64), column('valores_pessoa2', np.float64), pago1, pago2
+
+def calculate_items_totals(items: List[Dict[str, Any]], current_month: str) -> List[Tuple[Tuple[float, ...], bool]]:
+    """Mesmo resultado de [calculate_item_totals(item, current_month) for item in items]"""
+    from utils import calculate_item_totals
+    
+    n = len(items)
+    if n == 0:
+        return []
+    
+    # Regras de conta fixa (sem parcelas materializadas) seguem pelo cálculo direto, como os itens antigos
+    parcelas_por_item = [
+        () if isinstance(parcelas, RecurringInstallments) else parcelas or ()
+        for parcelas in (item.get('parcelas_mensais') for item in items)
+    ]
+    lengths = np.fromiter(map(len, parcelas_por_item), dtype=np.intp, count=n)
+    total = int(lengths.sum())
+    
+    if all(isinstance(parcelas, (CompactInstallments, tuple)) for parcelas in parcelas_por_item):
+        mes_atual, valor1, valor2, pago1, pago2 = _compact_columns(parcelas_por_item, current_month)
+    else:
+        mes_atual, valor1, valor2, pago1, pago2 = _dict_columns(parcelas_por_item, current_month, total)
+    
+    # Item e posição (parcela 0, 1, ...) de cada elemento
+    rows = np.repeat(np.arange(n), lengths)
+    cols = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    
+    mensal1 = _sequential_sum(rows, np.where(mes_atual, valor1, 0.0), n).tolist()
+    mensal2 = _sequential_sum(rows, np.where(mes_atual, valor2, 0.0), n).tolist()
+    atual1 = _sequential_sum(rows, np.where(mes_atual & ~pago1, valor1, 0.0), n).tolist()
+    atual2 = _sequential_sum(rows, np.where(mes_atual & ~pago2, valor2, 0.0), n).tolist()
+    
+    valor = np.fromiter((item['valor'] for item in items), dtype=np.float64, count=n)
+    percentual1 = np.fromiter((item['percentual_pessoa1'] for item in items), dtype=np.float64, count=n)
+    percentual2 = np.fromiter((item['percentual_pessoa2'] for item in items), dtype=np.float64, count=n)
+    restante1 = (valor * percentual1 / 100 - _python_sum(rows, cols, np.where(pago1, valor1, 0.0), n)).tolist()
+    restante2 = (valor * percentual2 / 100 - _python_sum(rows, cols, np.where(pago2, valor2, 0.0), n)).tolist()
+    
+    quitadas = np.bincount(rows, weights=pago1 & pago2, minlength=n)
+    quitado = (quitadas == lengths).tolist()
+    
+    results = []
+    for i, item in enumerate(items):
+        if not parcelas_por_item[i]:
+            # Lógica antiga (sem parcelas mensais) ou regra de conta fixa: cálculo direto
+            results.append(calculate_item_totals(item, current_month))
+        elif item.get('conta_fixa', False):
+            results.append(((mensal1[i], mensal2[i], 0.0, 0.0, atual1[i], atual2[i]), False))
+        else:
+            results.append(((mensal1[i], mensal2[i], restante1[i], restante2[i], atual1[i], atual2[i]), quitado[i]))
+    
+    return results
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Sincroniza os itens entre dois backends de armazenamento
+
+Uso típico com STORAGE_BACKEND=sqlite: o SQLite é a fonte da verdade e a
+planilha do Google Sheets vira uma réplica/exportação, atualizada com
+    python sync_storage.py --source sqlite --target sheets
+
+Para a carga inicial do SQLite a partir da planilha existente:
+    python sync_storage.py --source sheets --target sqlite
+
+Itens existentes no destino são sobrescritos em uma única gravação, itens novos
+são adicionados com o mesmo ID e, com --prune, itens que não existem mais na
+origem são removidos do destino.
+
+Uso (a partir de backend/):
+    python sync_storage.py --source {sheets,sqlite} --target {sheets,sqlite} [--prune]
+"""
+import sys
+import argparse
+
+from storage.factory import create_storage_backend, STORAGE_BACKEND_SHEETS, STORAGE_BACKEND_SQLITE
+
+def sync(source, target, prune: bool = False):
+    """Copia os itens de source para target; retorna (atualizados, adicionados, removidos)"""
+    source_items = {item['id']: item for item in source.get_all_items()}
+    target_ids = {item['id'] for item in target.get_all_items(include_installments=False)}
+    
+    existing = {item_id: item for item_id, item in source_items.items() if item_id in target_ids}
+    if existing:
+        target.save_items(existing)
+    
+    added = 0
+    for item_id, item in source_items.items():
+        if item_id not in target_ids:
+            target.add_item(item)
+            added += 1
+    
+    removed = 0
+    if prune:
+        for item_id in target_ids - source_items.keys():
+            if target.delete_item(item_id):
+                removed += 1
+    
+    return len(existing), added, removed
+
+def main():
+    backends = [STORAGE_BACKEND_SHEETS, STORAGE_BACKEND_SQLITE]
+    parser = argparse.ArgumentParser(description="Sincroniza os itens entre o Google Sheets e o SQLite")
+    parser.add_argument('--source', required=True, choices=backends, help="backend de origem")
+    parser.add_argument('--target', required=True, choices=backends, help="backend de destino")
+    parser.add_argument('--prune', action='store_true', help="remove do destino os itens que não existem na origem")
+    args = parser.parse_args()
+    
+    if args.source == args.target:
+        print("❌ Origem e destino devem ser diferentes")
+        return 1
+    
+    try:
+        updated, added, removed = sync(
+            create_storage_backend(args.source),
+            create_storage_backend(args.target),
+            prune=args.prune
+        )
+    except Exception as e:
+        print(f"❌ Erro na sincronização: {e}")
+        return 1
+    
+    print(f"✅ {args.source} → {args.target}: {updated} atualizados, {added} adicionados, {removed} removidos")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Configuração comum dos testes do backend
+
+Os testes rodam sobre o Google Sheets simulado (fake_sheets.py) ou sobre o
+SQLite em memória, sem credenciais. Uso (a partir de backend/):
+    python -m pytest -q
+"""
+import os
+import sys
+import logging
+import warnings
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main_service
+from async_storage import AsyncStorage
+from dependencies.auth import get_current_user
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')
+    from fastapi.testclient import TestClient
+
+logging.disable(logging.INFO)
+
+@pytest.fixture
+def use_storage():
+    """Aponta a API para o backend informado; retorna a fachada AsyncStorage criada"""
+    created = []
+
+    def use(manager) -> AsyncStorage:
+        storage = AsyncStorage(manager)
+        created.append(storage)
+        main_service.storage_backend = manager
+        main_service.storage_facade = storage
+        main_service.app.dependency_overrides[get_current_user] = lambda: {'uid': 'teste'}
+        return storage
+
+    yield use
+
+    main_service.storage_backend = None
+    main_service.storage_facade = None
+    main_service.app.dependency_overrides.pop(get_current_user, None)
+    for storage in created:
+        storage.shutdown()
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(main_service.app)
@@ -0,0 +1,41 @@
+"""
+Timeout das chamadas do AsyncStorage: leituras expiram, escritas esperam o resultado
+"""
+import asyncio
+
+import pytest
+
+from async_storage import AsyncStorage
+from benchmarks.datasets import make_items, make_manager
+
+@pytest.fixture
+def slow_storage():
+    items = make_items(5)
+    manager = make_manager(items)
+    manager.get_all_items()
+    # Cada chamada à planilha demora mais que o timeout das leituras
+    manager.service.latency = 0.1
+    storage = AsyncStorage(manager, timeout=0.02)
+    yield storage, items[1]
+    storage.shutdown()
+
+def test_reads_time_out(slow_storage):
+    storage, item = slow_storage
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(storage.load_item(item['id']))
+
+def test_writes_wait_for_the_backend(slow_storage):
+    storage, item = slow_storage
+
+    def rename(stored):
+        stored['nome'] = 'Renomeado'
+
+    saved = asyncio.run(storage.modify_item(item['id'], rename))
+    item_id = asyncio.run(storage.add_item({**item, 'id': None, 'nome': 'Novo'}))
+
+    # O retorno é o que foi gravado: nada fica pendente depois da resposta
+    names = {stored['id']: stored['nome'] for stored in storage.manager.get_all_items()}
+    assert saved['nome'] == names[item['id']] == 'Renomeado'
+    assert names[item_id] == 'Novo'
+    assert len(names) == 6
@@ -0,0 +1,41 @@
+"""
+Versão dos dados (ETag) só muda quando o conteúdo muda
+"""
+from async_storage import AsyncStorage
+from benchmarks.datasets import make_items, make_manager
+
+def test_version_ignores_reads_and_unchanged_writes():
+    items = make_items(10)
+    manager = make_manager(items)
+    storage = AsyncStorage(manager)
+    try:
+        manager.get_all_items()
+        etag = storage.data_version.etag()
+        item_id = items[1]['id']
+
+        # Leitura para escrita (batchGet da linha, igual ao cache) e gravação sem alterações
+        manager.load_item(item_id)
+        manager.modify_item(item_id, lambda item: None)
+        assert storage.data_version.etag() == etag
+
+        def rename(item):
+            item['nome'] = 'Outro nome'
+
+        manager.modify_item(item_id, rename)
+        assert storage.data_version.etag() != etag
+    finally:
+        storage.shutdown()
+
+def test_version_follows_rows_changed_outside_the_api():
+    items = make_items(10)
+    manager = make_manager(items)
+    storage = AsyncStorage(manager)
+    try:
+        manager.get_all_items()
+        etag = storage.data_version.etag()
+        # Nome alterado direto na planilha: a próxima leitura da linha traz a mudança
+        manager.service.sheets[manager.sheet_name][2][1] = 'Editado na planilha'
+        assert manager.load_item(items[1]['id'])['nome'] == 'Editado na planilha'
+        assert storage.data_version.etag() != etag
+    finally:
+        storage.shutdown()
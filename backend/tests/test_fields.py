@@ -0,0 +1,56 @@
+"""
+Campos das respostas escolhidos por fields= / exclude= em /payments/items e /payments/summary
+"""
+import pytest
+
+from benchmarks.datasets import make_items, make_manager
+from json_responses import ITEM_FIELDS
+
+@pytest.fixture
+def manager(use_storage):
+    manager = make_manager(make_items(12))
+    use_storage(manager)
+    return manager
+
+def _without(content: dict, *names) -> dict:
+    return {key: value for key, value in content.items() if key not in names}
+
+@pytest.mark.parametrize('params', [{}, {'limit': 5}], ids=['todos', 'pagina'])
+def test_items_without_installments(manager, client, params):
+    full = client.get('/payments/items', params=params).json()
+
+    response = client.get('/payments/items', params={**params, 'exclude': 'parcelas_mensais'})
+
+    assert response.status_code == 200
+    assert response.json() == [_without(item, 'parcelas_mensais') for item in full]
+
+def test_item_fields_keep_the_model_order(manager, client):
+    response = client.get('/payments/items', params={'fields': 'nome, id,ativo', 'exclude': 'ativo'})
+
+    items = response.json()
+    assert [list(item) for item in items] == [['id', 'nome']] * len(items)
+
+def test_summary_projection(manager, client):
+    full = client.get('/payments/summary').json()
+
+    totals = client.get('/payments/summary', params={'exclude': 'itens'}).json()
+    assert totals == _without(full, 'itens')
+
+    slim = client.get('/payments/summary', params={'exclude': 'itens.parcelas_mensais'}).json()
+    assert slim == {**full, 'itens': [_without(item, 'parcelas_mensais') for item in full['itens']]}
+
+    picked = client.get('/payments/summary', params={'fields': 'total_pessoa1,itens.id'}).json()
+    assert picked == {'total_pessoa1': full['total_pessoa1'], 'itens': [{'id': item['id']} for item in full['itens']]}
+
+@pytest.mark.parametrize('path, params', [
+    ('/payments/items', {'fields': 'nome,senha'}),
+    ('/payments/items', {'exclude': 'itens.nome'}),
+    ('/payments/summary', {'exclude': 'parcelas_mensais'})
+])
+def test_unknown_fields_are_rejected(manager, client, path, params):
+    assert client.get(path, params=params).status_code == 400
+
+def test_every_item_field_can_be_selected(manager, client):
+    for name in ITEM_FIELDS:
+        items = client.get('/payments/items', params={'fields': name}).json()
+        assert all(list(item) == [name] for item in items)
@@ -0,0 +1,137 @@
+"""
+Parcelas compactas (CompactInstallments) contra a lista de dicionários original e
+contas fixas como regra de recorrência (RecurringInstallments)
+"""
+import json
+
+import pytest
+
+import installments
+from benchmarks.datasets import make_items, make_manager
+from installments import CompactInstallments, RecurringInstallments, compact_installments, month_key
+
+def _parcela(mes: str, valor1, valor2, pago1: bool = False, pago2: bool = False) -> dict:
+    return {'mes': mes, 'valor_pessoa1': valor1, 'valor_pessoa2': valor2, 'pago_pessoa1': pago1, 'pago_pessoa2': pago2}
+
+# Mês repetido, meses fora de ordem e com intervalo, todas as combinações de pagamento
+PARCELAS = [
+    _parcela('01/2025', 10.5, 20.25, True, True),
+    _parcela('01/2025', 1.0, 2.0, False, True),
+    _parcela('03/2025', 30.0, 40.0, True, False),
+    _parcela('12/2024', 5.0, 6.0)
+]
+
+def test_compact_installments_round_trip():
+    compact = CompactInstallments.from_dicts(PARCELAS)
+
+    assert compact.to_dicts() == PARCELAS
+    assert list(compact) == PARCELAS
+    assert compact == PARCELAS and compact == CompactInstallments.from_dicts(PARCELAS)
+    assert [compact[i] for i in range(-len(PARCELAS), 0)] == PARCELAS
+    assert [p.model_dump() for p in compact.to_models()] == PARCELAS
+
+def test_compact_installments_answer_like_the_list():
+    compact = CompactInstallments.from_dicts(PARCELAS)
+
+    for mes in ('01/2025', '02/2025', '03/2025', '12/2024', '1/2025', 'janeiro'):
+        do_mes = [p for p in PARCELAS if p['mes'] == mes]
+        assert compact.has_month(mes) == bool(do_mes)
+        assert compact.month_totals(mes) == (
+            sum(p['valor_pessoa1'] for p in do_mes), sum(p['valor_pessoa2'] for p in do_mes),
+            sum(p['valor_pessoa1'] for p in do_mes if not p['pago_pessoa1']),
+            sum(p['valor_pessoa2'] for p in do_mes if not p['pago_pessoa2'])
+        )
+    assert compact.paid_totals() == (40.5, 22.25)
+    assert compact.paid_count() == 1
+
+def test_integer_values_become_floats():
+    compact = CompactInstallments.from_dicts([_parcela('01/2025', 10, 20)])
+    assert compact[0]['valor_pessoa1'] == 10.0 and isinstance(compact[0]['valor_pessoa1'], float)
+
+@pytest.mark.parametrize('parcela', [
+    {**_parcela('01/2025', 10.0, 20.0), 'observacao': 'chave extra'},
+    {k: v for k, v in _parcela('01/2025', 10.0, 20.0).items() if k != 'pago_pessoa2'},
+    _parcela('1/2025', 10.0, 20.0),
+    _parcela('13/2025', 10.0, 20.0),
+    _parcela('01/2025', '10,00', 20.0),
+    _parcela('01/2025', 10.0, 20.0, pago1='sim')
+], ids=['chave-extra', 'chave-faltando', 'mes-sem-zero', 'mes-invalido', 'valor-texto', 'pago-texto'])
+def test_installments_that_do_not_fit_keep_the_list(parcela):
+    parcelas = [_parcela('12/2024', 1.0, 2.0), parcela]
+    assert CompactInstallments.from_dicts(parcelas) is None
+    assert compact_installments(parcelas) is parcelas
+
+def test_cached_items_keep_compact_installments():
+    items = make_items(10)
+    manager = make_manager(items)
+
+    cached = manager.get_all_items()
+
+    listas = [item['parcelas_mensais'] for item in cached if not item['conta_fixa']]
+    assert all(isinstance(parcelas, CompactInstallments) for parcelas in listas)
+    assert cached == items
+
+@pytest.fixture
+def june_2025(monkeypatch):
+    """Mês atual fixo em 06/2025 e janela de 12 meses à frente"""
+    monkeypatch.setattr(installments, 'current_month_key', lambda: month_key('06/2025'))
+    monkeypatch.setattr(installments, 'FIXED_BILLS_MONTHS_AHEAD', 12)
+
+def test_rule_materializes_a_window_ahead_of_the_current_month(june_2025):
+    rule = RecurringInstallments(month_key('03/2025'), 50.0, 25.0, [month_key('04/2025')])
+
+    parcelas = rule.to_dicts()
+    assert len(rule) == len(parcelas) == 15
+    assert (parcelas[0]['mes'], parcelas[-1]['mes']) == ('03/2025', '05/2026')
+    assert [p['mes'] for p in parcelas if p['pago_pessoa1']] == ['04/2025']
+
+    # Pagamento adiantado estende a janela até 12 meses depois dele
+    rule.set_paid('01/2027', 'pessoa2')
+    assert rule.to_dicts()[-1]['mes'] == '12/2027'
+
+def test_rule_has_no_end_date(june_2025):
+    rule = RecurringInstallments(month_key('03/2025'), 50.0, 25.0)
+
+    assert rule.has_month('01/2040') and not rule.has_month('02/2025')
+    assert rule.month_totals('01/2040') == (50.0, 25.0, 50.0, 25.0)
+    assert rule.installment(month_key('02/2025')) is None
+    with pytest.raises(LookupError):
+        rule.set_paid('02/2025', 'pessoa1')
+
+def test_rule_json_round_trip():
+    rule = RecurringInstallments(month_key('03/2025'), 50.0, 25.0, [month_key('05/2025')], [month_key('04/2025')])
+
+    data = rule.to_json()
+    assert data == {'inicio': '03/2025', 'valor_pessoa1': 50.0, 'valor_pessoa2': 25.0,
+                    'pagos_pessoa1': ['05/2025'], 'pagos_pessoa2': ['04/2025']}
+    assert RecurringInstallments.from_json(json.loads(json.dumps(data))) == rule
+
+def test_materialized_fixed_bills_become_a_rule(june_2025):
+    parcelas = [_parcela('03/2025', 50.0, 25.0, True, True), _parcela('05/2025', 50.0, 25.0)]
+
+    rule = RecurringInstallments.from_dicts(parcelas)
+    assert rule.to_json()['inicio'] == '03/2025' and rule.to_json()['pagos_pessoa1'] == ['03/2025']
+    # O mês que faltava na lista passa a existir, não pago
+    assert rule.installment(month_key('04/2025')) == _parcela('04/2025', 50.0, 25.0)
+
+    assert RecurringInstallments.from_dicts(parcelas + [_parcela('06/2025', 60.0, 25.0)]) is None
+    assert RecurringInstallments.from_dicts(parcelas[::-1]) is None
+
+def test_fixed_bill_is_stored_as_a_rule(use_storage, client):
+    manager = make_manager([])
+    use_storage(manager)
+
+    response = client.post('/payments/items', json={
+        'nome': 'Aluguel', 'valor': 1000.0, 'parcelas': 1, 'percentual_pessoa1': 60.0,
+        'percentual_pessoa2': 40.0, 'conta_fixa': True
+    })
+    assert response.status_code == 200
+    item_id = response.json()['id']
+
+    (row,) = manager.service.sheets[manager.sheet_name][1:]
+    stored = json.loads(row[13])
+    assert stored['valor_pessoa1'] == 600.0 and stored['pagos_pessoa1'] == []
+
+    pay = client.put(f'/payments/items/{item_id}/installments/pay', params={'mes': '01/2040', 'pessoa': 'pessoa1'})
+    assert pay.status_code == 200
+    assert json.loads(manager.service.sheets[manager.sheet_name][1][13])['pagos_pessoa1'] == ['01/2040']
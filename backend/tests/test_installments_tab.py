@@ -0,0 +1,141 @@
+"""
+Parcelas na aba dedicada (INSTALLMENTS_LAYOUT=tab) e migração com migrate_parcelas.py
+"""
+import sys
+
+import pytest
+
+import migrate_parcelas
+from benchmarks.datasets import make_items, make_manager
+from fake_sheets import FakeSheetsService
+from google_sheets_service import GoogleSheetsServiceManager
+
+def _parcela(mes: str, valor: float) -> dict:
+    return {'mes': mes, 'valor_pessoa1': valor, 'valor_pessoa2': valor, 'pago_pessoa1': False, 'pago_pessoa2': False}
+
+def _item(parcelas_mensais: list) -> dict:
+    return {
+        'nome': 'Compra', 'valor': 60.0, 'parcelas': len(parcelas_mensais), 'percentual_pessoa1': 50.0,
+        'percentual_pessoa2': 50.0, 'data_criacao': '2025-01-01 00:00:00', 'ativo': True, 'conta_fixa': False,
+        'valor_manual_pessoa1': None, 'valor_manual_pessoa2': None, 'pago_pessoa1': False, 'pago_pessoa2': False,
+        'parcelas_mensais': parcelas_mensais, 'comecar_mes_atual': True
+    }
+
+def _reloaded(manager) -> dict:
+    """Itens lidos da planilha por um novo gerenciador sobre o mesmo serviço"""
+    return {item['id']: item for item in GoogleSheetsServiceManager(service=manager.service).get_all_items()}
+
+@pytest.fixture
+def tab_layout(monkeypatch):
+    monkeypatch.setenv('INSTALLMENTS_LAYOUT', 'tab')
+
+@pytest.fixture
+def migrated(monkeypatch):
+    """Planilha com parcelas em JSON migrada pelo migrate_parcelas.py; retorna (gerenciador 'tab', itens)"""
+    items = make_items(10)
+    manager = make_manager(items)
+    monkeypatch.setattr(migrate_parcelas, 'GoogleSheetsServiceManager', lambda: manager)
+    monkeypatch.setattr(sys, 'argv', ['migrate_parcelas.py'])
+    assert migrate_parcelas.main() == 0
+
+    monkeypatch.setenv('INSTALLMENTS_LAYOUT', 'tab')
+    tab_manager = GoogleSheetsServiceManager(service=manager.service)
+    tab_manager.get_all_items()
+    tab_manager.service.reset_calls()
+    return tab_manager, items
+
+def test_migration_moves_installments_to_the_tab(migrated):
+    manager, items = migrated
+    installment_rows = manager.service.sheets[manager.installments_sheet_name][1:]
+
+    assert len(installment_rows) == sum(len(item['parcelas_mensais']) for item in items)
+    assert all(row[13] == '' for row in manager.service.sheets[manager.sheet_name][1:])
+    assert manager.get_all_items() == items
+
+def test_migration_refuses_a_tab_with_installments(migrated):
+    manager, _ = migrated
+    with pytest.raises(ValueError):
+        manager.migrate_installments_to_tab()
+
+def test_installments_in_the_same_month_round_trip(tab_layout):
+    manager = GoogleSheetsServiceManager(service=FakeSheetsService())
+    parcelas = [_parcela('01/2025', 10.0), _parcela('01/2025', 20.0), _parcela('02/2025', 30.0)]
+    item_id = manager.add_item(_item(parcelas))
+
+    def pay_second(item):
+        item['parcelas_mensais'][1]['pago_pessoa1'] = True
+
+    manager.modify_item(item_id, pay_second)
+
+    stored = _reloaded(manager)[item_id]['parcelas_mensais']
+    assert [p['valor_pessoa1'] for p in stored] == [10.0, 20.0, 30.0]
+    assert [p['pago_pessoa1'] for p in stored] == [False, True, False]
+
+def test_payment_writes_a_single_cell(migrated):
+    manager, items = migrated
+    item = items[1]
+    position = next(i for i, p in enumerate(item['parcelas_mensais']) if not p['pago_pessoa2'])
+    before = [list(row) for row in manager.service.sheets[manager.installments_sheet_name]]
+
+    def pay(loaded):
+        loaded['parcelas_mensais'][position]['pago_pessoa2'] = True
+
+    manager.modify_item(item['id'], pay)
+
+    after = manager.service.sheets[manager.installments_sheet_name]
+    changed = [(r, c) for r, row in enumerate(after) for c, value in enumerate(row) if before[r][c] != value]
+    assert len(changed) == 1
+    assert manager.service.calls == {'values.batchGet': 1, 'values.batchUpdate': 1}
+    assert _reloaded(manager)[item['id']]['parcelas_mensais'][position]['pago_pessoa2'] is True
+
+def test_delete_removes_the_installment_rows(migrated):
+    manager, items = migrated
+    deleted, other = items[2], items[5]
+    rows_before = len(manager.service.sheets[manager.installments_sheet_name])
+
+    assert manager.delete_item(deleted['id'])
+
+    installment_rows = manager.service.sheets[manager.installments_sheet_name]
+    assert len(installment_rows) == rows_before - len(deleted['parcelas_mensais'])
+    assert all(row and row[0] for row in installment_rows)
+
+    # O índice das linhas seguintes foi deslocado: o pagamento cai na parcela certa
+    def pay_last(item):
+        item['parcelas_mensais'][-1]['pago_pessoa1'] = True
+
+    manager.modify_item(other['id'], pay_last)
+    reloaded = _reloaded(manager)
+    assert deleted['id'] not in reloaded
+    assert reloaded[other['id']]['parcelas_mensais'][-1]['pago_pessoa1'] is True
+    assert reloaded == {item['id']: item for item in manager.get_all_items()}
+
+def test_removed_installments_are_deleted_from_the_tab(tab_layout):
+    manager = GoogleSheetsServiceManager(service=FakeSheetsService())
+    first = manager.add_item(_item([_parcela('01/2025', 10.0), _parcela('02/2025', 10.0), _parcela('03/2025', 10.0)]))
+    second = manager.add_item(_item([_parcela('01/2025', 5.0)]))
+
+    def keep_first_installment(item):
+        del item['parcelas_mensais'][1:]
+
+    manager.modify_item(first, keep_first_installment)
+    manager.update_item(second, {'parcelas_mensais': [_parcela('01/2025', 7.0)]})
+
+    assert len(manager.service.sheets[manager.installments_sheet_name]) == 3
+    reloaded = _reloaded(manager)
+    assert reloaded[first]['parcelas_mensais'] == [_parcela('01/2025', 10.0)]
+    assert reloaded[second]['parcelas_mensais'] == [_parcela('01/2025', 7.0)]
+
+def test_delete_uses_the_sheet_id_of_the_items_tab():
+    items = make_items(3)
+    service = FakeSheetsService(sheets={'Resumo': [['não apagar']], 'Sheet1': []})
+    manager = GoogleSheetsServiceManager(service=service)
+    service.sheets['Sheet1'].extend(manager._item_to_row(item['id'], item) for item in items)
+    manager.invalidate_cache()
+    manager.get_all_items()
+
+    # sheetId guardado de uma aba que não existe mais: a escrita reverifica o esquema e repete
+    manager._sheet_ids['Sheet1'] = 99
+    assert manager.delete_item(items[1]['id'])
+
+    assert service.sheets['Resumo'] == [['não apagar']]
+    assert list(_reloaded(manager)) == [items[0]['id'], items[2]['id']]
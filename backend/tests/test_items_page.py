@@ -0,0 +1,91 @@
+"""
+Listagem filtrada e paginada de /payments/items (ItemsIndex) contra o filtro direto sobre os itens
+"""
+import pytest
+
+from benchmarks.datasets import make_items, make_manager
+from installments import canonical_month_key, current_month_key, month_from_key
+
+@pytest.fixture
+def items(use_storage):
+    items = make_items(40)
+    for i, item in enumerate(items):
+        item['ativo'] = i % 3 != 0
+        item['nome'] = f'{"Mercado" if i % 4 == 0 else "Item"} {i}'
+    use_storage(make_manager(items))
+    return items
+
+def _expected(items, ativo=None, conta_fixa=None, mes_inicio=None, mes_fim=None, nome_prefixo=None):
+    first = canonical_month_key(mes_inicio) if mes_inicio else None
+    last = canonical_month_key(mes_fim) if mes_fim else None
+    return [
+        item['id'] for item in items
+        if (ativo is None or item['ativo'] == ativo)
+        and (conta_fixa is None or item['conta_fixa'] == conta_fixa)
+        and (nome_prefixo is None or item['nome'].lower().startswith(nome_prefixo.lower()))
+        and (first is None and last is None or any(
+            (first is None or key >= first) and (last is None or key <= last)
+            for key in (canonical_month_key(p['mes']) for p in item['parcelas_mensais'])
+        ))
+    ]
+
+def _all_pages(client, **params) -> list:
+    ids = []
+    cursor = None
+    while True:
+        response = client.get('/payments/items', params={**params, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = [item['id'] for item in response.json()]
+        assert len(page) <= params.get('limit', 1000)
+        ids.extend(page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'ativo': False},
+    {'ativo': True, 'conta_fixa': False},
+    {'conta_fixa': True},
+    {'nome_prefixo': 'MERC'},
+    {'mes_inicio': 6},
+    {'mes_fim': -3},
+    {'mes_inicio': -2, 'mes_fim': 1, 'ativo': True}
+], ids=repr)
+@pytest.mark.parametrize('limit', [1, 7, 1000])
+def test_pages_match_the_filtered_items(items, client, filters, limit):
+    # Meses dados em relação ao mês atual, como os itens sintéticos
+    filters = {key: month_from_key(current_month_key() + value) if key.startswith('mes') else value
+               for key, value in filters.items()}
+
+    assert _all_pages(client, limit=limit, **filters) == _expected(items, **filters)
+
+def test_cursor_is_stable_across_inserts_and_deletes(items, client):
+    first = client.get('/payments/items', params={'limit': 10})
+    page = [item['id'] for item in first.json()]
+    cursor = first.headers['X-Next-Cursor']
+
+    # Itens removidos antes e depois do cursor e um novo item no fim
+    assert client.delete(f'/payments/items/{page[3]}').status_code == 200
+    assert client.delete(f"/payments/items/{items[15]['id']}").status_code == 200
+    created = client.post('/payments/items', json={
+        'nome': 'Nova compra', 'valor': 100.0, 'parcelas': 2, 'percentual_pessoa1': 50.0, 'percentual_pessoa2': 50.0
+    }).json()['id']
+
+    rest = _all_pages(client, limit=10, cursor=cursor)
+    assert rest == [item['id'] for item in items[10:] if item['id'] != items[15]['id']] + [created]
+
+@pytest.mark.parametrize('params', [{'cursor': 'não é um cursor'}, {'mes_inicio': '13/2025'}, {'mes_fim': '2025-01'}])
+def test_invalid_parameters_are_rejected(items, client, params):
+    assert client.get('/payments/items', params=params).status_code == 400
+
+def test_unchanged_listing_answers_not_modified(items, client):
+    response = client.get('/payments/items', params={'limit': 5})
+    etag = response.headers['ETag']
+
+    assert client.get('/payments/items', params={'limit': 5}, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/payments/items', headers={'If-None-Match': etag}).status_code == 304
+
+    client.put(f"/payments/items/{items[1]['id']}", json={'nome': 'Renomeado'})
+    changed = client.get('/payments/items', params={'limit': 5}, headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
@@ -0,0 +1,217 @@
+"""
+Respostas JSON montadas direto dos itens (json_responses.py) contra o response_model
+
+Cada rota de leitura da API (main_service.app) é comparada, byte a byte, com a
+de uma API de referência que devolve os modelos pydantic pelo response_model,
+sobre os mesmos dados: itens sintéticos (benchmarks/datasets.py), casos de
+borda (contas fixas em regra, parcelas em lista com valores inteiros, textos
+com acentos, valores manuais, item sem parcelas, item inativo), valores não
+finitos e a planilha vazia (coleções vazias em todas as rotas).
+"""
+from typing import List, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main_service
+from async_storage import AsyncStorage
+from benchmarks.datasets import make_items, make_manager
+from installments import RecurringInstallments, current_month_key, iso_month_key, month_from_key
+from models import (
+    PaymentItem, PaymentSummary, MonthSummary, MonthInstallment, ForecastMonth, ReportMonth, AnnualReport,
+    OverdueSummary, OverdueInstallment
+)
+from utils import to_payment_item
+
+def edge_items() -> List[dict]:
+    """Itens com os tipos e valores menos comuns que o armazenamento pode devolver"""
+    base = {
+        'data_criacao': '2025-01-01 10:00:00', 'ativo': True, 'conta_fixa': False,
+        'valor_manual_pessoa1': None, 'valor_manual_pessoa2': None,
+        'pago_pessoa1': False, 'pago_pessoa2': False, 'comecar_mes_atual': True
+    }
+    mes = current_month_key()
+    return [
+        {**base, 'id': 'regra', 'nome': 'Água e luz — ção', 'valor': 250.0, 'parcelas': 1,
+         'percentual_pessoa1': 60.0, 'percentual_pessoa2': 40.0, 'conta_fixa': True,
+         'valor_manual_pessoa1': 150.0, 'valor_manual_pessoa2': 100.0,
+         'parcelas_mensais': RecurringInstallments(mes - 3, 150.0, 100.0, [mes - 3, mes - 2], [mes - 3])},
+        {**base, 'id': 'inteiros', 'nome': 'Inteiros "aspas" \\ barra', 'valor': 300, 'parcelas': 3,
+         'percentual_pessoa1': 50, 'percentual_pessoa2': 50, 'comecar_mes_atual': False,
+         'parcelas_mensais': [
+             {'mes': '01/2025', 'valor_pessoa1': 50, 'valor_pessoa2': 50, 'pago_pessoa1': True, 'pago_pessoa2': False},
+             {'mes': '02/2025', 'valor_pessoa1': 50.5, 'valor_pessoa2': 1e16},
+             {'mes': '3/2025', 'valor_pessoa1': 0.1, 'valor_pessoa2': 1e-7, 'pago_pessoa1': True, 'pago_pessoa2': True}
+         ]},
+        {**base, 'id': 'sem-parcelas', 'nome': '', 'valor': 10.0, 'parcelas': 1,
+         'percentual_pessoa1': 100.0, 'percentual_pessoa2': 0.0, 'parcelas_mensais': [],
+         'pago_pessoa1': True, 'data_criacao': ''},
+        {**base, 'id': 'inativo', 'nome': 'Inativo', 'valor': 99.99, 'parcelas': 2, 'ativo': False,
+         'percentual_pessoa1': 33.3, 'percentual_pessoa2': 66.7, 'parcelas_mensais': []}
+    ]
+
+def non_finite_items() -> List[dict]:
+    """Valores não finitos: o pydantic serializa como null"""
+    items = edge_items()
+    items[1]['parcelas_mensais'][1]['valor_pessoa2'] = float('inf')
+    items[2]['valor'] = float('nan')
+    return items
+
+DATASETS = {
+    'vazia': lambda: [],
+    'bordas': edge_items,
+    'sinteticos': lambda: make_items(200) + edge_items(),
+    'nao-finitos': non_finite_items
+}
+
+def _iso(key: int) -> str:
+    mes = month_from_key(key)
+    return f'{mes[3:]}-{mes[:2]}'
+
+def routes() -> List[str]:
+    """Rotas de leitura comparadas, com meses com e sem parcelas"""
+    current = current_month_key()
+    year = (current - 1) // 12
+    return [
+        '/payments/items',
+        '/payments/items?ativo=true&limit=3',
+        '/payments/items?conta_fixa=false&mes_inicio=01/2025',
+        '/payments/summary',
+        f'/payments/months/{_iso(current)}',
+        '/payments/months/2025-02',
+        '/payments/months/1990-01',
+        '/payments/forecast',
+        '/payments/forecast?months=120',
+        f'/payments/reports/{year}',
+        '/payments/reports/2025',
+        '/payments/reports/1990',
+        '/payments/overdue'
+    ]
+
+def reference_app(storage: AsyncStorage) -> FastAPI:
+    """API com as rotas de leitura respondendo modelos pydantic validados pelo response_model"""
+    app = FastAPI()
+
+    @app.get('/payments/summary', response_model=PaymentSummary)
+    async def get_payment_summary():
+        return storage.summary_index.summary(await storage.get_all_items())
+
+    @app.get('/payments/items', response_model=List[PaymentItem])
+    async def get_payment_items(ativo: Optional[bool] = None, conta_fixa: Optional[bool] = None,
+                                mes_inicio: Optional[str] = None, limit: Optional[int] = None):
+        if ativo is None and conta_fixa is None and mes_inicio is None and limit is None:
+            items = await storage.get_all_items()
+        else:
+            first = iso_month_key(f'{mes_inicio[3:]}-{mes_inicio[:2]}') if mes_inicio else None
+            items, _ = storage.items_index.query(ativo, conta_fixa, first, None, None, limit)
+        return [to_payment_item(item) for item in items]
+
+    @app.get('/payments/months/{mes}', response_model=MonthSummary)
+    async def get_month_installments(mes: str):
+        key = iso_month_key(mes)
+        (total1, total2, _, _, pendente1, pendente2, _), = storage.month_index.month_totals(key)
+        return MonthSummary(
+            mes=month_from_key(key),
+            total_pessoa1=round(total1, 2),
+            total_pessoa2=round(total2, 2),
+            valor_pendente_pessoa1=round(pendente1, 2),
+            valor_pendente_pessoa2=round(pendente2, 2),
+            parcelas=[
+                MonthInstallment(
+                    item_id=item['id'],
+                    nome=item['nome'],
+                    conta_fixa=item.get('conta_fixa', False),
+                    ativo=item.get('ativo', True),
+                    valor_pessoa1=parcela['valor_pessoa1'],
+                    valor_pessoa2=parcela['valor_pessoa2'],
+                    pago_pessoa1=parcela.get('pago_pessoa1', False),
+                    pago_pessoa2=parcela.get('pago_pessoa2', False)
+                ) for item, parcela in storage.month_index.month(key)
+            ]
+        )
+
+    @app.get('/payments/forecast', response_model=List[ForecastMonth])
+    async def get_payment_forecast(months: int = 12):
+        first = current_month_key()
+        return [
+            ForecastMonth(
+                mes=month_from_key(key),
+                total_pessoa1=round(total1, 2),
+                total_pessoa2=round(total2, 2),
+                valor_pago_pessoa1=round(pago1, 2),
+                valor_pago_pessoa2=round(pago2, 2),
+                valor_pendente_pessoa1=round(pendente1, 2),
+                valor_pendente_pessoa2=round(pendente2, 2)
+            ) for key, (total1, total2, pago1, pago2, pendente1, pendente2, _)
+            in enumerate(storage.month_index.month_totals(first, months), first)
+        ]
+
+    @app.get('/payments/reports/{year}', response_model=AnnualReport)
+    async def get_annual_report(year: int):
+        totals = storage.month_index.month_totals(year * 12 + 1, 12)
+        return AnnualReport(
+            ano=year,
+            valor_cobrado_pessoa1=round(sum(t[0] for t in totals), 2),
+            valor_cobrado_pessoa2=round(sum(t[1] for t in totals), 2),
+            valor_pago_pessoa1=round(sum(t[2] for t in totals), 2),
+            valor_pago_pessoa2=round(sum(t[3] for t in totals), 2),
+            meses=[
+                ReportMonth(
+                    mes=f'{month:02d}/{year}',
+                    valor_cobrado_pessoa1=round(total1, 2),
+                    valor_cobrado_pessoa2=round(total2, 2),
+                    valor_pago_pessoa1=round(pago1, 2),
+                    valor_pago_pessoa2=round(pago2, 2),
+                    itens_ativos=ativos
+                ) for month, (total1, total2, pago1, pago2, _, _, ativos) in enumerate(totals, 1)
+            ]
+        )
+
+    @app.get('/payments/overdue', response_model=OverdueSummary)
+    async def get_overdue_installments():
+        current = current_month_key()
+        overdue = storage.overdue_index.overdue(current)
+
+        def installments(pessoa):
+            return [OverdueInstallment(item_id=item['id'], nome=item['nome'], mes=month_from_key(month), valor=valor)
+                    for item, month, valor in overdue[pessoa]]
+
+        return OverdueSummary(
+            mes_atual=month_from_key(current),
+            total_pessoa1=round(sum(valor for _, _, valor in overdue['pessoa1']), 2),
+            total_pessoa2=round(sum(valor for _, _, valor in overdue['pessoa2']), 2),
+            parcelas_pessoa1=installments('pessoa1'),
+            parcelas_pessoa2=installments('pessoa2')
+        )
+
+    return app
+
+@pytest.fixture(params=list(DATASETS))
+def clients(request, use_storage, client):
+    """(API, API de referência) sobre o mesmo armazenamento com os itens do conjunto de dados"""
+    storage = use_storage(make_manager(DATASETS[request.param]()))
+    return client, TestClient(reference_app(storage))
+
+def test_read_routes_match_response_model_bytes(clients):
+    fast, reference = clients
+    for route in routes():
+        fast_response = fast.get(route)
+        reference_response = reference.get(route)
+        assert fast_response.status_code == reference_response.status_code == 200, route
+        assert fast_response.headers['content-type'] == reference_response.headers['content-type'], route
+        assert fast_response.content == reference_response.content, route
+
+def test_openapi_schema_of_read_routes_unchanged(use_storage):
+    storage = use_storage(make_manager([]))
+    schema = main_service.app.openapi()
+    reference_schema = reference_app(storage).openapi()
+
+    for route in ('/payments/items', '/payments/summary', '/payments/months/{mes}', '/payments/forecast',
+                  '/payments/reports/{year}', '/payments/overdue'):
+        assert (schema['paths'][route]['get']['responses']['200']
+                == reference_schema['paths'][route]['get']['responses']['200']), route
+    for name in reference_schema['components']['schemas']:
+        if name in ('HTTPValidationError', 'ValidationError'):
+            continue
+        assert schema['components']['schemas'][name] == reference_schema['components']['schemas'][name], name
@@ -0,0 +1,72 @@
+"""
+Chaves inteiras de mês (ano * 12 + mês) e parcelas geradas mês a mês pelo calendário
+"""
+from datetime import datetime
+
+import pytest
+
+import installments
+from installments import (
+    canonical_month_key, installments_by_month, iso_month_key, month_from_key, month_key,
+    month_lookup_key, normalize_month
+)
+from utils import generate_monthly_installments
+
+def _today(monkeypatch, year: int, month: int, day: int):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(year, month, day, 12, 0)
+
+    monkeypatch.setattr(installments, 'datetime', FixedDatetime)
+
+def test_month_keys_round_trip_and_are_consecutive():
+    keys = [month_key(f'{month:02d}/{year}') for year in range(1990, 2201) for month in range(1, 13)]
+
+    assert keys == list(range(keys[0], keys[0] + len(keys)))
+    assert [month_from_key(key) for key in keys[:13]] == [f'{m:02d}/1990' for m in range(1, 13)] + ['01/1991']
+    assert all(canonical_month_key(month_from_key(key)) == key for key in keys)
+
+@pytest.mark.parametrize('today, comecar_mes_atual, first', [
+    ((2025, 1, 31), False, '02/2025'),
+    ((2025, 1, 31), True, '01/2025'),
+    ((2024, 12, 31), False, '01/2025'),
+    ((2024, 2, 29), True, '02/2024')
+])
+def test_installments_follow_the_calendar_over_long_horizons(monkeypatch, today, comecar_mes_atual, first):
+    _today(monkeypatch, *today)
+
+    parcelas = generate_monthly_installments(1200.0, 120, 50.0, 50.0, comecar_mes_atual=comecar_mes_atual)
+
+    keys = [month_key(p.mes) for p in parcelas]
+    assert parcelas[0].mes == first
+    assert keys == list(range(keys[0], keys[0] + 120))
+
+@pytest.mark.parametrize('mes, normalized, canonical', [
+    ('01/2025', '01/2025', True),
+    ('1/2025', '01/2025', False),
+    ('12/9999', '12/9999', True),
+    ('13/2025', None, False),
+    ('00/2025', None, False),
+    ('01-2025', None, False),
+    ('janeiro', None, False)
+])
+def test_month_formats(mes, normalized, canonical):
+    assert normalize_month(mes) == normalized
+    assert (canonical_month_key(mes) is not None) == canonical
+
+def test_iso_months_from_the_routes():
+    assert iso_month_key('2025-01') == month_key('01/2025')
+    assert [iso_month_key(value) for value in ('2025-1', '25-01', '2025-13', '2025/01')] == [None] * 4
+
+def test_month_index_of_a_list_of_installments():
+    parcelas = [
+        {'mes': '01/2025', 'n': 1}, {'mes': '02/2025', 'n': 2}, {'mes': '01/2025', 'n': 3}, {'mes': '1/2025', 'n': 4}
+    ]
+
+    index = installments_by_month(parcelas)
+
+    assert [p['n'] for p in index[month_lookup_key('01/2025')]] == [1, 3]
+    # Mês fora do formato só é encontrado pelo mesmo texto
+    assert [p['n'] for p in index[month_lookup_key('1/2025')]] == [4]
+    assert month_lookup_key('03/2025') not in index
@@ -0,0 +1,205 @@
+"""
+Rotas por mês servidas pelo MonthIndex contra a varredura direta das parcelas dos itens
+"""
+import random
+
+import pytest
+
+import main_service
+from benchmarks.datasets import make_items, make_manager
+from installments import RecurringInstallments, canonical_month_key, current_month_key, month_from_key
+from storage.items_index import sort_key
+
+def _month_entries(items, key: int) -> list:
+    """Pares (item, parcela) do mês, em ordem de criação, percorrendo todas as parcelas"""
+    entries = []
+    for item in sorted(items, key=lambda item: sort_key(item['id'])):
+        parcelas_mensais = item['parcelas_mensais']
+        if isinstance(parcelas_mensais, RecurringInstallments):
+            parcela = parcelas_mensais.installment(key)
+            entries.extend([(item, parcela)] if parcela else [])
+        else:
+            entries.extend((item, p) for p in parcelas_mensais if canonical_month_key(p['mes']) == key)
+    return entries
+
+def _month_totals(items, key: int, rounded: bool = True) -> dict:
+    """Pago (todos os itens) e pendente (itens ativos) por pessoa no mês"""
+    totals = dict.fromkeys(('pago1', 'pago2', 'pendente1', 'pendente2'), 0.0)
+    for item, parcela in _month_entries(items, key):
+        for pessoa in ('1', '2'):
+            if parcela[f'pago_pessoa{pessoa}']:
+                totals[f'pago{pessoa}'] += parcela[f'valor_pessoa{pessoa}']
+            elif item['ativo']:
+                totals[f'pendente{pessoa}'] += parcela[f'valor_pessoa{pessoa}']
+    if not rounded:
+        return totals
+    return {name: round(value, 2) for name, value in totals.items()}
+
+def _random_writes(rng: random.Random, manager, client, count: int):
+    """Pagamentos, desativações, remoções e novas contas (parceladas e fixas) pela API"""
+    for _ in range(count):
+        items = manager.get_all_items()
+        item = rng.choice(items)
+        action = rng.random()
+        if action < 0.15:
+            response = client.post('/payments/items', json={
+                'nome': f'Compra {rng.randint(0, 999)}', 'valor': round(rng.uniform(10, 900), 2),
+                'parcelas': rng.randint(1, 12), 'percentual_pessoa1': 50.0, 'percentual_pessoa2': 50.0,
+                'conta_fixa': rng.random() < 0.4, 'comecar_mes_atual': rng.random() < 0.5
+            })
+        elif action < 0.25:
+            response = client.delete(f"/payments/items/{item['id']}")
+        elif action < 0.35:
+            response = client.put(f"/payments/items/{item['id']}", json={'ativo': not item['ativo']})
+        else:
+            mes = month_from_key(current_month_key() + rng.randint(-6, 6))
+            response = client.put(f"/payments/items/{item['id']}/installments/pay",
+                                  params={'mes': mes, 'pessoa': rng.choice(['pessoa1', 'pessoa2'])})
+        assert response.status_code in (200, 404), response.text
+
+@pytest.fixture
+def manager(use_storage):
+    manager = make_manager(make_items(30))
+    use_storage(manager)
+    return manager
+
+def _iso(key: int) -> str:
+    mes = month_from_key(key)
+    return f'{mes[3:]}-{mes[:2]}'
+
+def test_month_drill_down_matches_a_full_scan(manager, client):
+    rng = random.Random(7)
+    for _ in range(6):
+        _random_writes(rng, manager, client, 10)
+        items = manager.get_all_items()
+        for key in range(current_month_key() - 8, current_month_key() + 8):
+            month = client.get(f'/payments/months/{_iso(key)}').json()
+            entries = _month_entries(items, key)
+            totals = _month_totals(items, key)
+
+            assert month['mes'] == month_from_key(key)
+            assert [(p['item_id'], p['valor_pessoa1'], p['pago_pessoa1'], p['pago_pessoa2']) for p in month['parcelas']] == [
+                (item['id'], parcela['valor_pessoa1'], parcela['pago_pessoa1'], parcela['pago_pessoa2'])
+                for item, parcela in entries
+            ]
+            assert (month['valor_pendente_pessoa1'], month['valor_pendente_pessoa2']) == (
+                totals['pendente1'], totals['pendente2'])
+            assert (month['total_pessoa1'], month['total_pessoa2']) == (
+                round(totals['pago1'] + totals['pendente1'], 2), round(totals['pago2'] + totals['pendente2'], 2))
+
+@pytest.mark.parametrize('mes', ['2025-1', '2025-13', '01-2025', '2025'])
+def test_invalid_month_is_rejected(manager, client, mes):
+    assert client.get(f'/payments/months/{mes}').status_code == 400
+
+def test_month_answers_not_modified_until_a_write(manager, client):
+    path = f'/payments/months/{_iso(current_month_key())}'
+    etag = client.get(path).headers['ETag']
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    item = client.get(path).json()['parcelas'][0]
+    client.put(f"/payments/items/{item['item_id']}", json={'nome': 'Renomeado'})
+    assert client.get(path, headers={'If-None-Match': etag}).json()['parcelas'][0]['nome'] == 'Renomeado'
+
+def _forecast_month(items, key: int) -> dict:
+    totals = _month_totals(items, key)
+    return {
+        'mes': month_from_key(key),
+        'total_pessoa1': round(totals['pago1'] + totals['pendente1'], 2),
+        'total_pessoa2': round(totals['pago2'] + totals['pendente2'], 2),
+        'valor_pago_pessoa1': totals['pago1'],
+        'valor_pago_pessoa2': totals['pago2'],
+        'valor_pendente_pessoa1': totals['pendente1'],
+        'valor_pendente_pessoa2': totals['pendente2']
+    }
+
+def test_forecast_matches_a_full_scan(manager, client):
+    rng = random.Random(11)
+    for _ in range(6):
+        _random_writes(rng, manager, client, 10)
+        items = manager.get_all_items()
+        forecast = client.get('/payments/forecast', params={'months': 24}).json()
+        assert forecast == [_forecast_month(items, key) for key in range(current_month_key(), current_month_key() + 24)]
+
+def test_forecast_totals_are_computed_once_per_write(manager, client):
+    month_index = main_service.storage_facade.month_index
+    client.get('/payments/forecast')
+    assert month_index.computed_months == 12
+
+    client.get('/payments/forecast', params={'months': 6})
+    assert month_index.computed_months == 12
+
+    # Pagamento de uma parcela em regra: só o mês pago é recalculado
+    created = client.post('/payments/items', json={
+        'nome': 'Aluguel', 'valor': 900.0, 'parcelas': 1, 'percentual_pessoa1': 50.0,
+        'percentual_pessoa2': 50.0, 'conta_fixa': True
+    }).json()['id']
+    client.get('/payments/forecast')
+    assert month_index.computed_months == 24
+    client.put(f'/payments/items/{created}/installments/pay',
+               params={'mes': month_from_key(current_month_key() + 3), 'pessoa': 'pessoa1'})
+    forecast = client.get('/payments/forecast').json()
+    assert month_index.computed_months == 25
+    assert forecast == [_forecast_month(manager.get_all_items(), key)
+                        for key in range(current_month_key(), current_month_key() + 12)]
+
+@pytest.mark.parametrize('months', [0, 121])
+def test_forecast_horizon_is_limited(manager, client, months):
+    assert client.get('/payments/forecast', params={'months': months}).status_code == 422
+
+def _report(items, year: int) -> dict:
+    meses = []
+    for month in range(1, 13):
+        key = year * 12 + month
+        totals = _month_totals(items, key, rounded=False)
+        meses.append({
+            'mes': month_from_key(key),
+            'valor_cobrado_pessoa1': totals['pago1'] + totals['pendente1'],
+            'valor_cobrado_pessoa2': totals['pago2'] + totals['pendente2'],
+            'valor_pago_pessoa1': totals['pago1'],
+            'valor_pago_pessoa2': totals['pago2'],
+            'itens_ativos': len({item['id'] for item, _ in _month_entries(items, key) if item['ativo']})
+        })
+    year_totals = {name: round(sum(mes[name] for mes in meses), 2) for name in (
+        'valor_cobrado_pessoa1', 'valor_cobrado_pessoa2', 'valor_pago_pessoa1', 'valor_pago_pessoa2')}
+    for mes in meses:
+        mes.update({name: round(value, 2) for name, value in mes.items() if name.startswith('valor_')})
+    return {'ano': year, **year_totals, 'meses': meses}
+
+def test_annual_report_matches_a_full_scan(manager, client):
+    rng = random.Random(13)
+    year = current_month_key() // 12
+    for _ in range(4):
+        _random_writes(rng, manager, client, 10)
+        items = manager.get_all_items()
+        for report_year in (year - 2, year - 1, year, year + 1):
+            assert client.get(f'/payments/reports/{report_year}').json() == _report(items, report_year)
+
+def test_closed_months_are_not_recomputed(manager, client):
+    month_index = main_service.storage_facade.month_index
+    year = current_month_key() // 12 - 1
+    client.get(f'/payments/reports/{year}')
+    assert month_index.computed_months == 12
+    client.get(f'/payments/reports/{year}')
+    assert month_index.computed_months == 12
+
+    def months_in_year(item) -> set:
+        return {key for key in map(canonical_month_key, (p['mes'] for p in item['parcelas_mensais']))
+                if year * 12 < key <= year * 12 + 12}
+
+    items = manager.get_all_items()
+    outside = next(item for item in items if not months_in_year(item))
+    inside = next(item for item in items if 0 < len(months_in_year(item)) < 12)
+
+    # Escrita em item sem parcelas no ano: nenhum mês do relatório é recalculado
+    client.put(f"/payments/items/{outside['id']}", json={'nome': 'Renomeado'})
+    client.get(f'/payments/reports/{year}')
+    assert month_index.computed_months == 12
+
+    # Desmarca um pagamento do ano: só os meses do item alterado são recalculados
+    parcelas = [dict(p) for p in inside['parcelas_mensais']]
+    first = next(p for p in parcelas if canonical_month_key(p['mes']) in months_in_year(inside))
+    first['pago_pessoa2'] = False
+    assert client.put(f"/payments/items/{inside['id']}", json={'parcelas_mensais': parcelas}).status_code == 200
+    report = client.get(f'/payments/reports/{year}').json()
+    assert month_index.computed_months == 12 + len(months_in_year(inside))
+    assert report == _report(manager.get_all_items(), year)
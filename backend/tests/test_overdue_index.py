@@ -0,0 +1,98 @@
+"""
+Parcelas atrasadas do OverdueIndex contra o cálculo direto sobre os itens
+"""
+import random
+
+from installments import RecurringInstallments, month_key
+from storage.overdue_index import OverdueIndex
+
+def _rule_item(item_id: str, inicio: int, valor1: float, valor2: float, ativo: bool = True) -> dict:
+    return {'id': item_id, 'nome': f'Regra {item_id}', 'ativo': ativo, 'conta_fixa': True,
+            'parcelas_mensais': RecurringInstallments(inicio, valor1, valor2, [], [])}
+
+def _list_item(item_id: str, first: int, count: int) -> dict:
+    parcelas = []
+    for key in range(first, first + count):
+        mes = f'{(key - 1) % 12 + 1:02d}/{(key - 1) // 12}'
+        assert month_key(mes) == key
+        parcelas.append({'mes': mes, 'valor_pessoa1': 10.0, 'valor_pessoa2': 20.0,
+                         'pago_pessoa1': False, 'pago_pessoa2': False})
+    return {'id': item_id, 'nome': f'Item {item_id}', 'ativo': True, 'conta_fixa': False,
+            'parcelas_mensais': parcelas}
+
+def _expected(items: dict, current: int) -> dict:
+    """Parcelas atrasadas calculadas percorrendo todos os meses de todos os itens"""
+    result = {}
+    for pessoa in ('pessoa1', 'pessoa2'):
+        entries = []
+        for item in items.values():
+            if not item['ativo']:
+                continue
+            parcelas_mensais = item['parcelas_mensais']
+            if isinstance(parcelas_mensais, RecurringInstallments):
+                valor = parcelas_mensais.valor_pessoa1 if pessoa == 'pessoa1' else parcelas_mensais.valor_pessoa2
+                pagos = parcelas_mensais.pagos_pessoa1 if pessoa == 'pessoa1' else parcelas_mensais.pagos_pessoa2
+                if valor:
+                    entries.extend(((len(item['id']), item['id']), month, valor)
+                                   for month in range(parcelas_mensais.inicio, current) if month not in pagos)
+            else:
+                for parcela in parcelas_mensais:
+                    month = month_key(parcela['mes'])
+                    valor = parcela[f'valor_{pessoa}']
+                    if month < current and not parcela[f'pago_{pessoa}'] and valor:
+                        entries.append(((len(item['id']), item['id']), month, valor))
+        entries.sort(key=lambda entry: (entry[1], entry[0]))
+        result[pessoa] = [(item_key[1], month, valor) for item_key, month, valor in entries]
+    return result
+
+def _actual(index: OverdueIndex, current: int) -> dict:
+    return {pessoa: [(item['id'], month, valor) for item, month, valor in entries]
+            for pessoa, entries in index.overdue(current).items()}
+
+def test_overdue_matches_full_scan_through_payments_and_month_changes():
+    rng = random.Random(7)
+    start = 2025 * 12 + 1
+    items = {}
+    for i in range(8):
+        item = _rule_item(str(100 + i), start + rng.randint(-12, 12), rng.choice([0.0, 50.0]), 30.0)
+        items[item['id']] = item
+    for i in range(4):
+        item = _list_item(str(200 + i), start + rng.randint(-6, 6), rng.randint(1, 12))
+        items[item['id']] = item
+
+    index = OverdueIndex()
+    index.on_load(list(items.values()))
+    current = start
+    for step in range(300):
+        action = rng.random()
+        item_id = rng.choice(sorted(items))
+        old_item = items[item_id]
+        new_item = dict(old_item)
+        parcelas_mensais = old_item['parcelas_mensais']
+        if action < 0.1:
+            current += rng.randint(1, 3)
+        elif action < 0.15:
+            new_item['ativo'] = not old_item['ativo']
+        elif isinstance(parcelas_mensais, RecurringInstallments):
+            regra = RecurringInstallments.from_json(parcelas_mensais.to_json())
+            month = rng.randint(regra.inicio - 2, current + 2)
+            pagos = regra.pagos_pessoa1 if rng.random() < 0.5 else regra.pagos_pessoa2
+            pagos.symmetric_difference_update({month})
+            if action > 0.97:
+                regra = RecurringInstallments(regra.inicio + 1, regra.valor_pessoa1, regra.valor_pessoa2,
+                                              regra.pagos_pessoa1, regra.pagos_pessoa2)
+            new_item['parcelas_mensais'] = regra
+        else:
+            parcelas = [dict(p) for p in parcelas_mensais]
+            parcela = rng.choice(parcelas)
+            pessoa = rng.choice(['pago_pessoa1', 'pago_pessoa2'])
+            parcela[pessoa] = not parcela[pessoa]
+            new_item['parcelas_mensais'] = parcelas
+        items[item_id] = new_item
+        index.on_upsert(old_item, new_item)
+
+        if step % 5 == 0:
+            assert _actual(index, current) == _expected(items, current), step
+
+    index.on_load(list(items.values()))
+    assert _actual(index, current) == _expected(items, current)
@@ -0,0 +1,76 @@
+"""
+Leitura e escrita das linhas pela posição dos cabeçalhos (sheet_rows.RowDecoder)
+"""
+import pytest
+
+from fake_sheets import FakeSheetsService
+from google_sheets_service import GoogleSheetsServiceManager, SHEET_HEADERS, column_letter
+from sheet_rows import RowDecoder
+
+# Colunas fora da ordem de SHEET_HEADERS e uma coluna extra da planilha (Observações) no meio
+HEADERS = ['Nome', 'Observações', 'ID'] + [h for h in SHEET_HEADERS if h not in ('ID', 'Nome')][::-1]
+
+def _item(**fields):
+    return {
+        'nome': 'Aluguel', 'valor': 200.0, 'parcelas': 2, 'percentual_pessoa1': 50.0, 'percentual_pessoa2': 50.0,
+        'data_criacao': '2025-01-01 00:00:00', 'ativo': True, 'conta_fixa': False,
+        'valor_manual_pessoa1': None, 'valor_manual_pessoa2': None, 'pago_pessoa1': False, 'pago_pessoa2': False,
+        'parcelas_mensais': [
+            {'mes': '01/2025', 'valor_pessoa1': 50.0, 'valor_pessoa2': 50.0, 'pago_pessoa1': False, 'pago_pessoa2': False},
+            {'mes': '02/2025', 'valor_pessoa1': 50.0, 'valor_pessoa2': 50.0, 'pago_pessoa1': False, 'pago_pessoa2': False}
+        ],
+        'comecar_mes_atual': True, **fields
+    }
+
+@pytest.fixture
+def manager():
+    service = FakeSheetsService(sheets={'Sheet1': [HEADERS]})
+    manager = GoogleSheetsServiceManager(service=service)
+    manager.get_all_items()
+    return manager
+
+def _cell(manager, row_number: int, header: str) -> str:
+    row = manager.service.sheets[manager.sheet_name][row_number - 1]
+    position = HEADERS.index(header)
+    return row[position] if position < len(row) else ''
+
+def test_column_letter():
+    assert [column_letter(i) for i in (0, 14, 25, 26, 27, 701, 702)] == ['A', 'O', 'Z', 'AA', 'AB', 'ZZ', 'AAA']
+
+def test_encode_places_fields_under_their_headers():
+    decoder = RowDecoder(HEADERS, SHEET_HEADERS)
+    row = decoder.encode({'id': '1', 'nome': 'Aluguel', 'valor': '10.0'})
+
+    assert len(row) == len(HEADERS)
+    assert row[HEADERS.index('ID')] == '1'
+    assert row[HEADERS.index('Nome')] == 'Aluguel'
+    assert row[HEADERS.index('Valor')] == '10.0'
+    assert row[HEADERS.index('Observações')] == ''
+    assert decoder.decode(row)['valor'] == 10.0
+
+def test_writes_follow_the_sheet_headers(manager):
+    item_id = manager.add_item(_item())
+    assert _cell(manager, 2, 'ID') == item_id
+    assert _cell(manager, 2, 'Nome') == 'Aluguel'
+    assert _cell(manager, 2, 'Valor') == '200.0'
+
+    # Conteúdo da coluna extra, escrito por quem usa a planilha, não é tocado pelas gravações
+    manager.service.sheets[manager.sheet_name][1][HEADERS.index('Observações')] = 'anotação'
+
+    def pay(item):
+        item['parcelas_mensais'][0]['pago_pessoa1'] = True
+        item['nome'] = 'Aluguel novo'
+
+    saved = manager.modify_item(item_id, pay)
+
+    assert saved['nome'] == 'Aluguel novo'
+    assert _cell(manager, 2, 'Nome') == 'Aluguel novo'
+    assert _cell(manager, 2, 'ID') == item_id
+    assert _cell(manager, 2, 'Observações') == 'anotação'
+
+    manager.invalidate_cache()
+    item = manager.load_item(item_id)
+    assert item['nome'] == 'Aluguel novo'
+    assert item['parcelas_mensais'][0]['pago_pessoa1'] is True
+    assert manager.delete_item(item_id)
+    assert manager.get_all_items() == []
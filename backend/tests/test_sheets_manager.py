@@ -0,0 +1,177 @@
+"""
+GoogleSheetsServiceManager contado pelas chamadas ao Google Sheets simulado
+
+Cache de itens, verificação dos cabeçalhos, índice id -> linha e gravação só
+das células alteradas.
+"""
+import json
+
+import pytest
+
+import fake_sheets
+import google_sheets_service
+from benchmarks.datasets import make_items, make_manager
+from fake_sheets import FakeSheetsService
+from google_sheets_service import GoogleSheetsServiceManager
+
+def _new_item(nome: str) -> dict:
+    return {
+        'nome': nome, 'valor': 100.0, 'parcelas': 1, 'percentual_pessoa1': 50.0, 'percentual_pessoa2': 50.0,
+        'data_criacao': '2025-01-01 00:00:00', 'ativo': True, 'conta_fixa': False,
+        'valor_manual_pessoa1': None, 'valor_manual_pessoa2': None, 'pago_pessoa1': False, 'pago_pessoa2': False,
+        'parcelas_mensais': [{'mes': '01/2025', 'valor_pessoa1': 50.0, 'valor_pessoa2': 50.0,
+                              'pago_pessoa1': False, 'pago_pessoa2': False}],
+        'comecar_mes_atual': True
+    }
+
+@pytest.fixture
+def manager():
+    manager = make_manager(make_items(10))
+    manager.service.reset_calls()
+    return manager
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio (time.monotonic) do gerenciador controlado pelo teste"""
+    now = [1000.0]
+    monkeypatch.setattr(google_sheets_service.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_reads_are_served_from_the_cache_until_the_ttl_expires(manager, clock):
+    manager.cache_ttl = 60
+
+    first = manager.get_all_items()
+    clock[0] += 59
+    assert manager.get_all_items() == first
+    assert manager.service.calls == {'values.get': 1}
+    assert (manager.cache_hits, manager.cache_misses) == (1, 1)
+
+    clock[0] += 2
+    manager.get_all_items()
+    assert manager.service.calls == {'values.get': 2}
+    assert (manager.cache_hits, manager.cache_misses) == (1, 2)
+
+def test_writes_update_the_cache_without_reading_the_sheet(manager, clock):
+    items = manager.get_all_items()
+    manager.service.reset_calls()
+
+    item_id = manager.add_item(_new_item('Nova compra'))
+    manager.update_item(items[0]['id'], {'nome': 'Renomeado'})
+    manager.delete_item(items[1]['id'])
+    manager.service.reset_calls()
+
+    cached = {item['id']: item for item in manager.get_all_items()}
+    assert manager.service.calls == {}
+    assert cached[item_id]['nome'] == 'Nova compra'
+    assert cached[items[0]['id']]['nome'] == 'Renomeado'
+    assert items[1]['id'] not in cached
+
+    # O cache atualizado é igual ao que uma nova leitura da planilha traz
+    manager.invalidate_cache()
+    assert {item['id']: item for item in manager.get_all_items()} == cached
+
+def test_callers_get_copies_of_the_cached_items(manager):
+    item = manager.get_all_items()[0]
+    item['nome'] = 'Alterado fora do cache'
+    item['ativo'] = False
+
+    cached = manager.get_all_items()[0]
+    assert (cached['nome'], cached['ativo']) == ('Item 0', True)
+
+def test_header_is_checked_once_per_manager(monkeypatch):
+    service = FakeSheetsService()
+    reads = []
+    read = service._read
+    monkeypatch.setattr(service, '_read', lambda a1_range: reads.append(a1_range) or read(a1_range))
+
+    manager = GoogleSheetsServiceManager(service=service)
+    assert service.calls == {'values.get': 1, 'values.update': 1}
+
+    item_id = manager.add_item(_new_item('Compra'))
+    manager.get_all_items()
+    manager.invalidate_cache()
+    manager.update_item(item_id, {'nome': 'Renomeado'})
+    manager.delete_item(item_id)
+    assert reads.count('Sheet1!A1:Z1') == 1
+
+    # Outro processo com a planilha já preparada só lê os cabeçalhos
+    service.reset_calls()
+    GoogleSheetsServiceManager(service=service)
+    assert service.calls == {'values.get': 1}
+
+def _delete_row_outside_the_api(manager, row_number: int) -> str:
+    """Remove uma linha direto na planilha: o índice id -> linha fica defasado para os itens seguintes"""
+    return manager.service.sheets[manager.sheet_name].pop(row_number - 1)[0]
+
+def _names(manager) -> dict:
+    return {row[0]: row[1] for row in manager.service.sheets[manager.sheet_name][1:]}
+
+@pytest.mark.parametrize('write', ['update', 'delete'])
+def test_stale_row_index_still_targets_the_right_row(manager, write):
+    items = manager.get_all_items()
+    removed_id = _delete_row_outside_the_api(manager, 4)
+    target = items[5]['id']
+
+    if write == 'update':
+        assert manager.update_item(target, {'nome': 'Renomeado'})
+        assert _names(manager)[target] == 'Renomeado'
+    else:
+        assert manager.delete_item(target)
+        assert target not in _names(manager)
+    assert not manager.update_item(removed_id, {'nome': 'Não existe mais'})
+    assert not manager.delete_item(removed_id)
+
+    assert len(_names(manager)) == len(items) - (1 if write == 'update' else 2)
+    assert {item['id']: item['nome'] for item in manager.get_all_items()} == _names(manager)
+
+def test_delete_shifts_the_row_index_without_reading_the_sheet(manager):
+    items = manager.get_all_items()
+    manager.delete_item(items[1]['id'])
+    manager.service.reset_calls()
+
+    assert manager.update_item(items[8]['id'], {'nome': 'Renomeado'})
+    assert manager.service.calls == {'values.batchGet': 1, 'values.batchUpdate': 1}
+    assert manager.service.sheets[manager.sheet_name][8][1] == 'Renomeado'
+
+@pytest.fixture
+def written_ranges(manager, monkeypatch):
+    """Intervalos enviados em cada values().batchUpdate da planilha simulada"""
+    ranges = []
+    batch_update = fake_sheets._FakeValues.batchUpdate
+
+    def record(self, spreadsheetId, body, **kwargs):
+        ranges.append([(data['range'], data['values']) for data in body['data']])
+        return batch_update(self, spreadsheetId, body, **kwargs)
+
+    monkeypatch.setattr(fake_sheets._FakeValues, 'batchUpdate', record)
+    return ranges
+
+def test_saves_write_only_the_changed_cells(manager, written_ranges):
+    items = manager.get_all_items()
+    item_id = items[3]['id']
+    row_number = 5
+
+    manager.update_item(item_id, {'nome': 'Renomeado'})
+    manager.update_item(item_id, {'valor': 123.45, 'parcelas': 3})
+    manager.update_item(item_id, {'ativo': False, 'pago_pessoa2': True})
+    manager.modify_item(item_id, lambda item: None)
+
+    assert written_ranges == [
+        [(f'Sheet1!B{row_number}:B{row_number}', [['Renomeado']])],
+        [(f'Sheet1!C{row_number}:D{row_number}', [['123.45', '3']])],
+        [(f'Sheet1!H{row_number}:H{row_number}', [['False']]),
+         (f'Sheet1!M{row_number}:M{row_number}', [['True']])]
+    ]
+
+def test_payment_rewrites_only_the_installments_cell(manager, written_ranges):
+    item = manager.get_all_items()[1]
+    position = next(i for i, p in enumerate(item['parcelas_mensais']) if not p['pago_pessoa2'])
+
+    def pay(loaded):
+        loaded['parcelas_mensais'][position]['pago_pessoa2'] = True
+
+    manager.modify_item(item['id'], pay)
+
+    (written,) = written_ranges
+    assert [cell_range for cell_range, _ in written] == ['Sheet1!N3:N3']
+    assert json.loads(written[0][1][0][0])[position]['pago_pessoa2'] is True
@@ -0,0 +1,84 @@
+"""
+Parcelas e listeners do backend SQLite
+"""
+import sqlite3
+
+from storage.base import StorageListener
+from storage.sqlite_backend import SQLiteStorageManager
+
+def _parcela(mes: str, valor: float) -> dict:
+    return {'mes': mes, 'valor_pessoa1': valor, 'valor_pessoa2': valor, 'pago_pessoa1': False, 'pago_pessoa2': False}
+
+def _item(parcelas_mensais: list) -> dict:
+    return {
+        'nome': 'Compra', 'valor': 60.0, 'parcelas': len(parcelas_mensais), 'percentual_pessoa1': 50.0,
+        'percentual_pessoa2': 50.0, 'data_criacao': '2025-01-01 00:00:00', 'ativo': True, 'conta_fixa': False,
+        'valor_manual_pessoa1': None, 'valor_manual_pessoa2': None, 'pago_pessoa1': False, 'pago_pessoa2': False,
+        'parcelas_mensais': parcelas_mensais, 'comecar_mes_atual': True
+    }
+
+def test_installments_in_the_same_month_are_kept():
+    manager = SQLiteStorageManager(':memory:')
+    parcelas = [_parcela('01/2025', 10.0), _parcela('01/2025', 20.0), _parcela('02/2025', 30.0)]
+    item_id = manager.add_item(_item(parcelas))
+    assert manager.load_item(item_id)['parcelas_mensais'] == parcelas
+
+    def pay_second(item):
+        item['parcelas_mensais'][1]['pago_pessoa1'] = True
+
+    saved = manager.modify_item(item_id, pay_second)
+    assert [p['pago_pessoa1'] for p in saved['parcelas_mensais']] == [False, True, False]
+    assert len(manager.query_items(mes='01/2025')[0]['parcelas_mensais']) == 3
+
+def test_ids_given_by_other_backends_are_kept_or_replaced():
+    manager = SQLiteStorageManager(':memory:')
+    assert manager.add_item({**_item([]), 'id': 'item-a'}) == 'item-a'
+
+    # ID não numérico já usado: gera um novo, como a planilha
+    item_id = manager.add_item({**_item([]), 'id': 'item-a'})
+    assert item_id != 'item-a' and item_id.isdigit()
+    assert {item['id'] for item in manager.get_all_items()} == {'item-a', item_id}
+
+def test_large_loads_stay_under_the_variable_limit():
+    manager = SQLiteStorageManager(':memory:')
+    manager._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    item_ids = [manager.add_item({**_item([_parcela('01/2025', 10.0)]), 'id': str(i)}) for i in range(1500)]
+
+    items = manager.load_items(item_ids)
+
+    assert list(items) == item_ids
+    assert all(item['parcelas_mensais'] == [_parcela('01/2025', 10.0)] for item in items.values())
+    assert len(manager.save_items(items)) == 1500
+
+class _CommittedReader(StorageListener):
+    """Listener que lê, por outra conexão, o nome gravado do item notificado"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path)
+        self.seen = []
+
+    def _committed_name(self, item_id: str):
+        row = self._conn.execute('SELECT nome FROM items WHERE id = ?', (item_id,)).fetchone()
+        return row[0] if row else None
+
+    def on_upsert(self, old_item, new_item):
+        self.seen.append(('upsert', new_item['nome'], self._committed_name(new_item['id'])))
+
+    def on_delete(self, old_item):
+        self.seen.append(('delete', old_item['nome'], self._committed_name(old_item['id'])))
+
+def test_listeners_are_notified_after_commit(tmp_path):
+    path = str(tmp_path / 'dados.db')
+    manager = SQLiteStorageManager(path)
+    reader = _CommittedReader(path)
+    manager.add_listener(reader)
+
+    item_id = manager.add_item(_item([_parcela('01/2025', 10.0)]))
+    manager.update_item(item_id, {'nome': 'Outra compra'})
+    manager.delete_item(item_id)
+
+    assert reader.seen == [
+        ('upsert', 'Compra', 'Compra'),
+        ('upsert', 'Outra compra', 'Outra compra'),
+        ('delete', 'Outra compra', None)
+    ]
@@ -0,0 +1,121 @@
+"""
+Chamadas à API do Google Sheets por operação de escrita e escritas concorrentes no mesmo item
+"""
+import asyncio
+
+import httpx
+import pytest
+
+import main_service
+from benchmarks.datasets import make_items, make_manager
+from storage.sqlite_backend import SQLiteStorageManager
+
+def _unpaid_month(item: dict) -> str:
+    """Primeiro mês do item sem pagamento de nenhuma das pessoas"""
+    return next(p['mes'] for p in item['parcelas_mensais'] if not p['pago_pessoa1'] and not p['pago_pessoa2'])
+
+def _installment(manager, item_id: str, mes: str) -> dict:
+    item = manager.load_item(item_id)
+    return next(p for p in item['parcelas_mensais'] if p['mes'] == mes)
+
+@pytest.fixture
+def sheets():
+    """Gerenciador sobre a planilha simulada, com o cache já carregado, e um item com parcela em aberto"""
+    items = make_items(10)
+    manager = make_manager(items)
+    manager.get_all_items()
+    manager.service.reset_calls()
+    return manager, items[1]
+
+def test_mark_installment_paid_reads_and_writes_once(sheets, use_storage, client):
+    manager, item = sheets
+    use_storage(manager)
+    mes = _unpaid_month(item)
+
+    response = client.put(f"/payments/items/{item['id']}/installments/pay",
+                          params={'mes': mes, 'pessoa': 'pessoa1'})
+
+    assert response.status_code == 200
+    assert manager.service.calls == {'values.batchGet': 1, 'values.batchUpdate': 1}
+    assert _installment(manager, item['id'], mes)['pago_pessoa1'] is True
+
+def test_mark_payment_reads_and_writes_once(sheets, use_storage, client):
+    manager, item = sheets
+    use_storage(manager)
+
+    response = client.post(f"/payments/items/{item['id']}/pay", json={'mes': _unpaid_month(item), 'pessoa': 'pessoa2'})
+
+    assert response.status_code == 200
+    assert manager.service.calls == {'values.batchGet': 1, 'values.batchUpdate': 1}
+
+def test_update_item_reads_and_writes_once(sheets, use_storage, client):
+    manager, item = sheets
+    use_storage(manager)
+
+    response = client.put(f"/payments/items/{item['id']}", json={'nome': 'Renomeado'})
+
+    assert response.status_code == 200
+    assert response.json()['nome'] == 'Renomeado'
+    assert manager.service.calls == {'values.batchGet': 1, 'values.batchUpdate': 1}
+
+def test_pay_batch_reads_and_writes_once(sheets, use_storage, client):
+    manager, item = sheets
+    use_storage(manager)
+    mes = _unpaid_month(item)
+
+    response = client.post('/payments/installments/pay-batch', json=[
+        {'item_id': item['id'], 'mes': mes, 'pessoa': 'pessoa1'},
+        {'item_id': item['id'], 'mes': mes, 'pessoa': 'pessoa2'},
+        {'item_id': 'inexistente', 'mes': mes, 'pessoa': 'pessoa1'}
+    ])
+
+    assert response.status_code == 200
+    assert response.json()['total_pagos'] == 2
+    assert manager.service.calls == {'values.batchGet': 1, 'values.batchUpdate': 1}
+
+def test_failed_payment_does_not_write(sheets, use_storage, client):
+    manager, item = sheets
+    use_storage(manager)
+
+    response = client.put(f"/payments/items/{item['id']}/installments/pay",
+                          params={'mes': '01/1999', 'pessoa': 'pessoa1'})
+
+    assert response.status_code == 404
+    assert 'values.batchUpdate' not in manager.service.calls
+
+def _sqlite_manager():
+    items = make_items(10)
+    manager = SQLiteStorageManager(':memory:')
+    for item in items:
+        manager.add_item(item)
+    return manager, items[1]
+
+def _slow_sheets_manager():
+    items = make_items(10)
+    manager = make_manager(items)
+    manager.get_all_items()
+    # Latência por chamada: sem o lock entre a leitura e a gravação, os dois pagamentos se intercalam
+    manager.service.latency = 0.02
+    return manager, items[1]
+
+@pytest.mark.parametrize('make_backend', [_slow_sheets_manager, _sqlite_manager], ids=['sheets', 'sqlite'])
+def test_concurrent_payments_of_both_people_are_kept(make_backend, use_storage):
+    manager, item = make_backend()
+    use_storage(manager)
+    mes = _unpaid_month(item)
+
+    async def pay_both():
+        transport = httpx.ASGITransport(app=main_service.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(
+                client.put(f"/payments/items/{item['id']}/installments/pay", params={'mes': mes, 'pessoa': pessoa})
+                for pessoa in ('pessoa1', 'pessoa2')
+            ))
+
+    responses = asyncio.run(pay_both())
+
+    assert [response.status_code for response in responses] == [200, 200]
+    if hasattr(manager, 'invalidate_cache'):
+        manager.invalidate_cache()
+    parcela = _installment(manager, item['id'], mes)
+    assert (parcela['pago_pessoa1'], parcela['pago_pessoa2']) == (True, True)
@@ -0,0 +1,36 @@
+"""
+Motor NumPy do resumo (SUMMARY_ENGINE=numpy) contra o cálculo em Python
+"""
+import copy
+
+import pytest
+
+import utils
+from benchmarks.datasets import make_items, make_manager
+
+pytest.importorskip('numpy')
+
+def _items(source: str):
+    items = make_items(300, seed=5)
+    # Conta quitada, item sem parcelas (lógica antiga) e conta parcelada com parcelas do mesmo mês
+    for parcela in items[1]['parcelas_mensais']:
+        parcela['pago_pessoa1'] = parcela['pago_pessoa2'] = True
+    items[2]['parcelas_mensais'] = []
+    items[3]['parcelas_mensais'].append(dict(items[3]['parcelas_mensais'][-1]))
+    if source == 'cache':
+        return make_manager(items).get_all_items()
+    return items
+
+@pytest.mark.parametrize('source', ['dicts', 'cache'])
+def test_numpy_engine_matches_calculate_monthly_payments(source, monkeypatch):
+    items = _items(source)
+    current_month = utils.get_current_month_year()
+
+    monkeypatch.setattr(utils, 'SUMMARY_ENGINE', 'python')
+    expected_totals = utils.calculate_items_totals(items, current_month)
+    expected = utils.calculate_monthly_payments(copy.deepcopy(items))
+
+    monkeypatch.setattr(utils, 'SUMMARY_ENGINE', 'numpy')
+    assert utils.calculate_items_totals(items, current_month) == expected_totals
+    assert utils.calculate_monthly_payments(copy.deepcopy(items)) == expected
+    assert len(expected.itens) == len(items) - 1
@@ -0,0 +1,64 @@
+"""
+Totais do /payments/summary (SummaryIndex) contra o recálculo completo após cada escrita
+"""
+import copy
+import random
+
+import pytest
+
+from benchmarks.datasets import make_items, make_manager
+from storage.sqlite_backend import SQLiteStorageManager
+from utils import calculate_monthly_payments
+
+def _sheets_manager(items):
+    return make_manager(items)
+
+def _sqlite_manager(items):
+    manager = SQLiteStorageManager(':memory:')
+    for item in items:
+        manager.add_item(item)
+    return manager
+
+def _expected_summary(manager) -> dict:
+    # calculate_monthly_payments marca os itens quitados como inativos: trabalha em uma cópia
+    summary = calculate_monthly_payments(copy.deepcopy(manager.get_all_items()))
+    content = summary.model_dump(exclude={'itens'})
+    content['itens'] = [item.id for item in summary.itens]
+    return content
+
+def _random_write(rng: random.Random, manager, client):
+    items = manager.get_all_items()
+    action = rng.random()
+    if action < 0.2 or not items:
+        percentual_pessoa1 = rng.choice([12.5, 33.33, 37.5, 50.0, 62.5, 87.5])
+        response = client.post('/payments/items', json={
+            'nome': f'Compra {rng.randint(0, 999)}', 'valor': round(rng.uniform(10, 9000), 2),
+            'parcelas': rng.randint(1, 7), 'percentual_pessoa1': percentual_pessoa1,
+            'percentual_pessoa2': round(100 - percentual_pessoa1, 2), 'conta_fixa': rng.random() < 0.2,
+            'comecar_mes_atual': rng.random() < 0.7
+        })
+        return response
+    item = rng.choice(items)
+    if action < 0.35:
+        return client.delete(f"/payments/items/{item['id']}")
+    if action < 0.55:
+        return client.put(f"/payments/items/{item['id']}", json={'valor': round(rng.uniform(10, 9000), 2)})
+    meses = [p['mes'] for p in item['parcelas_mensais'] or []]
+    if not meses:
+        return client.delete(f"/payments/items/{item['id']}")
+    return client.put(f"/payments/items/{item['id']}/installments/pay",
+                      params={'mes': rng.choice(meses), 'pessoa': rng.choice(['pessoa1', 'pessoa2'])})
+
+@pytest.mark.parametrize('make_backend', [_sheets_manager, _sqlite_manager], ids=['sheets', 'sqlite'])
+def test_summary_totals_match_full_recompute_after_each_write(make_backend, use_storage, client):
+    rng = random.Random(4)
+    manager = make_backend(make_items(30))
+    use_storage(manager)
+
+    for step in range(150):
+        response = _random_write(rng, manager, client)
+        assert response.status_code == 200, (step, response.text)
+
+        summary = client.get('/payments/summary').json()
+        summary['itens'] = [item['id'] for item in summary['itens']]
+        assert summary == _expected_summary(manager), step
@@ -0,0 +1,46 @@
+"""
+Edição das parcelas mensais pelo PUT /payments/items/{item_id} nos dois backends
+"""
+import pytest
+
+from benchmarks.datasets import make_items, make_manager
+from storage.sqlite_backend import SQLiteStorageManager
+
+def _sheets_manager(items):
+    return make_manager(items)
+
+def _sqlite_manager(items):
+    manager = SQLiteStorageManager(':memory:')
+    for item in items:
+        manager.add_item(item)
+    return manager
+
+@pytest.fixture(params=[_sheets_manager, _sqlite_manager], ids=['sheets', 'sqlite'])
+def backend(request, use_storage):
+    items = make_items(3)
+    manager = request.param(items)
+    use_storage(manager)
+    return manager, items[1]['id']
+
+def _parcela(mes: str) -> dict:
+    return {'mes': mes, 'valor_pessoa1': 10.0, 'valor_pessoa2': 20.0, 'pago_pessoa1': False, 'pago_pessoa2': False}
+
+def test_months_without_leading_zero_are_normalized(backend, client):
+    manager, item_id = backend
+
+    response = client.put(f'/payments/items/{item_id}', json={'parcelas_mensais': [_parcela('1/2025')]})
+
+    assert response.status_code == 200
+    assert [p['mes'] for p in response.json()['parcelas_mensais']] == ['01/2025']
+    assert [p['mes'] for p in manager.load_item(item_id)['parcelas_mensais']] == ['01/2025']
+    assert item_id in [p['item_id'] for p in client.get('/payments/months/2025-01').json()['parcelas']]
+
+@pytest.mark.parametrize('mes', ['abc', '13/2025', '2025-01', '01/2025/1'])
+def test_invalid_months_are_rejected(backend, client, mes):
+    manager, item_id = backend
+    before = manager.load_item(item_id)
+
+    response = client.put(f'/payments/items/{item_id}', json={'parcelas_mensais': [_parcela(mes)]})
+
+    assert response.status_code == 422
+    assert manager.load_item(item_id) == before
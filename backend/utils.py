@@ -1,39 +1,84 @@
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+import os
+import math
+import logging
+from typing import List, Dict, Any, Tuple, Union
+from datetime import datetime
 from models import PaymentItem, PaymentSummary, PaymentInstallment
+from installments import (
+    RecurringInstallments, PACKED_INSTALLMENTS, current_month_key, month_from_key,
+    installments_by_month, month_lookup_key
+)
+
+logger = logging.getLogger(__name__)
+
+# Motor do cálculo dos totais do resumo: python (padrão) ou numpy (summary_numpy.py, opcional)
+SUMMARY_ENGINE = os.getenv('SUMMARY_ENGINE', 'python').lower()
 
 def calculate_monthly_payments(items: List[Dict[str, Any]]) -> PaymentSummary:
     """
     Calcula os pagamentos mensais para cada pessoa baseado nos itens ativos
     """
+    totais = [0] * 6
+    
+    # Filtra apenas itens ativos
+    active_items = [item for item in items if item.get('ativo', True)]
+    current_month = get_current_month_year()
+    
+    for item, (valores, quitado) in zip(active_items, calculate_items_totals(active_items, current_month)):
+        for i, centavos in enumerate(to_cents(valores)):
+            totais[i] += centavos
+        
+        if quitado:
+            # Todas as parcelas foram pagas, marcar como inativo
+            item['ativo'] = False
+            # TODO: Implementar atualização na planilha do status ativo
+    
+    # Filtra apenas itens realmente ativos (após verificação de pagamento completo)
+    truly_active_items = [item for item in active_items if item.get('ativo', True)]
+    
+    # Converte os itens para o modelo PaymentItem
+    payment_items = [to_payment_item(item) for item in truly_active_items]
+    
+    return build_payment_summary(totais, payment_items)
+
+def calculate_item_totals(item: Dict[str, Any], current_month: str) -> Tuple[Tuple[float, ...], bool]:
+    """
+    Calcula a contribuição de um item ativo para os totais do resumo mensal
+    
+    Retorna ((mensal_pessoa1, mensal_pessoa2, restante_pessoa1, restante_pessoa2,
+    atual_pessoa1, atual_pessoa2), quitado). quitado indica uma conta parcelada
+    com todas as parcelas pagas: ela entra nos totais, mas sai da lista de itens.
+    """
     total_mensal_pessoa1 = 0.0
     total_mensal_pessoa2 = 0.0
     total_restante_pessoa1 = 0.0
     total_restante_pessoa2 = 0.0
     valor_atual_pessoa1 = 0.0  # Valor atual do mês (não pago)
     valor_atual_pessoa2 = 0.0  # Valor atual do mês (não pago)
+    quitado = False
     
-    # Filtra apenas itens ativos
-    active_items = [item for item in items if item.get('ativo', True)]
-    current_month = get_current_month_year()
+    valor_total = item['valor']
+    parcelas = item['parcelas']
+    percentual_pessoa1 = item['percentual_pessoa1']
+    percentual_pessoa2 = item['percentual_pessoa2']
+    conta_fixa = item.get('conta_fixa', False)
+    valor_manual_pessoa1 = item.get('valor_manual_pessoa1')
+    valor_manual_pessoa2 = item.get('valor_manual_pessoa2')
     
-    for item in active_items:
-        valor_total = item['valor']
-        parcelas = item['parcelas']
-        percentual_pessoa1 = item['percentual_pessoa1']
-        percentual_pessoa2 = item['percentual_pessoa2']
-        conta_fixa = item.get('conta_fixa', False)
-        valor_manual_pessoa1 = item.get('valor_manual_pessoa1')
-        valor_manual_pessoa2 = item.get('valor_manual_pessoa2')
+    # Verifica se tem parcelas mensais (nova lógica)
+    parcelas_mensais = item.get('parcelas_mensais', [])
+    
+    if parcelas_mensais:
+        # Nova lógica com parcelas mensais
         
-        # Verifica se tem parcelas mensais (nova lógica)
-        parcelas_mensais = item.get('parcelas_mensais', [])
+        # Parcelas compactas do cache ou regra de conta fixa: somas feitas sem percorrer dicionários
+        compactas = isinstance(parcelas_mensais, PACKED_INSTALLMENTS)
         
-        if parcelas_mensais:
-            # Nova lógica com parcelas mensais
-            conta_fixa = item.get('conta_fixa', False)
-            
-            # Calcula valores do mês atual
+        # Calcula valores do mês atual
+        if compactas:
+            (total_mensal_pessoa1, total_mensal_pessoa2,
+             valor_atual_pessoa1, valor_atual_pessoa2) = parcelas_mensais.month_totals(current_month)
+        else:
             parcelas_mes_atual = [p for p in parcelas_mensais if p['mes'] == current_month]
             for parcela in parcelas_mes_atual:
                 total_mensal_pessoa1 += parcela['valor_pessoa1']
@@ -44,115 +89,219 @@ def calculate_monthly_payments(items: List[Dict[str, Any]]) -> PaymentSummary:
                     valor_atual_pessoa1 += parcela['valor_pessoa1']
                 if not parcela.get('pago_pessoa2', False):
                     valor_atual_pessoa2 += parcela['valor_pessoa2']
+        
+        if not conta_fixa:
+            # CONTA PARCELADA: Calcula valor restante (total - valor já pago)
+            # (CONTA FIXA: valor restante é sempre 0, não há valor a quitar, é mensal)
+            valor_total_pessoa1 = valor_total * percentual_pessoa1 / 100
+            valor_total_pessoa2 = valor_total * percentual_pessoa2 / 100
             
-            if conta_fixa:
-                # CONTA FIXA: Valor restante é sempre 0 (não há valor a quitar, é mensal)
-                total_restante_pessoa1 += 0
-                total_restante_pessoa2 += 0
+            if compactas:
+                valor_pago_pessoa1, valor_pago_pessoa2 = parcelas_mensais.paid_totals()
+                total_parcelas_pagas = parcelas_mensais.paid_count()
             else:
-                # CONTA PARCELADA: Calcula valor restante (total - valor já pago)
-                valor_total_pessoa1 = valor_total * percentual_pessoa1 / 100
-                valor_total_pessoa2 = valor_total * percentual_pessoa2 / 100
-                
                 valor_pago_pessoa1 = sum(p['valor_pessoa1'] for p in parcelas_mensais if p.get('pago_pessoa1', False))
                 valor_pago_pessoa2 = sum(p['valor_pessoa2'] for p in parcelas_mensais if p.get('pago_pessoa2', False))
-                
-                total_restante_pessoa1 += valor_total_pessoa1 - valor_pago_pessoa1
-                total_restante_pessoa2 += valor_total_pessoa2 - valor_pago_pessoa2
-                
-                # Verifica se todas as parcelas foram pagas
                 total_parcelas_pagas = sum(1 for p in parcelas_mensais if p.get('pago_pessoa1', False) and p.get('pago_pessoa2', False))
-                if total_parcelas_pagas == len(parcelas_mensais):
-                    # Todas as parcelas foram pagas, marcar como inativo
-                    item['ativo'] = False
-                    # TODO: Implementar atualização na planilha do status ativo
-            
-        else:
-            # Lógica antiga (compatibilidade)
-            pago_pessoa1 = item.get('pago_pessoa1', False)
-            pago_pessoa2 = item.get('pago_pessoa2', False)
             
-            # Calcula o valor mensal por pessoa
-            if conta_fixa and valor_manual_pessoa1 is not None and valor_manual_pessoa2 is not None:
-                # Conta fixa com valores manuais
-                valor_mensal_pessoa1 = valor_manual_pessoa1
-                valor_mensal_pessoa2 = valor_manual_pessoa2
-                valor_total_pessoa1 = valor_manual_pessoa1
-                valor_total_pessoa2 = valor_manual_pessoa2
-            else:
-                # Conta normal com percentuais
-                valor_mensal_pessoa1 = (valor_total * percentual_pessoa1 / 100) / parcelas
-                valor_mensal_pessoa2 = (valor_total * percentual_pessoa2 / 100) / parcelas
-                valor_total_pessoa1 = valor_total * percentual_pessoa1 / 100
-                valor_total_pessoa2 = valor_total * percentual_pessoa2 / 100
-            
-            # Soma os valores mensais
-            total_mensal_pessoa1 += valor_mensal_pessoa1
-            total_mensal_pessoa2 += valor_mensal_pessoa2
-            
-            # Calcula o valor restante (total - valor mensal)
-            valor_restante_pessoa1 = valor_total_pessoa1 - valor_mensal_pessoa1
-            valor_restante_pessoa2 = valor_total_pessoa2 - valor_mensal_pessoa2
+            total_restante_pessoa1 = valor_total_pessoa1 - valor_pago_pessoa1
+            total_restante_pessoa2 = valor_total_pessoa2 - valor_pago_pessoa2
             
-            total_restante_pessoa1 += valor_restante_pessoa1
-            total_restante_pessoa2 += valor_restante_pessoa2
-            
-            # Calcula valor atual (não pago)
-            if not pago_pessoa1:
-                valor_atual_pessoa1 += valor_mensal_pessoa1
-            if not pago_pessoa2:
-                valor_atual_pessoa2 += valor_mensal_pessoa2
+            # Verifica se todas as parcelas foram pagas
+            quitado = total_parcelas_pagas == len(parcelas_mensais)
     
-    # Filtra apenas itens realmente ativos (após verificação de pagamento completo)
-    truly_active_items = [item for item in active_items if item.get('ativo', True)]
-    
-    # Converte os itens para o modelo PaymentItem
-    payment_items = []
-    for item in truly_active_items:
-        # Converte parcelas mensais se existirem
-        parcelas_mensais = None
-        if item.get('parcelas_mensais'):
-            parcelas_mensais = [
-                PaymentInstallment(
-                    mes=p['mes'],
-                    valor_pessoa1=p['valor_pessoa1'],
-                    valor_pessoa2=p['valor_pessoa2'],
-                    pago_pessoa1=p.get('pago_pessoa1', False),
-                    pago_pessoa2=p.get('pago_pessoa2', False)
-                ) for p in item['parcelas_mensais']
-            ]
+    else:
+        # Lógica antiga (compatibilidade)
+        pago_pessoa1 = item.get('pago_pessoa1', False)
+        pago_pessoa2 = item.get('pago_pessoa2', False)
         
-        payment_item = PaymentItem(
-            id=item['id'],
-            nome=item['nome'],
-            valor=item['valor'],
-            parcelas=item['parcelas'],
-            percentual_pessoa1=item['percentual_pessoa1'],
-            percentual_pessoa2=item['percentual_pessoa2'],
-            data_criacao=item.get('data_criacao', ''),
-            ativo=item.get('ativo', True),
-            conta_fixa=item.get('conta_fixa', False),
-            valor_manual_pessoa1=item.get('valor_manual_pessoa1'),
-            valor_manual_pessoa2=item.get('valor_manual_pessoa2'),
-            pago_pessoa1=item.get('pago_pessoa1', False),
-            pago_pessoa2=item.get('pago_pessoa2', False),
-            parcelas_mensais=parcelas_mensais,
-            comecar_mes_atual=item.get('comecar_mes_atual', True)
-        )
-        payment_items.append(payment_item)
-    
-    return PaymentSummary(
-        pessoa1="Gabriel",
-        pessoa2="Juliana",
-        total_pessoa1=round(total_mensal_pessoa1, 2),
-        total_pessoa2=round(total_mensal_pessoa2, 2),
-        valor_restante_pessoa1=round(total_restante_pessoa1, 2),
-        valor_restante_pessoa2=round(total_restante_pessoa2, 2),
-        valor_atual_pessoa1=round(valor_atual_pessoa1, 2),
-        valor_atual_pessoa2=round(valor_atual_pessoa2, 2),
-        mes_atual=get_current_month_year(),
-        itens=payment_items
+        # Calcula o valor mensal por pessoa
+        if conta_fixa and valor_manual_pessoa1 is not None and valor_manual_pessoa2 is not None:
+            # Conta fixa com valores manuais
+            valor_mensal_pessoa1 = valor_manual_pessoa1
+            valor_mensal_pessoa2 = valor_manual_pessoa2
+            valor_total_pessoa1 = valor_manual_pessoa1
+            valor_total_pessoa2 = valor_manual_pessoa2
+        else:
+            # Conta normal com percentuais
+            valor_mensal_pessoa1 = (valor_total * percentual_pessoa1 / 100) / parcelas
+            valor_mensal_pessoa2 = (valor_total * percentual_pessoa2 / 100) / parcelas
+            valor_total_pessoa1 = valor_total * percentual_pessoa1 / 100
+            valor_total_pessoa2 = valor_total * percentual_pessoa2 / 100
+        
+        total_mensal_pessoa1 = valor_mensal_pessoa1
+        total_mensal_pessoa2 = valor_mensal_pessoa2
+        
+        # Calcula o valor restante (total - valor mensal)
+        total_restante_pessoa1 = valor_total_pessoa1 - valor_mensal_pessoa1
+        total_restante_pessoa2 = valor_total_pessoa2 - valor_mensal_pessoa2
+        
+        # Calcula valor atual (não pago)
+        if not pago_pessoa1:
+            valor_atual_pessoa1 = valor_mensal_pessoa1
+        if not pago_pessoa2:
+            valor_atual_pessoa2 = valor_mensal_pessoa2
+    
+    valores = (
+        total_mensal_pessoa1, total_mensal_pessoa2,
+        total_restante_pessoa1, total_restante_pessoa2,
+        valor_atual_pessoa1, valor_atual_pessoa2
     )
+    return valores, quitado
+
+def calculate_items_totals(items: List[Dict[str, Any]], current_month: str) -> List[Tuple[Tuple[float, ...], bool]]:
+    """
+    calculate_item_totals para vários itens, com o motor configurado em SUMMARY_ENGINE
+    """
+    if SUMMARY_ENGINE == 'numpy':
+        import summary_numpy
+        if summary_numpy.is_available():
+            return summary_numpy.calculate_items_totals(items, current_month)
+        logger.warning("SUMMARY_ENGINE=numpy, mas o NumPy não está instalado; usando o cálculo em Python")
+    
+    return [calculate_item_totals(item, current_month) for item in items]
+
+def to_cents(valores: Tuple[float, ...]) -> Tuple[Union[int, float], ...]:
+    """
+    Converte a contribuição de um item (calculate_item_totals) em centavos inteiros
+    
+    Os totais do resumo são somas de centavos: somar e subtrair contribuições
+    (SummaryIndex) é exato e dá o mesmo resultado em qualquer ordem. Valores não
+    finitos (inf/NaN vindos da planilha) ficam como estão.
+    """
+    return tuple(round(valor * 100) if math.isfinite(valor) else valor for valor in valores)
+
+def payment_summary_fields(totais: List[int]) -> Dict[str, Any]:
+    """
+    Campos do PaymentSummary, exceto itens, a partir dos totais em centavos na ordem de calculate_item_totals
+    """
+    return {
+        'pessoa1': "Gabriel",
+        'pessoa2': "Juliana",
+        'total_pessoa1': totais[0] / 100,
+        'total_pessoa2': totais[1] / 100,
+        'valor_restante_pessoa1': totais[2] / 100,
+        'valor_restante_pessoa2': totais[3] / 100,
+        'valor_atual_pessoa1': totais[4] / 100,
+        'valor_atual_pessoa2': totais[5] / 100,
+        'mes_atual': get_current_month_year()
+    }
+
+def build_payment_summary(totais: List[int], payment_items: List[PaymentItem]) -> PaymentSummary:
+    """
+    Monta o PaymentSummary a partir dos totais em centavos na ordem de calculate_item_totals
+    """
+    return PaymentSummary(**payment_summary_fields(totais), itens=payment_items)
+
+def to_payment_item(item: Dict[str, Any]) -> PaymentItem:
+    """
+    Converte um item (dicionário vindo do armazenamento) no modelo PaymentItem
+    """
+    # Converte parcelas mensais se existirem
+    parcelas_mensais = None
+    if isinstance(item.get('parcelas_mensais'), PACKED_INSTALLMENTS):
+        parcelas_mensais = item['parcelas_mensais'].to_models()
+    elif item.get('parcelas_mensais'):
+        parcelas_mensais = [
+            PaymentInstallment(
+                mes=p['mes'],
+                valor_pessoa1=p['valor_pessoa1'],
+                valor_pessoa2=p['valor_pessoa2'],
+                pago_pessoa1=p.get('pago_pessoa1', False),
+                pago_pessoa2=p.get('pago_pessoa2', False)
+            ) for p in item['parcelas_mensais']
+        ]
+    
+    return PaymentItem(
+        id=item['id'],
+        nome=item['nome'],
+        valor=item['valor'],
+        parcelas=item['parcelas'],
+        percentual_pessoa1=item['percentual_pessoa1'],
+        percentual_pessoa2=item['percentual_pessoa2'],
+        data_criacao=item.get('data_criacao', ''),
+        ativo=item.get('ativo', True),
+        conta_fixa=item.get('conta_fixa', False),
+        valor_manual_pessoa1=item.get('valor_manual_pessoa1'),
+        valor_manual_pessoa2=item.get('valor_manual_pessoa2'),
+        pago_pessoa1=item.get('pago_pessoa1', False),
+        pago_pessoa2=item.get('pago_pessoa2', False),
+        parcelas_mensais=parcelas_mensais,
+        comecar_mes_atual=item.get('comecar_mes_atual', True)
+    )
+
+def apply_installment_payment(
+    item: Dict[str, Any],
+    mes: str,
+    pessoa: str,
+    parcelas_por_mes: Dict[Any, List[Dict[str, Any]]] = None
+) -> bool:
+    """
+    Marca como paga, no próprio item, a parcela do mês para a pessoa informada
+    
+    Contas parceladas com todas as parcelas pagas são marcadas como inativas.
+    Retorna True se o item foi inativado. parcelas_por_mes é o índice de
+    installments.installments_by_month das parcelas do item; quem marca vários
+    meses do mesmo item (pagamento em lote) monta o índice uma vez e o repassa.
+    
+    Raises:
+        ValueError: Se o item não tem parcelas mensais ou a pessoa é inválida
+        LookupError: Se não existe parcela para o mês informado
+    """
+    parcelas_mensais = item.get('parcelas_mensais', [])
+    if not parcelas_mensais:
+        raise ValueError("Item não possui parcelas mensais")
+    
+    if isinstance(parcelas_mensais, RecurringInstallments):
+        # Conta fixa em regra de recorrência: só registra o mês pago (não há quitação)
+        parcelas_mensais.set_paid(mes, pessoa)
+        return False
+    
+    # Encontra a parcela do mês especificado (a primeira, se houver mais de uma)
+    if parcelas_por_mes is None:
+        parcelas_por_mes = installments_by_month(parcelas_mensais)
+    parcelas_do_mes = parcelas_por_mes.get(month_lookup_key(mes))
+    if not parcelas_do_mes:
+        raise LookupError(f"Parcela do mês {mes} não encontrada")
+    
+    parcela = parcelas_do_mes[0]
+    if pessoa == "pessoa1":
+        parcela['pago_pessoa1'] = True
+    elif pessoa == "pessoa2":
+        parcela['pago_pessoa2'] = True
+    else:
+        raise ValueError("Pessoa deve ser 'pessoa1' ou 'pessoa2'")
+    
+    # Verifica se todas as parcelas foram pagas (só para contas parceladas); se a
+    # parcela marcada ainda não está quitada, a conta também não está
+    quitada = parcela.get('pago_pessoa1', False) and parcela.get('pago_pessoa2', False)
+    if quitada and not item.get('conta_fixa', False):
+        total_parcelas_pagas = sum(1 for p in parcelas_mensais if p.get('pago_pessoa1', False) and p.get('pago_pessoa2', False))
+        if total_parcelas_pagas == len(parcelas_mensais) and item.get('ativo', True):
+            # Todas as parcelas foram pagas, marcar como inativo
+            item['ativo'] = False
+            return True
+    
+    return False
+
+def normalize_fixed_bill_installments(item: Dict[str, Any]):
+    """
+    Ajusta, no próprio item, a representação das parcelas ao tipo da conta
+    
+    Parcelas materializadas de uma conta fixa (itens antigos, com 120 meses, ou
+    listas enviadas pela API) viram regra de recorrência quando todas têm o mesmo
+    valor; uma regra em item que deixou de ser conta fixa volta a ser lista.
+    """
+    parcelas_mensais = item.get('parcelas_mensais')
+    if not parcelas_mensais:
+        return
+    if item.get('conta_fixa', False):
+        if not isinstance(parcelas_mensais, RecurringInstallments):
+            recorrencia = RecurringInstallments.from_dicts(parcelas_mensais)
+            if recorrencia is not None:
+                item['parcelas_mensais'] = recorrencia
+    elif isinstance(parcelas_mensais, RecurringInstallments):
+        item['parcelas_mensais'] = parcelas_mensais.to_dicts()
 
 def validate_percentages(percentual_pessoa1: float, percentual_pessoa2: float) -> bool:
     """
@@ -211,26 +360,17 @@ def generate_monthly_installments(
         valor_mensal_pessoa1 = valor_pessoa1 / parcelas
         valor_mensal_pessoa2 = valor_pessoa2 / parcelas
     
-    # Define o mês inicial
-    if comecar_mes_atual:
-        # Começa no mês atual
-        current_date = datetime.now()
-    else:
-        # Começa no próximo mês
-        current_date = datetime.now() + timedelta(days=32)
-        current_date = current_date.replace(day=1)
-    
-    # Gera as parcelas
-    for i in range(parcelas):
-        # Calcula o mês da parcela
-        month_date = current_date + timedelta(days=32 * i)
-        month_date = month_date.replace(day=1)
-        mes_str = month_date.strftime("%m/%Y")
-        
+    # Define o mês inicial (chave inteira ano * 12 + mês): o atual ou o próximo
+    inicio = current_month_key() if comecar_mes_atual else current_month_key() + 1
+    valor_parcela_pessoa1 = round(valor_mensal_pessoa1, 2)
+    valor_parcela_pessoa2 = round(valor_mensal_pessoa2, 2)
+    
+    # Gera as parcelas, uma por mês do calendário a partir do inicial
+    for key in range(inicio, inicio + parcelas):
         parcela = PaymentInstallment(
-            mes=mes_str,
-            valor_pessoa1=round(valor_mensal_pessoa1, 2),
-            valor_pessoa2=round(valor_mensal_pessoa2, 2),
+            mes=month_from_key(key),
+            valor_pessoa1=valor_parcela_pessoa1,
+            valor_pessoa2=valor_parcela_pessoa2,
             pago_pessoa1=False,
             pago_pessoa2=False
         )
@@ -238,6 +378,28 @@ def generate_monthly_installments(
     
     return parcelas_mensais
 
+def generate_recurring_installments(
+    valor_total: float,
+    percentual_pessoa1: float,
+    percentual_pessoa2: float,
+    comecar_mes_atual: bool = True,
+    valor_manual_pessoa1: float = None,
+    valor_manual_pessoa2: float = None
+) -> RecurringInstallments:
+    """
+    Gera a regra de recorrência de uma conta fixa (mesmos valores de generate_monthly_installments)
+    """
+    if valor_manual_pessoa1 is not None and valor_manual_pessoa2 is not None:
+        valor_mensal_pessoa1 = valor_manual_pessoa1
+        valor_mensal_pessoa2 = valor_manual_pessoa2
+    else:
+        valor_mensal_pessoa1 = valor_total * percentual_pessoa1 / 100
+        valor_mensal_pessoa2 = valor_total * percentual_pessoa2 / 100
+    
+    # Começa no mês atual ou no próximo
+    inicio = current_month_key() if comecar_mes_atual else current_month_key() + 1
+    return RecurringInstallments(inicio, float(round(valor_mensal_pessoa1, 2)), float(round(valor_mensal_pessoa2, 2)))
+
 def get_current_month_installments(parcelas_mensais: List[PaymentInstallment]) -> List[PaymentInstallment]:
     """
     Retorna as parcelas do mês atual